@@ -3,7 +3,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 import os
 from services.gmail_service import GmailService
-from routers import auth, emails
+from routers import auth, emails, metrics, webhooks
 from routers.emails import setup_email_polling
 
 # 환경변수 로드
@@ -27,6 +27,8 @@ app.add_middleware(
 # 라우터 포함
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(emails.router, prefix="/api/emails", tags=["Emails"])
+app.include_router(metrics.router, prefix="/api/metrics", tags=["Metrics"])
+app.include_router(webhooks.router, prefix="/api/webhooks", tags=["Webhooks"])
 
 # 상태 확인 엔드포인트
 @app.get("/")
@@ -0,0 +1,114 @@
+from typing import Dict, Optional, Union
+from dotenv import load_dotenv
+from sqlalchemy import LargeBinary
+from sqlalchemy.types import TypeDecorator
+import os
+import time
+import zlib
+
+load_dotenv()
+
+# 압축 수준과 압축할 최소 크기(bytes) - 작은 본문은 압축 헤더가 더 클 수 있음
+BODY_COMPRESSION_LEVEL = int(os.getenv("BODY_COMPRESSION_LEVEL", "6"))
+BODY_COMPRESSION_MIN_BYTES = int(os.getenv("BODY_COMPRESSION_MIN_BYTES", "256"))
+
+# 저장 형식: MAGIC + 버전 1바이트 + 데이터
+# 기존 행은 헤더 없는 평문(UTF-8)이므로 NUL로 시작하지 않는 값은 평문으로 읽습니다.
+MAGIC = b"\x00"
+FORMAT_RAW = 0  # 압축하지 않은 UTF-8
+FORMAT_ZLIB_DICT_V1 = 1  # BODY_ZDICT_V1 사전을 사용한 zlib
+
+# 이메일 HTML에 자주 나오는 문자열로 만든 zlib 사전 (뒤쪽일수록 자주 쓰이는 문자열)
+# 내용을 바꾸면 기존 데이터를 읽을 수 없으므로 반드시 새 버전으로 추가해야 합니다.
+BODY_ZDICT_V1 = (
+    "unsubscribe view in browser privacy policy terms of service all rights reserved "
+    "You are receiving this email because you subscribed 수신거부 구독 해지 개인정보처리방침 "
+    "font-family:Arial,Helvetica,sans-serif; font-size:14px; line-height:1.5; color:#333333; "
+    "text-decoration:none; background-color:#ffffff; padding:0; margin:0 auto; border:0; "
+    "display:block; max-width:600px; width:100%; text-align:center; vertical-align:top; "
+    "<!DOCTYPE html><html><head><meta charset=\"UTF-8\"><meta name=\"viewport\" "
+    "content=\"width=device-width, initial-scale=1.0\"><style type=\"text/css\"></style></head>"
+    "<body style=\"margin:0;padding:0;\"><table role=\"presentation\" width=\"100%\" "
+    "cellpadding=\"0\" cellspacing=\"0\" border=\"0\" align=\"center\"><tbody><tr><td "
+    "style=\"padding:0;\"><a href=\"https://\" target=\"_blank\" style=\"color:#1a73e8;"
+    "text-decoration:none;\"><img src=\"https://\" alt=\"\" width=\"\" height=\"\" "
+    "style=\"display:block;border:0;\"></a></td></tr></tbody></table><div class=\"\" "
+    "style=\"\"><span style=\"\"><p style=\"margin:0;\"><br></p></span></div></body></html>"
+).encode("utf-8")
+
+_DICTIONARIES = {FORMAT_ZLIB_DICT_V1: BODY_ZDICT_V1}
+
+_stats = {
+    "compressed": 0,
+    "raw_bytes": 0,
+    "stored_bytes": 0,
+    "decompressed": 0,
+    "legacy_reads": 0,
+    "decompress_seconds": 0.0,
+}
+
+
+def compress_body(value: str) -> bytes:
+    """본문 문자열을 버전 헤더가 붙은 저장 형식으로 변환합니다."""
+    raw = value.encode("utf-8")
+    if len(raw) < BODY_COMPRESSION_MIN_BYTES:
+        stored = MAGIC + bytes([FORMAT_RAW]) + raw
+    else:
+        compressor = zlib.compressobj(BODY_COMPRESSION_LEVEL, zdict=BODY_ZDICT_V1)
+        payload = compressor.compress(raw) + compressor.flush()
+        stored = MAGIC + bytes([FORMAT_ZLIB_DICT_V1]) + payload
+        _stats["compressed"] += 1
+    _stats["raw_bytes"] += len(raw)
+    _stats["stored_bytes"] += len(stored)
+    return stored
+
+
+def decompress_body(stored: Union[bytes, str]) -> str:
+    """저장된 본문을 문자열로 되돌립니다. 헤더가 없는 기존 평문 행도 그대로 읽습니다."""
+    if isinstance(stored, str):
+        _stats["legacy_reads"] += 1
+        return stored
+    stored = bytes(stored)
+    if not stored.startswith(MAGIC) or len(stored) < 2:
+        _stats["legacy_reads"] += 1
+        return stored.decode("utf-8", errors="replace")
+
+    version, payload = stored[1], stored[2:]
+    if version == FORMAT_RAW:
+        return payload.decode("utf-8")
+    if version not in _DICTIONARIES:
+        raise Exception(f"알 수 없는 본문 저장 형식입니다: {version}")
+
+    started_at = time.monotonic()
+    decompressor = zlib.decompressobj(zdict=_DICTIONARIES[version])
+    text = (decompressor.decompress(payload) + decompressor.flush()).decode("utf-8")
+    _stats["decompressed"] += 1
+    _stats["decompress_seconds"] += time.monotonic() - started_at
+    return text
+
+
+class CompressedText(TypeDecorator):
+    """본문을 압축해서 저장하는 컬럼 타입
+
+    deferred 컬럼과 함께 사용하면 본문을 실제로 읽을 때만 압축을 풉니다.
+    """
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value: Optional[str], dialect) -> Optional[bytes]:
+        if value is None:
+            return None
+        return compress_body(value)
+
+    def process_result_value(self, value: Optional[Union[bytes, str]], dialect) -> Optional[str]:
+        if value is None:
+            return None
+        return decompress_body(value)
+
+
+def get_compression_stats() -> Dict:
+    """본문 압축 지표를 반환합니다."""
+    stats = dict(_stats)
+    stats["compression_ratio"] = stats["stored_bytes"] / stats["raw_bytes"] if stats["raw_bytes"] else 0.0
+    stats["avg_decompress_ms"] = stats["decompress_seconds"] / stats["decompressed"] * 1000 if stats["decompressed"] else 0.0
+    return stats
@@ -0,0 +1,26 @@
+from typing import List, Optional
+from sqlalchemy import Column, ForeignKey, Index, Integer, String
+from models.database import Base
+
+class EmailLabel(Base):
+    """이메일-라벨 관계 (라벨별 조회를 인덱스로 처리하기 위한 정규화 테이블)"""
+    __tablename__ = 'email_labels'
+
+    email_id = Column(Integer, ForeignKey('emails.id', ondelete='CASCADE'), primary_key=True)  # emails.id
+    label_id = Column(String, primary_key=True)  # Gmail 라벨 ID
+    user_id = Column(String, nullable=False)  # 소유자 (조회 시 emails 조인 없이 필터링)
+
+    __table_args__ = (
+        Index('ix_email_labels_user_label', 'user_id', 'label_id', 'email_id'),
+    )
+
+def make_labels(user_id: Optional[str], label_ids: Optional[List[str]]) -> List[EmailLabel]:
+    """라벨 ID 목록을 중복 없이 EmailLabel 행으로 만듭니다."""
+    return [EmailLabel(user_id=user_id, label_id=label_id) for label_id in dict.fromkeys(label_ids or [])]
+
+def replace_labels(email, label_ids: Optional[List[str]]):
+    """이메일의 라벨을 새 목록으로 바꿉니다. 그대로인 라벨 행은 유지하고 바뀐 라벨만 추가/삭제합니다."""
+    current = {label.label_id: label for label in email.labels}
+    email.labels = [current.get(label_id) or EmailLabel(user_id=email.user_id, label_id=label_id)
+                    for label_id in dict.fromkeys(label_ids or [])]
+    email.label_ids = label_ids or []
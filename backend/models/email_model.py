@@ -1,67 +1,97 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Text, create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, Float, Text, Index, JSON
+from sqlalchemy.orm import deferred, relationship
 from datetime import datetime
-import os
+from models.database import Base, engine, SessionLocal, get_db
+from models.compressed_text import CompressedText
+from models.email_label_model import EmailLabel
 
-Base = declarative_base()
+class CategorySource:
+    RULE = "RULE"  # 라벨/헤더 규칙 분류
+    THREAD = "THREAD"  # 스레드 분류를 따름 (스레드 분류가 바뀌면 함께 바뀜)
+    MESSAGE = "MESSAGE"  # 스레드와 다르게 개별 분류됨
 
 class Email(Base):
     __tablename__ = 'emails'
 
     id = Column(Integer, primary_key=True)
-    email_id = Column(String, unique=True, nullable=False)  # Gmail message ID
+    email_id = Column(String, nullable=False)  # Gmail message ID (사용자별로 유일)
+    user_id = Column(String)  # 소유자 (users.user_id)
     thread_id = Column(String)  # Gmail thread ID
     subject = Column(String)
     sender = Column(String)
     recipient = Column(String)
-    content = Column(Text)
-    html_content = Column(Text)  # HTML 형식의 이메일 내용
+    snippet = Column(String)  # 목록용 미리보기 (Gmail snippet)
+    # 본문은 목록 조회에서 읽지 않도록 지연 로딩 (상세 조회 시 undefer로 함께 로드)
+    # 압축 저장하며 읽을 때만 압축을 풂 (압축 이전의 평문 행도 그대로 읽힘)
+    content = deferred(Column(CompressedText))
+    html_content = deferred(Column(CompressedText))  # HTML 형식의 이메일 내용
+    headers = deferred(Column(JSON))  # 원본 헤더 {이름: 값} (상세 조회용)
     category = Column(String, nullable=False)  # WORK, PERSONAL, NEWSLETTER, etc.
+    category_source = Column(String)  # CategorySource
     importance = Column(Float, nullable=False)  # 0-100
     summary = Column(Text)  # 이메일 요약
-    key_points = Column(Text)  # 주요 포인트
+    key_points = Column(JSON)  # 주요 포인트 (문자열 목록)
     sentiment = Column(String)  # 감정 분석 결과
-    action_items = Column(Text)  # 액션 아이템
-    label_ids = Column(Text)  # Gmail 라벨 ID들 (JSON 문자열로 저장)
+    action_items = Column(JSON)  # 액션 아이템 (문자열 목록)
+    has_action_items = Column(Boolean, nullable=False, default=False)  # 액션 아이템 필터용
+    label_ids = Column(JSON)  # Gmail 라벨 ID들 (라벨 필터는 email_labels 테이블 사용)
     received_at = Column(DateTime, nullable=False)  # Gmail 수신 시간
     processed_at = Column(DateTime, default=datetime.utcnow)  # 처리 시간
+    synced_at = Column(DateTime)  # 헤더/본문/라벨을 Gmail에서 받아 저장한 시간 (NULL이면 상세 조회 시 다시 가져옴)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # 마지막 변경 시간 (상세 조회 ETag)
 
-    def to_dict(self):
-        return {
+    labels = relationship(EmailLabel, cascade="all, delete-orphan", passive_deletes=True)
+
+    # 조회 패턴별 복합 인덱스 (기존 DB에는 models/migrations.py에서 추가)
+    __table_args__ = (
+        Index('ux_emails_user_email', 'user_id', 'email_id', unique=True),
+        Index('ix_emails_user_importance', 'user_id', importance.desc(), received_at.desc(), id.desc()),
+        Index('ix_emails_user_category_importance', 'user_id', 'category', importance.desc(), received_at.desc(), id.desc()),
+        Index('ix_emails_user_received', 'user_id', received_at.desc(), id.desc()),
+        Index('ix_emails_user_category_received', 'user_id', 'category', received_at.desc(), id.desc()),
+        Index('ix_emails_user_thread', 'user_id', 'thread_id', 'received_at'),
+        Index('ix_emails_user_action_received', 'user_id', 'has_action_items', received_at.desc(), id.desc()),
+    )
+
+    def to_dict(self, include_body: bool = False):
+        data = {
             "id": self.id,
             "email_id": self.email_id,
+            "user_id": self.user_id,
             "thread_id": self.thread_id,
             "subject": self.subject,
             "sender": self.sender,
             "recipient": self.recipient,
-            "content": self.content,
-            "html_content": self.html_content,
+            "snippet": self.snippet,
             "category": self.category,
+            "category_source": self.category_source,
             "importance": self.importance,
             "summary": self.summary,
             "key_points": self.key_points,
             "sentiment": self.sentiment,
             "action_items": self.action_items,
+            "has_action_items": self.has_action_items,
             "label_ids": self.label_ids,
             "received_at": self.received_at.isoformat() if self.received_at else None,
-            "processed_at": self.processed_at.isoformat() if self.processed_at else None
+            "processed_at": self.processed_at.isoformat() if self.processed_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
         }
-
-# SQLite 데이터베이스 설정
-DATABASE_URL = "sqlite:///./data/emails.db"
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        if include_body:
+            data["content"] = self.content
+            data["html_content"] = self.html_content
+        return data
 
 def init_db():
     from models.email_model import Email
+    from models.llm_cache_model import LlmCacheEntry
+    from models.sync_state_model import SyncState
+    from models.user_model import User
+    from models.gmail_watch_model import GmailWatch
+    from models.email_thread_model import EmailThread
+    from models.migrations import run_migrations
+    import models.email_search_index  # 검색 색인 갱신 이벤트 등록
     """데이터베이스를 초기화합니다."""
     # 테이블 생성
     Base.metadata.create_all(bind=engine)
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+    # 기존 테이블 스키마 변경 적용
+    run_migrations(engine)
@@ -0,0 +1,51 @@
+from typing import Dict, Optional
+from dotenv import load_dotenv
+from sqlalchemy import event, inspect, text
+import os
+from models.email_model import Email
+
+load_dotenv()
+
+# 검색 색인에 넣을 본문 최대 길이 (색인 크기 제한)
+SEARCH_INDEX_MAX_CHARS = int(os.getenv("SEARCH_INDEX_MAX_CHARS", "20000"))
+
+# 검색 색인 테이블 (emails_fts.rowid = emails.id)
+# SQLite는 FTS5 가상 테이블, PostgreSQL은 tsvector 생성 컬럼 + GIN 인덱스 (models/migrations.py에서 생성)
+INDEXED_FIELDS = ('subject', 'sender', 'content', 'summary')
+
+
+def _index_text(field: str, value: Optional[str]) -> str:
+    value = value or ''
+    return value[:SEARCH_INDEX_MAX_CHARS] if field == 'content' else value
+
+
+@event.listens_for(Email, "after_insert")
+def _index_inserted(mapper, connection, target: Email):
+    """이메일 저장과 같은 트랜잭션에서 검색 색인에 추가합니다."""
+    params = {field: _index_text(field, getattr(target, field)) for field in INDEXED_FIELDS}
+    connection.execute(
+        text("INSERT INTO emails_fts (rowid, subject, sender, content, summary) "
+             "VALUES (:rowid, :subject, :sender, :content, :summary)"),
+        {"rowid": target.id, **params}
+    )
+
+
+@event.listens_for(Email, "after_update")
+def _index_updated(mapper, connection, target: Email):
+    """색인 대상 필드가 바뀐 경우에만 해당 필드를 갱신합니다. (본문이 로드되지 않았으면 본문은 그대로 유지)"""
+    state = inspect(target)
+    changed: Dict[str, str] = {
+        field: _index_text(field, getattr(target, field))
+        for field in INDEXED_FIELDS
+        if field not in state.unloaded and state.attrs[field].history.has_changes()
+    }
+    if not changed:
+        return
+    assignments = ", ".join(f"{field} = :{field}" for field in changed)
+    connection.execute(text(f"UPDATE emails_fts SET {assignments} WHERE rowid = :rowid"),
+                       {"rowid": target.id, **changed})
+
+
+@event.listens_for(Email, "after_delete")
+def _index_deleted(mapper, connection, target: Email):
+    connection.execute(text("DELETE FROM emails_fts WHERE rowid = :rowid"), {"rowid": target.id})
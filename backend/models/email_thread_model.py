@@ -0,0 +1,47 @@
+from sqlalchemy import Column, DateTime, Float, Index, Integer, JSON, String, Text
+from datetime import datetime
+from models.database import Base
+
+class EmailThread(Base):
+    """Gmail 스레드 단위 분류/요약
+
+    요약은 이전 스레드 요약 + 새 메시지만으로 갱신합니다. (services/thread_summarizer.py)
+    """
+    __tablename__ = 'email_threads'
+
+    user_id = Column(String, primary_key=True)  # 소유자 (users.user_id)
+    thread_id = Column(String, primary_key=True)  # Gmail thread ID
+    subject = Column(String)  # 첫 메시지 제목
+    category = Column(String, nullable=False)  # 스레드 분류 (메시지는 개별 분류가 없으면 이 값을 따름)
+    importance = Column(Float, nullable=False)  # 0-100
+    summary = Column(Text)  # 스레드 전체 요약
+    key_points = Column(JSON)  # 주요 포인트 (문자열 목록)
+    action_items = Column(JSON)  # 남은 액션 아이템 (문자열 목록)
+    sentiment = Column(String)
+    message_count = Column(Integer, nullable=False, default=0)
+    summarized_count = Column(Integer, nullable=False, default=0)  # 요약에 반영된 메시지 수
+    last_email_id = Column(String)  # 마지막으로 반영된 Gmail message ID
+    last_message_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index('ix_email_threads_user_last', 'user_id', last_message_at.desc(), thread_id.desc()),
+        Index('ix_email_threads_user_importance', 'user_id', importance.desc(), last_message_at.desc(), thread_id.desc()),
+        Index('ix_email_threads_user_category_last', 'user_id', 'category', last_message_at.desc(), thread_id.desc()),
+    )
+
+    def to_dict(self):
+        return {
+            "thread_id": self.thread_id,
+            "subject": self.subject,
+            "category": self.category,
+            "importance": self.importance,
+            "summary": self.summary,
+            "key_points": self.key_points,
+            "action_items": self.action_items,
+            "sentiment": self.sentiment,
+            "message_count": self.message_count,
+            "summarized_count": self.summarized_count,
+            "last_email_id": self.last_email_id,
+            "last_message_at": self.last_message_at.isoformat() if self.last_message_at else None
+        }
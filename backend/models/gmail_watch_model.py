@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, DateTime
+from datetime import datetime
+from models.email_model import Base
+
+class GmailWatch(Base):
+    __tablename__ = 'gmail_watches'
+
+    user_id = Column(String, primary_key=True)
+    topic_name = Column(String, nullable=False)  # Pub/Sub 토픽
+    history_id = Column(String)  # watch 등록 시점의 historyId
+    expiration = Column(DateTime, nullable=False)  # watch 만료 시간 (최대 7일)
+    registered_at = Column(DateTime, default=datetime.utcnow)
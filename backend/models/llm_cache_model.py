@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from datetime import datetime
+from models.email_model import Base
+
+class LlmCacheEntry(Base):
+    __tablename__ = 'llm_cache'
+
+    cache_key = Column(String, primary_key=True)  # 정규화된 이메일 + 프롬프트 버전 + 모델명 해시
+    prompt_version = Column(String, nullable=False)
+    model_name = Column(String, nullable=False)
+    result = Column(Text, nullable=False)  # Gemini 분석 결과 (JSON 문자열)
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    last_accessed_at = Column(DateTime, default=datetime.utcnow, index=True)
@@ -0,0 +1,307 @@
+from typing import List, Optional
+from sqlalchemy import String, Text, bindparam, inspect, text
+import json
+import re
+from models.compressed_text import decompress_body
+from sqlalchemy.engine import Connection, Engine
+
+# 스키마 버전 관리
+# create_all은 없는 테이블만 만들기 때문에 기존 테이블의 컬럼/인덱스 변경은 여기에 순서대로 추가합니다.
+# 새 DB는 create_all로 최신 스키마가 만들어지므로 각 마이그레이션은 여러 번 실행해도 안전해야 합니다.
+
+
+def _has_column(conn: Connection, table: str, column: str) -> bool:
+    return column in {c['name'] for c in inspect(conn).get_columns(table)}
+
+
+def _add_column(conn: Connection, table: str, column: str, ddl: str):
+    """컬럼이 없을 때만 추가합니다."""
+    if not _has_column(conn, table, column):
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+def _create_index(conn: Connection, name: str, table: str, columns: str):
+    """인덱스가 없을 때만 생성합니다."""
+    conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+
+
+def _json_text(value):
+    """드라이버가 JSON 컬럼을 파이썬 값으로 읽은 경우 다시 JSON 문자열로 바꿉니다."""
+    return value if value is None or isinstance(value, str) else json.dumps(value)
+
+
+def _migration_1(conn: Connection):
+    """emails 테이블에 소유자(user_id) 컬럼과 조회 패턴별 복합 인덱스를 추가합니다."""
+    _add_column(conn, 'emails', 'user_id', 'VARCHAR')
+    # 이전 버전은 사용자를 저장하지 않았으므로 소유자가 없는 기존 이메일은
+    # 첫 사용자 등록/동기화 시 claim_ownerless_emails로 할당합니다.
+
+    _create_index(conn, 'ix_emails_user_importance', 'emails',
+                  'user_id, importance DESC, received_at DESC, id DESC')
+    _create_index(conn, 'ix_emails_user_category_importance', 'emails',
+                  'user_id, category, importance DESC, received_at DESC, id DESC')
+    _create_index(conn, 'ix_emails_user_received', 'emails',
+                  'user_id, received_at DESC, id DESC')
+    _create_index(conn, 'ix_emails_user_category_received', 'emails',
+                  'user_id, category, received_at DESC, id DESC')
+    _create_index(conn, 'ix_emails_user_thread', 'emails',
+                  'user_id, thread_id, received_at')
+
+
+def _migration_2(conn: Connection):
+    """목록 조회가 본문을 읽지 않도록 미리보기(snippet) 컬럼을 추가합니다."""
+    _add_column(conn, 'emails', 'snippet', 'VARCHAR')
+    conn.execute(text("UPDATE emails SET snippet = substr(content, 1, 200) WHERE snippet IS NULL"))
+
+
+def _migration_3(conn: Connection):
+    """본문 컬럼을 압축 저장용 바이너리 타입으로 바꿉니다.
+
+    SQLite는 컬럼 타입과 관계없이 값을 저장하므로 변경이 필요 없고, 기존 평문 행은 그대로 읽힙니다.
+    """
+    if conn.dialect.name != 'postgresql':
+        return
+    # create_all로 새로 만든 DB는 이미 BYTEA이므로 텍스트 컬럼만 변환
+    column_types = {c['name']: c['type'] for c in inspect(conn).get_columns('emails')}
+    for column in ('content', 'html_content'):
+        if not isinstance(column_types.get(column), (String, Text)):
+            continue
+        conn.execute(text(
+            f"ALTER TABLE emails ALTER COLUMN {column} TYPE BYTEA USING convert_to({column}, 'UTF8')"
+        ))
+
+
+def _migration_4(conn: Connection):
+    """JSON 컬럼 전환, 액션 아이템 여부 컬럼과 라벨 테이블(email_labels)을 채웁니다.
+
+    기존 Text 컬럼에는 이미 JSON 문자열이 저장되어 있어 SQLite는 값 변환 없이 JSON 타입으로 읽힙니다.
+    """
+    if conn.dialect.name == 'postgresql':
+        for column in ('key_points', 'action_items', 'label_ids'):
+            conn.execute(text(f"ALTER TABLE emails ALTER COLUMN {column} TYPE JSON USING {column}::json"))
+
+    _add_column(conn, 'emails', 'has_action_items', 'BOOLEAN NOT NULL DEFAULT FALSE')
+
+    def load(value):
+        return json.loads(value) if isinstance(value, str) else value
+
+    rows = conn.execute(text("SELECT id, user_id, action_items, label_ids FROM emails")).fetchall()
+    for email_pk, user_id, action_items, label_ids in rows:
+        if load(action_items):
+            conn.execute(text("UPDATE emails SET has_action_items = TRUE WHERE id = :id"), {"id": email_pk})
+        for label_id in dict.fromkeys(load(label_ids) or []):
+            conn.execute(
+                text("INSERT INTO email_labels (email_id, label_id, user_id) VALUES (:email_id, :label_id, :user_id) "
+                     "ON CONFLICT DO NOTHING"),
+                {"email_id": email_pk, "label_id": label_id, "user_id": user_id or ''}
+            )
+
+    _create_index(conn, 'ix_emails_user_action_received', 'emails',
+                  'user_id, has_action_items, received_at DESC, id DESC')
+
+
+def _migration_5(conn: Connection):
+    """전문 검색 색인(emails_fts)을 만들고 기존 이메일을 색인합니다.
+
+    이후에는 models/email_search_index.py의 ORM 이벤트가 저장/수정 시 색인을 갱신합니다.
+    """
+    from models.email_search_index import SEARCH_INDEX_MAX_CHARS
+
+    if conn.dialect.name == 'postgresql':
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS emails_fts ("
+            "rowid INTEGER PRIMARY KEY REFERENCES emails(id) ON DELETE CASCADE, "
+            "subject TEXT, sender TEXT, content TEXT, summary TEXT, "
+            "document TSVECTOR GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('simple', coalesce(subject, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(sender, '')), 'B') || "
+            "setweight(to_tsvector('simple', coalesce(summary, '')), 'B') || "
+            "setweight(to_tsvector('simple', coalesce(content, '')), 'C')) STORED)"
+        ))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_emails_fts_document ON emails_fts USING GIN (document)"))
+    else:
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS emails_fts USING fts5("
+            "subject, sender, content, summary, tokenize='unicode61 remove_diacritics 2')"
+        ))
+
+    rows = conn.execute(text(
+        "SELECT id, subject, sender, content, summary FROM emails "
+        "WHERE id NOT IN (SELECT rowid FROM emails_fts)"
+    )).fetchall()
+    for email_pk, subject, sender, content, summary in rows:
+        conn.execute(
+            text("INSERT INTO emails_fts (rowid, subject, sender, content, summary) "
+                 "VALUES (:rowid, :subject, :sender, :content, :summary)"),
+            {
+                "rowid": email_pk,
+                "subject": subject or '',
+                "sender": sender or '',
+                "content": (decompress_body(content) if content is not None else '')[:SEARCH_INDEX_MAX_CHARS],
+                "summary": summary or '',
+            }
+        )
+
+
+def _migration_6(conn: Connection):
+    """메시지 분류 출처 컬럼을 추가하고 기존 이메일로 스레드(email_threads)를 만듭니다."""
+    _add_column(conn, 'emails', 'category_source', 'VARCHAR')
+    conn.execute(text("UPDATE emails SET category_source = 'MESSAGE' WHERE category_source IS NULL"))
+    build_missing_threads(conn)
+
+
+def build_missing_threads(conn: Connection, user_id: Optional[str] = None):
+    """소유자가 있는 이메일 중 스레드 행이 없는 스레드를 만듭니다. (user_id가 있으면 그 사용자만)
+
+    기존 스레드는 가장 최근 메시지의 분류/요약으로 시작하며, 이후 메시지부터 증분 요약됩니다.
+    """
+    rows = conn.execute(text(
+        "SELECT user_id, thread_id, email_id, subject, category, importance, summary, key_points, "
+        "action_items, sentiment, received_at FROM emails "
+        "WHERE user_id IS NOT NULL AND thread_id IS NOT NULL "
+        + ("AND user_id = :user_id " if user_id else "") +
+        "AND NOT EXISTS (SELECT 1 FROM email_threads t "
+        "WHERE t.user_id = emails.user_id AND t.thread_id = emails.thread_id) "
+        "ORDER BY user_id, thread_id, received_at, id"
+    ), {"user_id": user_id} if user_id else {}).fetchall()
+
+    threads = {}
+    for row in rows:
+        thread = threads.setdefault((row.user_id, row.thread_id), {"subject": row.subject, "message_count": 0})
+        thread["message_count"] += 1
+        thread["latest"] = row
+
+    for (user_id, thread_id), thread in threads.items():
+        latest = thread["latest"]
+        conn.execute(
+            text("INSERT INTO email_threads (user_id, thread_id, subject, category, importance, summary, "
+                 "key_points, action_items, sentiment, message_count, summarized_count, last_email_id, "
+                 "last_message_at, updated_at) VALUES (:user_id, :thread_id, :subject, :category, :importance, "
+                 ":summary, :key_points, :action_items, :sentiment, :message_count, :message_count, "
+                 ":last_email_id, :last_message_at, CURRENT_TIMESTAMP)"),
+            {
+                "user_id": user_id,
+                "thread_id": thread_id,
+                "subject": thread["subject"],
+                "category": latest.category,
+                "importance": latest.importance,
+                "summary": latest.summary,
+                "key_points": _json_text(latest.key_points),
+                "action_items": _json_text(latest.action_items),
+                "sentiment": latest.sentiment,
+                "message_count": thread["message_count"],
+                "last_email_id": latest.email_id,
+                "last_message_at": latest.received_at,
+            }
+        )
+
+
+def _migration_7(conn: Connection):
+    """상세 조회를 DB에서 처리하기 위한 헤더, 동기화 시간, 변경 시간(ETag) 컬럼을 추가합니다.
+
+    기존 행은 synced_at이 NULL이므로 처음 상세 조회할 때 Gmail에서 한 번 가져와 저장합니다.
+    """
+    _add_column(conn, 'emails', 'headers', 'JSON' if conn.dialect.name == 'postgresql' else 'TEXT')
+    _add_column(conn, 'emails', 'synced_at', 'TIMESTAMP')
+    _add_column(conn, 'emails', 'updated_at', 'TIMESTAMP')
+    conn.execute(text("UPDATE emails SET updated_at = COALESCE(processed_at, received_at) WHERE updated_at IS NULL"))
+
+
+def claim_ownerless_emails(conn: Connection, user_id: str, email_ids: Optional[List[str]] = None) -> int:
+    """소유자(user_id)가 없는 이메일을 사용자에게 할당하고 라벨/스레드 행도 함께 채웁니다.
+
+    email_ids가 있으면 해당 Gmail 메시지 ID만 할당합니다. 할당한 이메일 수를 반환합니다.
+    """
+    # 사용자가 이미 가진 Gmail 메시지는 할당하지 않음 ((user_id, email_id) 유일 인덱스)
+    not_owned = "email_id NOT IN (SELECT email_id FROM emails WHERE user_id = :user_id)"
+    if email_ids is None:
+        claimed = conn.execute(
+            text(f"UPDATE emails SET user_id = :user_id WHERE user_id IS NULL AND {not_owned}"),
+            {"user_id": user_id}
+        ).rowcount
+    elif email_ids:
+        claimed = conn.execute(
+            text(f"UPDATE emails SET user_id = :user_id WHERE user_id IS NULL AND email_id IN :email_ids AND {not_owned}")
+            .bindparams(bindparam("email_ids", expanding=True)),
+            {"user_id": user_id, "email_ids": list(email_ids)}
+        ).rowcount
+    else:
+        claimed = 0
+    if not claimed:
+        return 0
+
+    conn.execute(
+        text("UPDATE email_labels SET user_id = :user_id WHERE user_id = '' "
+             "AND email_id IN (SELECT id FROM emails WHERE user_id = :user_id)"),
+        {"user_id": user_id}
+    )
+    build_missing_threads(conn, user_id)
+    return claimed
+
+
+def _rebuild_sqlite_table(conn: Connection, table: str, create_sql: str):
+    """SQLite는 ALTER로 제약 조건을 지울 수 없으므로 새 정의로 테이블을 다시 만들고 행과 인덱스를 옮깁니다."""
+    index_sqls = conn.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = :table AND sql IS NOT NULL"),
+        {"table": table}
+    ).scalars().all()
+    conn.execute(text(re.sub(rf'^CREATE TABLE\s+"?{table}"?', f'CREATE TABLE {table}_new', create_sql)))
+    conn.execute(text(f"INSERT INTO {table}_new SELECT * FROM {table}"))
+    conn.execute(text(f"DROP TABLE {table}"))
+    conn.execute(text(f"ALTER TABLE {table}_new RENAME TO {table}"))
+    for index_sql in index_sqls:
+        conn.execute(text(index_sql))
+
+
+def _migration_8(conn: Connection):
+    """Gmail 메시지 ID(email_id)의 유일성을 전체가 아닌 사용자별 (user_id, email_id)로 바꿉니다.
+
+    같은 메일을 받은 여러 사용자가 각자 이메일 행을 가질 수 있도록 합니다.
+    """
+    if conn.dialect.name == 'postgresql':
+        for constraint in inspect(conn).get_unique_constraints('emails'):
+            if constraint['column_names'] == ['email_id']:
+                conn.execute(text(f'ALTER TABLE emails DROP CONSTRAINT "{constraint["name"]}"'))
+    else:
+        create_sql = conn.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'emails'")
+        ).scalar()
+        # 테이블 제약 UNIQUE (email_id) 또는 컬럼 정의의 UNIQUE 제거
+        new_sql = re.sub(r',\s*UNIQUE\s*\(\s*"?email_id"?\s*\)', '', create_sql)
+        new_sql = re.sub(r'(\bemail_id"?\s+VARCHAR[^,]*?)\s+UNIQUE\b', r'\1', new_sql)
+        if new_sql != create_sql:
+            _rebuild_sqlite_table(conn, 'emails', new_sql)
+
+    for index in inspect(conn).get_indexes('emails'):
+        if index['unique'] and index['column_names'] == ['email_id']:
+            conn.execute(text(f'DROP INDEX "{index["name"]}"'))
+    conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ux_emails_user_email ON emails (user_id, email_id)"))
+
+
+# (버전, 설명, 함수) - 버전은 1부터 순서대로 증가
+MIGRATIONS = [
+    (1, "emails.user_id 및 복합 인덱스 추가", _migration_1),
+    (2, "emails.snippet 추가", _migration_2),
+    (3, "본문 컬럼 압축 저장", _migration_3),
+    (4, "JSON 컬럼, has_action_items, email_labels 추가", _migration_4),
+    (5, "전문 검색 색인(emails_fts) 추가", _migration_5),
+    (6, "emails.category_source, email_threads 추가", _migration_6),
+    (7, "emails.headers, synced_at, updated_at 추가", _migration_7),
+    (8, "emails.email_id 유일성을 사용자별로 변경", _migration_8),
+]
+
+
+def get_schema_version(conn: Connection) -> int:
+    conn.execute(text("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)"))
+    return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_version")).scalar()
+
+
+def run_migrations(engine: Engine):
+    """적용되지 않은 마이그레이션을 순서대로 실행합니다."""
+    for version, description, migration in MIGRATIONS:
+        with engine.begin() as conn:
+            if version <= get_schema_version(conn):
+                continue
+            print(f"DB 마이그레이션 {version} 적용: {description}")
+            migration(conn)
+            conn.execute(text("INSERT INTO schema_version (version) VALUES (:version)"), {"version": version})
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, DateTime
+from datetime import datetime
+from models.email_model import Base
+
+class SyncState(Base):
+    __tablename__ = 'sync_states'
+
+    user_id = Column(String, primary_key=True)
+    history_id = Column(String)  # 마지막으로 동기화한 Gmail historyId
+    last_full_sync_at = Column(DateTime)  # 마지막 전체 재동기화 시간
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean
+from datetime import datetime
+from models.email_model import Base
+
+class User(Base):
+    __tablename__ = 'users'
+
+    user_id = Column(String, primary_key=True)
+    email = Column(String, nullable=False)
+    name = Column(String)
+    access_token = Column(Text)
+    refresh_token = Column(Text)
+    is_active = Column(Boolean, default=True, nullable=False)
+    poll_interval_seconds = Column(Integer)  # 사용자별 폴링 주기 (없으면 기본값)
+    next_poll_at = Column(DateTime, index=True)  # 다음 폴링 예정 시간
+    last_polled_at = Column(DateTime)
+    consecutive_failures = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
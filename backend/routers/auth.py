@@ -12,6 +12,10 @@ from datetime import datetime, timedelta
 import os
 from dotenv import load_dotenv
 from starlette.responses import RedirectResponse
+from services.executor import execute, run_blocking
+from services.user_service import create_or_update_user
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.database import get_async_db
 
 load_dotenv()
 
@@ -23,6 +27,9 @@ JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# 운영 지표(/api/metrics)를 조회할 수 있는 관리자 이메일 (쉼표 구분)
+ADMIN_EMAILS = {email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()}
+
 # Google OAuth 2.0 설정
 CLIENT_CONFIG = {
     "web": {
@@ -87,6 +94,12 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid authentication credentials")
 
+async def require_admin(current_user: TokenData = Depends(get_current_user)) -> TokenData:
+    """관리자(ADMIN_EMAILS)만 허용합니다."""
+    if not current_user.email or current_user.email.lower() not in ADMIN_EMAILS:
+        raise HTTPException(status_code=403, detail="Admin privileges required")
+    return current_user
+
 # Google OAuth 인증 엔드포인트
 @router.get("/google")
 async def google_auth(request: FastAPIRequest):
@@ -109,7 +122,7 @@ async def google_auth(request: FastAPIRequest):
     return {"authorization_url": authorization_url}
 
 @router.get("/google/callback")
-async def google_auth_callback(request: FastAPIRequest, code: str):
+async def google_auth_callback(request: FastAPIRequest, code: str, db: AsyncSession = Depends(get_async_db)):
     """Google OAuth 콜백을 처리합니다."""
     try:
         mode = os.getenv('MODE', 'development')
@@ -122,26 +135,34 @@ async def google_auth_callback(request: FastAPIRequest, code: str):
             scopes=SCOPES,
             redirect_uri=redirect_uri
         )
-        flow.fetch_token(code=code)
+        await run_blocking(flow.fetch_token, code=code)
 
         credentials = flow.credentials
 
         # Google People API를 사용하여 사용자 정보 가져오기
         service = build('people', 'v1', credentials=credentials)
-        profile = service.people().get(
+        profile = await execute(service.people().get(
             resourceName='people/me',
             personFields='emailAddresses,names'
-        ).execute()
+        ))
 
         # 사용자 이메일 가져오기
         email = profile['emailAddresses'][0]['value']
         # 사용자 이름 가져오기
         name = profile['names'][0]['displayName']
 
-        # TODO: 여기서 사용자 정보를 데이터베이스에 저장
-        # user_id = create_or_update_user(email, name, credentials)
         user_id = email  # 임시로 이메일을 user_id로 사용
 
+        # 사용자 정보와 토큰을 저장하여 폴링 대상으로 등록
+        await create_or_update_user(
+            db,
+            user_id=user_id,
+            email=email,
+            access_token=credentials.token,
+            refresh_token=credentials.refresh_token,
+            name=name
+        )
+
         # JWT 토큰 생성
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         jwt_token = create_access_token(
@@ -1,6 +1,5 @@
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+from fastapi import APIRouter, HTTPException, Depends, Header, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict
 import os
@@ -9,13 +8,25 @@ import base64
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from routers.auth import get_current_user, TokenData
-from services.email_classifier import classify_email, EmailCategory
-from services.gmail_service import GmailService
-from sqlalchemy.orm import Session
-from models.email_model import get_db, init_db, Email
-from services.email_processor import process_email, get_emails_by_category, get_latest_email_id
-from datetime import datetime, timedelta
-from fastapi_utils.tasks import repeat_every
+from services.email_classifier import EmailCategory
+from services.gmail_service import GmailService, FETCH_FULL, parse_email_date
+from services.mime_extractor import extract_body, get_headers
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.database import get_async_db, dispose_engines
+from models.email_model import init_db, Email
+from models.email_label_model import make_labels
+from models.email_thread_model import EmailThread
+from services.email_processor import query_emails, query_threads, get_thread_messages
+from services.email_search import search_emails
+from services import email_detail_cache
+from services import poll_scheduler
+from services.user_service import create_or_update_user
+from services import processing_queue
+from services.executor import run_blocking
+from services.processing_queue import ProcessingStatus
+from datetime import datetime
+import asyncio
 import json
 
 load_dotenv()
@@ -23,67 +34,28 @@ load_dotenv()
 router = APIRouter()
 
 
-# 이메일 폴링 상태 저장
-last_checked_email_id = None
-last_check_time = None
-is_polling_started = False
-
-async def check_new_emails():
-    """새로운 이메일을 확인하고 처리합니다."""
-    global last_checked_email_id, last_check_time, is_polling_started
-    
-    if not is_polling_started:
-        return
-        
-    try:
-        # DB 세션 생성
-        db = next(get_db())
-        
-        # 모든 사용자의 Gmail 서비스 초기화 및 체크
-        gmail_service = GmailService(
-            user_id="current_user",  # 실제 구현에서는 사용자별로 처리
-            access_token=os.getenv("GMAIL_ACCESS_TOKEN"),
-            refresh_token=os.getenv("GMAIL_REFRESH_TOKEN")
-        )
-
-        # 최신 이메일 ID 가져오기
-        latest_email_id = await get_latest_email_id(gmail_service)
-        if not latest_email_id:
-            return
-
-        # 새로운 이메일이 있는 경우
-        if latest_email_id != last_checked_email_id:
-            # 이메일 처리
-            await process_email(latest_email_id, gmail_service, db)
-            
-            # 상태 업데이트
-            last_checked_email_id = latest_email_id
-            last_check_time = datetime.utcnow()
-
-    except Exception as e:
-        print(f"이메일 체크 실패: {str(e)}")
-    finally:
-        db.close()
-
 def setup_email_polling(app):
     """이메일 폴링을 설정합니다."""
     @app.on_event("startup")
     async def startup_event():
         """서버 시작 시 실행되는 이벤트"""
-        # DB 초기화
-        init_db()
-        
-    @app.on_event("startup")
-    @repeat_every(seconds=300)  # 5분마다 체크
-    async def start_email_polling():
-        """이메일 폴링을 시작합니다."""
-        await check_new_emails()
+        # DB 초기화 (마이그레이션은 동기 엔진을 사용하므로 스레드 풀에서 실행)
+        await run_blocking(init_db)
 
-# Gmail API 관련 함수들
-def get_gmail_service(credentials: Credentials):
-    """Gmail API 서비스 생성"""
-    return build('gmail', 'v1', credentials=credentials)
+        # 이메일 처리 워커 시작
+        await processing_queue.start_workers()
+
+        # 등록된 모든 사용자에 대한 폴링 스케줄러 시작
+        await poll_scheduler.start_scheduler()
 
+    @app.on_event("shutdown")
+    async def shutdown_event():
+        """서버 종료 시 실행되는 이벤트"""
+        await poll_scheduler.stop_scheduler()
+        await processing_queue.stop_workers()
+        await dispose_engines()
+
+# Gmail API 관련 함수들
 def create_message(sender: str, to: str, subject: str, message_text: str):
     """이메일 메시지 생성"""
     message = MIMEMultipart()
@@ -109,16 +81,79 @@ class EmailMessage(BaseModel):
     action_items: Optional[List[str]] = None
     category: Optional[str] = None
     importance: Optional[float] = None
+    status: str = ProcessingStatus.DONE  # PENDING이면 category/summary가 아직 없음
 
 class EmailList(BaseModel):
     messages: List[EmailMessage]
     next_page_token: Optional[str] = None
     previous_page_token: Optional[str] = None
 
+class EmailSearchResult(BaseModel):
+    id: str
+    subject: str
+    from_: str
+    snippet: str  # HTML 이스케이프된 미리보기 (일치한 부분만 <mark>로 강조)
+    date: str
+    summary: Optional[str] = None
+    category: Optional[str] = None
+    importance: Optional[float] = None
+    rank: float  # 작을수록 관련도가 높음
+
+class EmailSearchList(BaseModel):
+    messages: List[EmailSearchResult]
+    next_page_token: Optional[str] = None
+
+class ThreadSummary(BaseModel):
+    thread_id: str
+    subject: str
+    category: str
+    importance: float
+    summary: Optional[str] = None
+    key_points: Optional[List[str]] = None
+    action_items: Optional[List[str]] = None
+    message_count: int
+    last_message_at: str
+
+class ThreadList(BaseModel):
+    threads: List[ThreadSummary]
+    next_page_token: Optional[str] = None
+
 class CategoryInfo(BaseModel):
     category: str
     count: int
 
+async def _pending_messages(current_user: TokenData, limit: int, exclude_ids: set) -> List[EmailMessage]:
+    """처리 큐에 있는 사용자의 이메일을 Gmail 메타데이터와 함께 PENDING 항목으로 만듭니다."""
+    pending = [(email_id, status) for email_id, status in processing_queue.get_pending(current_user.user_id, limit)
+               if email_id not in exclude_ids]
+    if not pending:
+        return []
+
+    try:
+        gmail_service = GmailService(
+            user_id=current_user.user_id,
+            access_token=current_user.access_token,
+            refresh_token=current_user.refresh_token
+        )
+        metadata = await gmail_service.get_metadata([email_id for email_id, _ in pending])
+    except Exception as e:
+        # 대기 중인 메일을 보여주지 못해도 처리된 목록은 응답
+        print(f"처리 대기 이메일 조회 실패 ({current_user.user_id}): {str(e)}")
+        return []
+
+    statuses = dict(pending)
+    return [
+        EmailMessage(
+            id=message['id'],
+            subject=message['subject'],
+            from_=message['sender'],
+            snippet=message['snippet'],
+            date=message['date'].isoformat(),
+            status=statuses[message['id']]
+        )
+        for message in metadata
+    ]
+
 # Gmail API 엔드포인트
 @router.get("/", response_model=EmailList)
 async def get_emails(
@@ -127,106 +162,75 @@ async def get_emails(
     category: Optional[str] = None,
     sort_by: str = "importance",
     sort_order: str = "desc",
+    label: Optional[str] = None,
+    has_action_items: Optional[bool] = None,
+    db: AsyncSession = Depends(get_async_db),
     current_user: TokenData = Depends(get_current_user)
 ):
-    """사용자의 이메일 목록을 가져옵니다."""
-    global is_polling_started
-    
-    try:
-        # 폴링이 시작되지 않았다면 시작
-        if not is_polling_started:
-            # Gmail API 서비스 초기화
-            credentials = Credentials(
-                token=current_user.access_token,
-                refresh_token=current_user.refresh_token,
-                token_uri="https://oauth2.googleapis.com/token",
-                client_id=os.getenv("GOOGLE_CLIENT_ID"),
-                client_secret=os.getenv("GOOGLE_CLIENT_SECRET"),
-                scopes=[
-                    'openid',
-                    'https://www.googleapis.com/auth/gmail.readonly',
-                    'https://www.googleapis.com/auth/gmail.send',
-                    'https://www.googleapis.com/auth/userinfo.email',
-                    'https://www.googleapis.com/auth/userinfo.profile'
-                ]
-            )
-
-            # 환경 변수 업데이트
-            os.environ["GMAIL_ACCESS_TOKEN"] = current_user.access_token
-            os.environ["GMAIL_REFRESH_TOKEN"] = current_user.refresh_token
-            
-            # 폴링 시작
-            is_polling_started = True
+    """사용자의 이메일 목록을 가져옵니다.
 
-        gmail_service = GmailService(
+    처리된 이메일은 DB에서 조회하고, 첫 페이지에는 아직 분류/요약 중인 새 메일을 status=PENDING으로 함께 반환합니다.
+    """
+    try:
+        # 폴링 대상 사용자로 등록 (토큰은 OAuth 콜백에서만 갱신)
+        await create_or_update_user(
+            db,
             user_id=current_user.user_id,
+            email=current_user.email,
             access_token=current_user.access_token,
-            refresh_token=current_user.refresh_token
+            refresh_token=current_user.refresh_token,
+            update_tokens=False
         )
-        
-        # Gmail API에서 이메일 목록 가져오기
-        gmail_response = await gmail_service.get_emails(
-            max_results=max_results,
-            page_token=page_token
+
+        # Gmail은 동기화에만 사용 (첫 페이지 요청 시 새 메일을 백그라운드에서 동기화)
+        if not page_token:
+            poll_scheduler.trigger_poll(current_user.user_id)
+
+        # DB에서 필터링/정렬/페이지네이션
+        emails, next_cursor = await query_emails(
+            db,
+            current_user.user_id,
+            category=category,
+            sort_by="importance" if sort_by == "importance" else "received_at",
+            sort_order=sort_order,
+            limit=max_results,
+            cursor=page_token,
+            label=label,
+            has_action_items=has_action_items
         )
-        
-        # DB 세션 생성
-        db = next(get_db())
-        
+
+        # 첫 페이지에는 큐에서 처리 대기 중인 새 메일을 PENDING으로 먼저 보여줌 (분류/요약 전이므로 필터가 없을 때만)
         email_list = []
-        for email in gmail_response['messages']:
-            # DB에서 이메일 정보 조회
-            db_email = db.query(Email).filter(Email.email_id == email['id']).first()
-            
-            # 이미 처리된 이메일이 아닌 경우에만 처리
-            if not db_email:
-                processed_email = await process_email(email['id'], gmail_service, db)
-            else:
-                processed_email = db_email
-            
-            # 카테고리 필터링
-            if category and processed_email.category != category:
-                continue
-            
-            # JSON 문자열을 파싱
-            key_points = json.loads(processed_email.key_points) if processed_email.key_points else None
-            action_items = json.loads(processed_email.action_items) if processed_email.action_items else None
-            
+        if not page_token and not (category or label or has_action_items is not None):
+            email_list.extend(await _pending_messages(current_user, max_results, {email.email_id for email in emails}))
+
+        for email in emails:
             email_list.append(EmailMessage(
-                id=email['id'],
-                subject=email['subject'],
-                from_=email['sender'],
-                snippet=email.get('snippet', ''),
-                date=email['date'].isoformat(),
-                summary=processed_email.summary,
-                key_points=key_points,
-                sentiment=processed_email.sentiment,
-                action_items=action_items,
-                category=processed_email.category,
-                importance=processed_email.importance
+                id=email.email_id,
+                subject=email.subject or '',
+                from_=email.sender or '',
+                snippet=email.snippet or '',
+                date=email.received_at.isoformat(),
+                summary=email.summary,
+                key_points=email.key_points,
+                sentiment=email.sentiment,
+                action_items=email.action_items,
+                category=email.category,
+                importance=email.importance
             ))
-            
-        # 정렬
-        if sort_by == "importance":
-            email_list.sort(key=lambda x: x.importance if x.importance is not None else 0, reverse=(sort_order == "desc"))
-        elif sort_by == "date":
-            email_list.sort(key=lambda x: x.date, reverse=(sort_order == "desc"))
-            
+
         return {
             "messages": email_list,
-            "next_page_token": gmail_response['next_page_token'],
-            "previous_page_token": gmail_response['previous_page_token']
+            "next_page_token": next_cursor,
+            "previous_page_token": None
         }
         
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
-    finally:
-        db.close()
 
 
 @router.get("/categories")
 async def get_categories(
-    db: Session = Depends(get_db),
     current_user: TokenData = Depends(get_current_user)
 ):
     """모든 카테고리 목록을 조회합니다."""
@@ -242,85 +246,209 @@ async def get_categories(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.get("/status")
+async def get_processing_status(
+    ids: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: TokenData = Depends(get_current_user)
+) -> Dict[str, str]:
+    """이메일 ID 목록(쉼표 구분)의 처리 상태를 조회합니다."""
+    email_ids = [email_id for email_id in ids.split(',') if email_id]
+    processed_ids = set(await db.scalars(
+        select(Email.email_id).where(
+            Email.user_id == current_user.user_id,
+            Email.email_id.in_(email_ids)
+        )
+    ))
+    return {
+        email_id: ProcessingStatus.DONE if email_id in processed_ids
+        else processing_queue.get_status(email_id, current_user.user_id) or "UNKNOWN"
+        for email_id in email_ids
+    }
+
+
+@router.get("/events")
+async def processing_events(
+    current_user: TokenData = Depends(get_current_user)
+):
+    """사용자의 이메일 처리 완료 이벤트를 Server-Sent Events로 전달합니다."""
+    async def event_stream():
+        subscriber = processing_queue.subscribe(current_user.user_id)
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscriber.get(), timeout=15)
+                    yield f"data: {json.dumps(event)}\n\n"
+                except asyncio.TimeoutError:
+                    # 연결 유지를 위한 주석 이벤트
+                    yield ": keep-alive\n\n"
+        finally:
+            processing_queue.unsubscribe(current_user.user_id, subscriber)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+@router.get("/search", response_model=EmailSearchList)
+async def search(
+    q: str,
+    category: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    max_results: int = 20,
+    page_token: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: TokenData = Depends(get_current_user)
+):
+    """제목, 보낸 사람, 본문, 요약에서 이메일을 검색합니다. (관련도순)"""
+    try:
+        results, next_cursor = await search_emails(
+            db,
+            current_user.user_id,
+            q,
+            category=category,
+            date_from=date_from,
+            date_to=date_to,
+            limit=max_results,
+            cursor=page_token
+        )
+        return {
+            "messages": [
+                EmailSearchResult(
+                    id=result["email_id"],
+                    subject=result["subject"] or '',
+                    from_=result["sender"] or '',
+                    snippet=result["snippet"] or '',
+                    date=result["received_at"].isoformat(),
+                    summary=result["summary"],
+                    category=result["category"],
+                    importance=result["importance"],
+                    rank=result["rank"]
+                )
+                for result in results
+            ],
+            "next_page_token": next_cursor
+        }
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/threads", response_model=ThreadList)
+async def get_threads(
+    max_results: int = 20,
+    page_token: Optional[str] = None,
+    category: Optional[str] = None,
+    sort_by: str = "last_message_at",
+    sort_order: str = "desc",
+    db: AsyncSession = Depends(get_async_db),
+    current_user: TokenData = Depends(get_current_user)
+):
+    """스레드 단위 이메일 목록을 가져옵니다. (스레드 요약/분류 포함)"""
+    try:
+        threads, next_cursor = await query_threads(
+            db,
+            current_user.user_id,
+            category=category,
+            sort_by="importance" if sort_by == "importance" else "last_message_at",
+            sort_order=sort_order,
+            limit=max_results,
+            cursor=page_token
+        )
+        return {
+            "threads": [
+                ThreadSummary(
+                    thread_id=thread.thread_id,
+                    subject=thread.subject or '',
+                    category=thread.category,
+                    importance=thread.importance,
+                    summary=thread.summary,
+                    key_points=thread.key_points,
+                    action_items=thread.action_items,
+                    message_count=thread.message_count,
+                    last_message_at=thread.last_message_at.isoformat()
+                )
+                for thread in threads
+            ],
+            "next_page_token": next_cursor
+        }
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/threads/{thread_id}")
+async def get_thread(
+    thread_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: TokenData = Depends(get_current_user)
+) -> Dict:
+    """스레드 요약과 메시지 목록을 조회합니다."""
+    thread = await db.get(EmailThread, (current_user.user_id, thread_id))
+    if thread is None:
+        raise HTTPException(status_code=404, detail="스레드를 찾을 수 없습니다.")
+
+    messages = await get_thread_messages(db, current_user.user_id, thread_id)
+    return {
+        **thread.to_dict(),
+        "messages": [
+            {
+                "id": email.email_id,
+                "subject": email.subject,
+                "from_": email.sender,
+                "snippet": email.snippet,
+                "date": email.received_at.isoformat(),
+                "summary": email.summary,
+                "key_points": email.key_points,
+                "action_items": email.action_items,
+                "category": email.category,
+                "category_source": email.category_source,
+                "importance": email.importance
+            }
+            for email in messages
+        ]
+    }
+
+
 @router.get("/{email_id}")
 async def get_email(
     email_id: str,
-    db: Session = Depends(get_db),
+    response: Response,
+    include_body: bool = True,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
     current_user: TokenData = Depends(get_current_user)
-) -> Dict:
-    """특정 이메일의 상세 내용을 조회합니다."""
+):
+    """특정 이메일의 상세 내용을 조회합니다.
+
+    저장된 헤더/본문/라벨로 응답하며, 저장된 데이터가 없는 이메일만 Gmail에서 한 번 가져와 저장합니다.
+    ETag를 함께 보내므로 If-None-Match가 일치하면 304로 응답합니다.
+    include_body=false이면 본문 없이 헤더/라벨만 응답합니다.
+    """
     try:
         # DB에서 이메일 조회
-        email = db.query(Email).filter(Email.email_id == email_id).first()
+        email = await db.scalar(select(Email).where(
+            Email.email_id == email_id,
+            Email.user_id == current_user.user_id
+        ))
         if not email:
             raise HTTPException(status_code=404, detail="이메일을 찾을 수 없습니다.")
-        
-        # Gmail API에서 이메일 상세 정보 가져오기
-        credentials = Credentials(
-            token=current_user.access_token,
-            refresh_token=current_user.refresh_token,
-            token_uri="https://oauth2.googleapis.com/token",
-            client_id=os.getenv("GOOGLE_CLIENT_ID"),
-            client_secret=os.getenv("GOOGLE_CLIENT_SECRET"),
-            scopes=[
-                'openid',
-                'https://www.googleapis.com/auth/gmail.readonly',
-                'https://www.googleapis.com/auth/gmail.send',
-                'https://www.googleapis.com/auth/userinfo.email',
-                'https://www.googleapis.com/auth/userinfo.profile'
-            ]
-        )
 
-        service = get_gmail_service(credentials)
-        message = service.users().messages().get(
-            userId='me',
-            id=email_id,
-            format='full'
-        ).execute()
-
-        # 이메일 본문 디코딩
-        def decode_body(part):
-            if 'body' in part and 'data' in part['body']:
-                return base64.urlsafe_b64decode(part['body']['data']).decode('utf-8')
-            return None
-
-        # 이메일 본문 추출
-        body = None
-        if 'payload' in message:
-            payload = message['payload']
-            if 'body' in payload and 'data' in payload['body']:
-                body = decode_body(payload)
-            elif 'parts' in payload:
-                for part in payload['parts']:
-                    if part['mimeType'] == 'text/html':
-                        body = decode_body(part)
-                        break
-                    elif part['mimeType'] == 'text/plain':
-                        body = decode_body(part)
-
-        # 헤더 정보 추출
-        headers = {}
-        if 'payload' in message and 'headers' in message['payload']:
-            for header in message['payload']['headers']:
-                headers[header['name']] = header['value']
+        # 저장된 헤더/본문이 없을 때만 Gmail에서 가져와 저장 (사용자별 캐시된 클라이언트 사용)
+        await email_detail_cache.ensure_synced(db, email, lambda: GmailService(
+            user_id=current_user.user_id,
+            access_token=current_user.access_token,
+            refresh_token=current_user.refresh_token
+        ), include_body)
 
-        return {
-            "id": message['id'],
-            "threadId": message['threadId'],
-            "labelIds": message['labelIds'],
-            "snippet": message['snippet'],
-            "headers": headers,
-            "body": body,
-            "summary": email.summary,
-            "key_points": email.key_points,
-            "sentiment": email.sentiment,
-            "action_items": email.action_items,
-            "category": email.category,
-            "importance": email.importance,
-            "received_at": email.received_at.isoformat() if email.received_at else None,
-            "processed_at": email.processed_at.isoformat() if email.processed_at else None
-        }
+        etag = email_detail_cache.detail_etag(email, include_body)
+        if email_detail_cache.etag_matches(if_none_match, etag):
+            email_detail_cache.record_not_modified()
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "private, no-cache"
+        return await email_detail_cache.build_detail(db, email, include_body)
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -328,97 +456,64 @@ async def get_email(
 @router.post("/save/{email_id}")
 async def save_email(
     email_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: TokenData = Depends(get_current_user)
 ):
     """이메일 ID를 받아서 DB에 저장합니다."""
     try:
-        # Gmail API 서비스 초기화
-        credentials = Credentials(
-            token=current_user.access_token,
-            refresh_token=current_user.refresh_token,
-            token_uri="https://oauth2.googleapis.com/token",
-            client_id=os.getenv("GOOGLE_CLIENT_ID"),
-            client_secret=os.getenv("GOOGLE_CLIENT_SECRET"),
-            scopes=[
-                'openid',
-                'https://www.googleapis.com/auth/gmail.readonly',
-                'https://www.googleapis.com/auth/gmail.send',
-                'https://www.googleapis.com/auth/userinfo.email',
-                'https://www.googleapis.com/auth/userinfo.profile'
-            ]
-        )
-
-        service = get_gmail_service(credentials)
-        
-        # 이메일 상세 내용 가져오기
-        message = service.users().messages().get(
-            userId='me',
-            id=email_id,
-            format='full'
-        ).execute()
-
-        # 이미 저장된 이메일인지 확인
-        existing_email = db.query(Email).filter(Email.email_id == email_id).first()
+        # 이미 저장된 이메일인지 확인 (저장된 경우 Gmail 조회 생략)
+        existing_email = await db.scalar(select(Email).where(
+            Email.email_id == email_id,
+            Email.user_id == current_user.user_id
+        ))
         if existing_email:
             return {"message": "이미 저장된 이메일입니다.", "email": existing_email.to_dict()}
 
-        # 이메일 본문 디코딩
-        def decode_body(part):
-            if 'body' in part and 'data' in part['body']:
-                return base64.urlsafe_b64decode(part['body']['data']).decode('utf-8')
-            return None
-
-        # 이메일 본문 추출
-        content = None
-        html_content = None
-        if 'payload' in message:
-            payload = message['payload']
-            if 'body' in payload and 'data' in payload['body']:
-                content = decode_body(payload)
-            elif 'parts' in payload:
-                for part in payload['parts']:
-                    if part['mimeType'] == 'text/html':
-                        html_content = decode_body(part)
-                    elif part['mimeType'] == 'text/plain':
-                        content = decode_body(part)
-
-        # 헤더 정보 추출
-        headers = {}
-        if 'payload' in message and 'headers' in message['payload']:
-            for header in message['payload']['headers']:
-                headers[header['name']] = header['value']
-
-        # 수신 시간 파싱
-        received_at = datetime.utcnow()
-        if 'Date' in headers:
-            try:
-                received_at = datetime.strptime(headers['Date'], '%a, %d %b %Y %H:%M:%S %z')
-            except:
-                pass
+        # 이메일 상세 내용 가져오기 (사용자별 캐시된 클라이언트 사용)
+        gmail_service = GmailService(
+            user_id=current_user.user_id,
+            access_token=current_user.access_token,
+            refresh_token=current_user.refresh_token
+        )
+        message = await gmail_service.fetch_message(email_id, FETCH_FULL)
+
+        # 이메일 본문/헤더 추출 (중첩 multipart, charset 처리)
+        payload = message.get('payload', {})
+        body = extract_body(payload)
+        content = body['text'] or None
+        html_content = body['html']
+        headers = get_headers(payload)
+
+        # 수신 시간 파싱 (UTC 기준)
+        received_at = parse_email_date(headers.get('Date'))
 
         # 새 이메일 객체 생성
         email = Email(
             email_id=email_id,
+            user_id=current_user.user_id,
             thread_id=message.get('threadId'),
             subject=headers.get('Subject', ''),
             sender=headers.get('From', ''),
             recipient=headers.get('To', ''),
+            snippet=message.get('snippet'),
             content=content,
             html_content=html_content,
+            headers=headers,
             category="UNCATEGORIZED",  # 기본 카테고리
             importance=50.0,  # 기본 중요도
-            label_ids=json.dumps(message.get('labelIds', [])),
-            received_at=received_at
+            label_ids=message.get('labelIds', []),
+            labels=make_labels(current_user.user_id, message.get('labelIds', [])),
+            received_at=received_at,
+            synced_at=datetime.utcnow()
         )
 
         # DB에 저장
         db.add(email)
-        db.commit()
-        db.refresh(email)
+        await db.commit()
+        await db.refresh(email)
         
         return {"message": "이메일이 성공적으로 저장되었습니다.", "email": email.to_dict()}
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail=str(e)) 
\ No newline at end of file
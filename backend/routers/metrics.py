@@ -0,0 +1,120 @@
+from fastapi import APIRouter, Depends
+from typing import Dict
+from services.executor import get_pool_stats
+from services.llm_cache import get_cache_stats
+from services.processing_queue import get_queue_stats
+from services.text_preprocessor import get_preprocess_stats
+from services.rule_classifier import get_tier_stats
+from services.poll_scheduler import get_scheduler_stats
+from services.gmail_client_pool import get_client_pool_stats
+from services.push_service import get_push_stats
+from services.email_writer import get_writer_stats
+from models.compressed_text import get_compression_stats
+from services.thread_summarizer import get_thread_stats
+from services.mime_extractor import get_mime_stats
+from services.gmail_service import get_fetch_stats
+from services.email_detail_cache import get_detail_cache_stats
+from services.gemini_client import get_quota_stats
+from routers.auth import require_admin
+
+# 운영 지표는 관리자만 조회
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("/pool")
+async def pool_metrics() -> Dict:
+    """동기 호출 전용 스레드 풀의 포화도 지표를 조회합니다."""
+    return get_pool_stats()
+
+
+@router.get("/llm-cache")
+async def llm_cache_metrics() -> Dict:
+    """Gemini 분석 결과 캐시의 적중/미스 지표를 조회합니다."""
+    return get_cache_stats()
+
+
+@router.get("/queue")
+async def queue_metrics() -> Dict:
+    """이메일 처리 큐의 깊이와 워커 상태를 조회합니다."""
+    return get_queue_stats()
+
+
+@router.get("/preprocess")
+async def preprocess_metrics() -> Dict:
+    """본문 전처리로 절감된 토큰 지표를 조회합니다."""
+    return get_preprocess_stats()
+
+
+@router.get("/classifier-tiers")
+async def classifier_tier_metrics() -> Dict:
+    """규칙 분류/LLM 단계별 처리 비율과 지연 시간을 조회합니다."""
+    return get_tier_stats()
+
+
+@router.get("/scheduler")
+async def scheduler_metrics() -> Dict:
+    """사용자별 폴링 스케줄러 상태를 조회합니다."""
+    return await get_scheduler_stats()
+
+
+@router.get("/gmail-clients")
+async def gmail_client_metrics() -> Dict:
+    """사용자별 Gmail 클라이언트 풀 지표를 조회합니다."""
+    return get_client_pool_stats()
+
+
+@router.get("/push")
+async def push_metrics() -> Dict:
+    """Gmail 푸시 알림 처리 지표와 알림-분류 완료 지연 시간을 조회합니다."""
+    queue_stats = get_queue_stats()
+    return {
+        **get_push_stats(),
+        "notified_processed": queue_stats["notified_processed"],
+        "avg_notified_latency_ms": queue_stats["avg_notified_latency_ms"],
+        "max_notified_latency_ms": queue_stats["max_notified_latency_seconds"] * 1000,
+    }
+
+
+@router.get("/email-writer")
+async def email_writer_metrics() -> Dict:
+    """이메일 배치 저장 지표(배치 크기, 커밋 시간)를 조회합니다."""
+    return get_writer_stats()
+
+
+@router.get("/body-compression")
+async def body_compression_metrics() -> Dict:
+    """본문 압축률과 압축 해제 시간을 조회합니다."""
+    return get_compression_stats()
+
+
+@router.get("/threads")
+async def thread_metrics() -> Dict:
+    """스레드 증분 요약 지표(전체 본문 대비 전송 토큰 비율, 개별 분류 수)를 조회합니다."""
+    return get_thread_stats()
+
+
+@router.get("/mime")
+async def mime_metrics() -> Dict:
+    """MIME 본문 추출 지표(탐색한 파트 수, 잘린 메시지 수, charset 대체 횟수)를 조회합니다."""
+    return get_mime_stats()
+
+
+@router.get("/gmail-fetch")
+async def gmail_fetch_metrics() -> Dict:
+    """Gmail 메시지 조회 단계(metadata/full)별 요청 수와 응답 바이트를 조회합니다."""
+    return get_fetch_stats()
+
+
+@router.get("/email-detail")
+async def email_detail_metrics() -> Dict:
+    """상세 조회 캐시 지표(저장 데이터 응답 비율, 304 응답 수, history 라벨 반영 수)를 조회합니다."""
+    return get_detail_cache_stats()
+
+
+@router.get("/gemini")
+async def gemini_quota_metrics() -> Dict:
+    """Gemini 사용량/한도 대시보드 (분당 요청·토큰, 남은 토큰, 동시 요청 한도, 대기 사용자 수, 429 횟수)를 조회합니다."""
+    return {
+        **get_quota_stats(),
+        "deferred_messages": get_queue_stats()["deferred_waiting"],
+    }
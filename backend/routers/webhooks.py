@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from typing import Optional
+import time
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.database import get_async_db
+from models.sync_state_model import SyncState
+from models.user_model import User
+from services import poll_scheduler
+from services.push_service import parse_notification, verify_token, verify_oidc, record_notification, record_rejected
+
+router = APIRouter()
+
+
+@router.post("/gmail", status_code=204)
+async def gmail_push_notification(request: Request, token: Optional[str] = None,
+                                  db: AsyncSession = Depends(get_async_db)):
+    """Gmail watch의 Pub/Sub 푸시 알림을 받아 변경된 메일함만 동기화합니다."""
+    notified_at = time.monotonic()
+    if not verify_token(token) or not await verify_oidc(request.headers.get("Authorization")):
+        record_rejected()
+        raise HTTPException(status_code=403, detail="Invalid verification token")
+
+    try:
+        notification = parse_notification(await request.json())
+    except Exception:
+        # 잘못된 메시지는 재전송되지 않도록 성공으로 응답
+        record_notification(triggered=False)
+        return Response(status_code=204)
+
+    user = await db.scalar(select(User).where(User.email == notification['email_address']))
+    if user is None or not user.is_active:
+        record_notification(triggered=False)
+        return Response(status_code=204)
+
+    # 이미 동기화한 historyId 이하의 알림은 무시
+    state = await db.get(SyncState, user.user_id)
+    if state is not None and state.history_id and int(state.history_id) >= int(notification['history_id']):
+        record_notification(triggered=False)
+        return Response(status_code=204)
+
+    poll_scheduler.trigger_poll(user.user_id, notified_at)
+    record_notification(triggered=True)
+    return Response(status_code=204)
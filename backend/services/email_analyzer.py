@@ -0,0 +1,147 @@
+from pydantic import BaseModel, ValidationError, field_validator
+from typing import Dict, List, Optional
+import os
+from dotenv import load_dotenv
+from datetime import datetime
+import json
+import re
+from services.executor import run_blocking
+from services.gemini_client import MODEL_NAME, GeminiThrottled, generate_content
+from services.llm_cache import make_cache_key, get_cached, set_cached
+from services.text_preprocessor import preprocess_body, SUMMARY_TOKEN_BUDGET
+
+load_dotenv()
+
+# 프롬프트 템플릿을 바꾸면 버전을 올려서 기존 캐시 결과를 사용하지 않도록 합니다
+ANALYSIS_PROMPT_VERSION = "2"
+
+class EmailCategory:
+    WORK = "WORK"  # 업무 관련 중요 이메일
+    PERSONAL = "PERSONAL"  # 개인 통신
+    NEWSLETTER = "NEWSLETTER"  # 뉴스레터
+    SPAM = "SPAM"  # 스팸
+    ADVERTISEMENT = "ADVERTISEMENT"  # 광고
+    SOCIAL = "SOCIAL"  # 소셜 미디어 알림
+    UNKNOWN = "UNKNOWN"  # 분류 불가
+
+VALID_CATEGORIES = [getattr(EmailCategory, attr) for attr in dir(EmailCategory)
+                    if not attr.startswith('_')]
+VALID_SENTIMENTS = ["POSITIVE", "NEUTRAL", "NEGATIVE"]
+
+class EmailAnalysis(BaseModel):
+    """Gemini 분석 응답 스키마"""
+    category: str = EmailCategory.UNKNOWN
+    importance: float = 50.0
+    summary: str = ""
+    key_points: List[str] = []
+    action_items: List[str] = []
+    sentiment: str = "NEUTRAL"
+
+    @field_validator("category", mode="before")
+    @classmethod
+    def validate_category(cls, value):
+        value = str(value).strip().upper() if value is not None else ""
+        return value if value in VALID_CATEGORIES else EmailCategory.UNKNOWN
+
+    @field_validator("importance", mode="before")
+    @classmethod
+    def validate_importance(cls, value):
+        try:
+            return min(max(float(value), 0.0), 100.0)
+        except (TypeError, ValueError):
+            return 50.0
+
+    @field_validator("summary", mode="before")
+    @classmethod
+    def validate_summary(cls, value):
+        return str(value).strip() if value is not None else ""
+
+    @field_validator("key_points", "action_items", mode="before")
+    @classmethod
+    def validate_list(cls, value):
+        if value is None:
+            return []
+        if isinstance(value, str):
+            return [value] if value.strip() else []
+        return [str(item) for item in value if item]
+
+    @field_validator("sentiment", mode="before")
+    @classmethod
+    def validate_sentiment(cls, value):
+        value = str(value).strip().upper() if value is not None else ""
+        return value if value in VALID_SENTIMENTS else "NEUTRAL"
+
+def parse_analysis_response(response_text: str) -> EmailAnalysis:
+    """Gemini API 응답을 파싱하고 스키마로 검증합니다."""
+    try:
+        # JSON 형식 찾기
+        json_match = re.search(r'\{[\s\S]*\}', response_text)
+        if json_match:
+            return EmailAnalysis.model_validate(json.loads(json_match.group()))
+    except (json.JSONDecodeError, ValidationError):
+        pass
+
+    # JSON 형식이 아니거나 검증 실패 시 응답 전체를 요약으로 사용
+    return EmailAnalysis(summary=response_text.strip())
+
+async def analyze_email(subject: str, content: str, sender: str, user_id: Optional[str] = None) -> Dict:
+    """이메일을 한 번의 Gemini 호출로 분류하고 요약합니다.
+
+    user_id는 Gemini 요청 한도를 사용자별로 나누어 쓰는 데 사용합니다.
+    """
+    try:
+        # 인용/서명/푸터 제거 후 요약용 토큰 예산에 맞게 자르기
+        content, _ = await run_blocking(preprocess_body, content, SUMMARY_TOKEN_BUDGET)
+
+        # 동일/유사 본문에 대한 캐시 결과 확인
+        cache_key = make_cache_key(subject, sender, content, ANALYSIS_PROMPT_VERSION, MODEL_NAME)
+        cached = await run_blocking(get_cached, cache_key)
+        if cached is not None:
+            return cached
+
+        # Gemini에 전달할 프롬프트 준비
+        prompt = f"""
+        다음 이메일을 분석하여 분류와 요약을 함께 제공해주세요:
+
+        제목: {subject}
+        발신자: {sender}
+        내용: {content}
+
+        category는 반드시 다음 중 하나여야 합니다:
+        - WORK: 중요한 업무 관련 이메일 (회의, 프로젝트, 보고서 등)
+        - PERSONAL: 개인적인 통신 (친구, 가족과의 대화)
+        - NEWSLETTER: 뉴스레터 및 구독 메일 (뉴스, 블로그, 업데이트 등)
+        - SPAM: 원치 않는 또는 의심스러운 이메일
+        - ADVERTISEMENT: 마케팅 및 홍보성 콘텐츠
+        - SOCIAL: 소셜 미디어 알림 (SNS, 커뮤니티 등)
+        - UNKNOWN: 분류 불가능한 이메일
+
+        importance는 0-100 사이의 숫자, sentiment는 POSITIVE, NEUTRAL, NEGATIVE 중 하나입니다.
+
+        반드시 다음 JSON 형식으로만 응답해주세요:
+        {{
+            "category": "카테고리",
+            "importance": 중요도 점수,
+            "summary": "간단한 요약",
+            "key_points": ["핵심 포인트 1", "핵심 포인트 2"],
+            "action_items": ["실행 항목 1", "실행 항목 2"],
+            "sentiment": "감정"
+        }}
+        """
+
+        # Gemini API 호출 (요청 한도 안에서 전용 스레드 풀로 실행)
+        response = await generate_content(prompt, user_id=user_id)
+
+        # 응답 파싱 및 스키마 검증
+        analysis = parse_analysis_response(response.text)
+
+        result = analysis.model_dump()
+        result["analyzed_at"] = datetime.utcnow().isoformat()
+
+        await run_blocking(set_cached, cache_key, result, ANALYSIS_PROMPT_VERSION, MODEL_NAME)
+        return result
+
+    except GeminiThrottled:
+        raise
+    except Exception as e:
+        raise Exception(f"이메일 분석 실패: {str(e)}")
@@ -1,94 +1,172 @@
-import google.generativeai as genai
-from typing import Dict
-import os
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
 from datetime import datetime
 import json
+import os
 import re
+from services.email_analyzer import EmailCategory, VALID_CATEGORIES, analyze_email
+from services.executor import run_blocking
+from services.gemini_client import GeminiThrottled, generate_content
+from services.text_preprocessor import estimate_tokens, preprocess_body, CLASSIFY_TOKEN_BUDGET
+from services.rule_classifier import classify_by_rules, record_tier, RULE_CONFIDENCE_THRESHOLD
+import time
 
 load_dotenv()
 
-# Gemini API 설정
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-model = genai.GenerativeModel('gemini-1.5-flash')
-
-class EmailCategory:
-    WORK = "WORK"  # 업무 관련 중요 이메일
-    PERSONAL = "PERSONAL"  # 개인 통신
-    NEWSLETTER = "NEWSLETTER"  # 뉴스레터
-    SPAM = "SPAM"  # 스팸
-    ADVERTISEMENT = "ADVERTISEMENT"  # 광고
-    SOCIAL = "SOCIAL"  # 소셜 미디어 알림
-    UNKNOWN = "UNKNOWN"  # 분류 불가
-
-def parse_gemini_response(response_text: str) -> Dict:
-    """Gemini API 응답을 파싱합니다."""
+# 배치 분류 설정: 요청 하나당 토큰 예산, 최대 이메일 수
+CLASSIFY_BATCH_TOKEN_BUDGET = int(os.getenv("CLASSIFY_BATCH_TOKEN_BUDGET", "8000"))
+CLASSIFY_BATCH_MAX_SIZE = int(os.getenv("CLASSIFY_BATCH_MAX_SIZE", "20"))
+
+BATCH_PROMPT_HEADER = """
+다음 이메일들을 각각 분류해주세요.
+
+반드시 다음 카테고리 중 하나로 분류하고, 중요 점수(0-100)와 함께 응답해주세요:
+- WORK: 중요한 업무 관련 이메일 (회의, 프로젝트, 보고서 등)
+- PERSONAL: 개인적인 통신 (친구, 가족과의 대화)
+- NEWSLETTER: 뉴스레터 및 구독 메일 (뉴스, 블로그, 업데이트 등)
+- SPAM: 원치 않는 또는 의심스러운 이메일
+- ADVERTISEMENT: 마케팅 및 홍보성 콘텐츠
+- SOCIAL: 소셜 미디어 알림 (SNS, 커뮤니티 등)
+- UNKNOWN: 분류 불가능한 이메일
+
+반드시 각 이메일의 id를 포함한 다음 JSON 배열 형식으로만 응답해주세요:
+[
+    {"id": "이메일 id", "category": "카테고리", "importance": 중요도 점수}
+]
+
+"""
+
+async def classify_email(subject: str, content: str, sender: str,
+                         label_ids: Optional[List[str]] = None,
+                         headers: Optional[Dict[str, str]] = None, user_id: Optional[str] = None) -> Dict:
+    """이메일을 분류합니다.
+
+    규칙 분류 신뢰도가 임계값 이상이면 그 결과를, 아니면 analyze_email 결과 중
+    분류 정보만 반환합니다.
+    """
     try:
-        # JSON 형식 찾기
-        json_match = re.search(r'\{[\s\S]*\}', response_text)
-        if json_match:
-            json_str = json_match.group()
-            return json.loads(json_str)
-        
-        # JSON 형식이 아닌 경우 기본 구조 생성
-        return {
-            "category": EmailCategory.UNKNOWN,
-            "importance": 50
-        }
-    except json.JSONDecodeError:
-        # JSON 파싱 실패 시 기본 구조 생성
+        started_at = time.monotonic()
+        rule_result = classify_by_rules(sender=sender, label_ids=label_ids, headers=headers)
+        rule_seconds = time.monotonic() - started_at
+        if rule_result["confidence"] >= RULE_CONFIDENCE_THRESHOLD:
+            record_tier(escalated=False, rule_seconds=rule_seconds)
+            return {
+                "category": rule_result["category"],
+                "importance": rule_result["importance"],
+                "classified_at": datetime.utcnow().isoformat()
+            }
+
+        started_at = time.monotonic()
+        analysis = await analyze_email(subject=subject, content=content, sender=sender, user_id=user_id)
+        record_tier(escalated=True, rule_seconds=rule_seconds, llm_seconds=time.monotonic() - started_at)
+
         return {
-            "category": EmailCategory.UNKNOWN,
-            "importance": 50
+            "category": analysis["category"],
+            "importance": analysis["importance"],
+            "classified_at": analysis["analyzed_at"]
         }
 
-async def classify_email(subject: str, content: str, sender: str) -> Dict:
+    except GeminiThrottled:
+        raise
+    except Exception as e:
+        raise Exception(f"이메일 분류 실패: {str(e)}")
+
+def _format_batch_item(email: Dict) -> str:
+    """배치 프롬프트에 넣을 이메일 한 건을 만듭니다."""
+    return (
+        f"### id: {email['id']}\n"
+        f"제목: {email.get('subject', '')}\n"
+        f"발신자: {email.get('sender', '')}\n"
+        f"내용: {email.get('content', '')}\n\n"
+    )
+
+def build_batches(emails: List[Dict]) -> List[List[Dict]]:
+    """토큰 예산과 최대 크기에 맞춰 이메일을 배치로 나눕니다."""
+    header_tokens = estimate_tokens(BATCH_PROMPT_HEADER)
+    batches = []
+    current = []
+    current_tokens = header_tokens
+    for email in emails:
+        item_tokens = estimate_tokens(_format_batch_item(email))
+        if current and (current_tokens + item_tokens > CLASSIFY_BATCH_TOKEN_BUDGET
+                        or len(current) >= CLASSIFY_BATCH_MAX_SIZE):
+            batches.append(current)
+            current = []
+            current_tokens = header_tokens
+        current.append(email)
+        current_tokens += item_tokens
+    if current:
+        batches.append(current)
+    return batches
+
+def parse_batch_response(response_text: str, email_ids: List[str]) -> Dict[str, Dict]:
+    """배치 응답에서 이메일 ID별 분류 결과를 추출합니다. 검증에 실패한 항목은 제외합니다."""
+    results = {}
     try:
-        # Gemini에 전달할 프롬프트 준비
-        prompt = f"""
-        다음 이메일을 분석하여 분류해주세요:
-
-        제목: {subject}
-        발신자: {sender}
-        내용: {content}
-
-        반드시 다음 카테고리 중 하나로 분류하고, 중요 점수(0-100)와 함께 응답해주세요:
-        - WORK: 중요한 업무 관련 이메일 (회의, 프로젝트, 보고서 등)
-        - PERSONAL: 개인적인 통신 (친구, 가족과의 대화)
-        - NEWSLETTER: 뉴스레터 및 구독 메일 (뉴스, 블로그, 업데이트 등)
-        - SPAM: 원치 않는 또는 의심스러운 이메일
-        - ADVERTISEMENT: 마케팅 및 홍보성 콘텐츠
-        - SOCIAL: 소셜 미디어 알림 (SNS, 커뮤니티 등)
-        - UNKNOWN: 분류 불가능한 이메일
-
-        반드시 다음 JSON 형식으로 응답해주세요:
-        {{
-            "category": "카테고리",
-            "importance": "중요도 점수"
-        }}
-        """
-
-        # Gemini API 호출(동기)
-        response = model.generate_content(prompt)
-        result = response.text
-        
-        # 응답 파싱
-        classification = parse_gemini_response(result)
-        
-        # 분류 결과 검증
-        valid_categories = [getattr(EmailCategory, attr) for attr in dir(EmailCategory) 
-                          if not attr.startswith('_')]
-        if classification["category"] not in valid_categories:
-            classification["category"] = EmailCategory.UNKNOWN
-            
-        return {
-            "category": classification["category"],
-            "importance": classification["importance"],
+        json_match = re.search(r'\[[\s\S]*\]', response_text)
+        if not json_match:
+            return results
+        items = json.loads(json_match.group())
+    except json.JSONDecodeError:
+        return results
+
+    for item in items:
+        if not isinstance(item, dict) or str(item.get('id')) not in email_ids:
+            continue
+        category = str(item.get('category', '')).strip().upper()
+        if category not in VALID_CATEGORIES:
+            continue
+        try:
+            importance = min(max(float(item.get('importance')), 0.0), 100.0)
+        except (TypeError, ValueError):
+            continue
+        results[str(item['id'])] = {
+            "category": category,
+            "importance": importance,
             "classified_at": datetime.utcnow().isoformat()
         }
+    return results
 
-    except Exception as e:
-        raise Exception(f"이메일 분류 실패: {str(e)}")
+async def classify_emails_batch(emails: List[Dict], user_id: Optional[str] = None,
+                                fallback: bool = True) -> Dict[str, Dict]:
+    """여러 이메일을 하나의 Gemini 요청으로 분류합니다.
+
+    emails는 id, subject, sender, content를 가진 dict 목록이며, 결과는 이메일 ID별
+    분류 결과입니다. 배치 응답에서 파싱되지 않은 이메일은 개별 분류로 처리하며,
+    fallback이 False이면 결과에서 빠집니다. (호출한 쪽에서 따로 처리)
+    """
+    # 분류용 토큰 예산에 맞춰 본문 전처리
+    prepared = [
+        {**email, 'content': (await run_blocking(preprocess_body, email.get('content', ''), CLASSIFY_TOKEN_BUDGET))[0]}
+        for email in emails
+    ]
+
+    results = {}
+    for batch in build_batches(prepared):
+        email_ids = [str(email['id']) for email in batch]
+        prompt = BATCH_PROMPT_HEADER + ''.join(_format_batch_item(email) for email in batch)
+        try:
+            response = await generate_content(prompt, user_id=user_id)
+            results.update(parse_batch_response(response.text, email_ids))
+        except GeminiThrottled:
+            # 한도 초과 시 개별 호출로 전환하지 않고 호출한 쪽에서 나중에 다시 처리
+            raise
+        except Exception as e:
+            print(f"배치 분류 실패, 개별 분류로 전환: {str(e)}")
+
+        if not fallback:
+            continue
+
+        # 배치 결과에 없는 이메일은 개별 호출로 분류
+        for email in batch:
+            if str(email['id']) not in results:
+                results[str(email['id'])] = await classify_email(
+                    subject=email.get('subject', ''),
+                    content=email.get('content', ''),
+                    sender=email.get('sender', ''),
+                    user_id=user_id
+                )
+    return results
 
 async def get_email_priority(category: str, importance: int) -> str:
     """이메일의 우선순위를 결정합니다."""
@@ -99,4 +177,4 @@ async def get_email_priority(category: str, importance: int) -> str:
     elif category == EmailCategory.SPAM:
         return "LOW"
     else:
-        return "NORMAL" 
\ No newline at end of file
+        return "NORMAL" 
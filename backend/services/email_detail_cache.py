@@ -0,0 +1,145 @@
+from typing import Callable, Dict, List, Optional
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+import threading
+from models.email_model import Email
+from models.email_label_model import replace_labels
+from services.gmail_service import GmailService
+
+# 상세 조회는 저장된 헤더/본문/라벨로 응답하고, Gmail은 캐시가 비어 있을 때(synced_at이 NULL)만 조회합니다.
+# 라벨 변경은 history 동기화(services/history_sync.py)에서 바로 반영하므로 조회 시 다시 가져오지 않습니다.
+
+_lock = threading.Lock()
+_stats = {
+    "hits": 0,  # 저장된 데이터로 응답
+    "misses": 0,  # Gmail에서 다시 가져와 저장 후 응답
+    "header_misses": 0,  # 본문 없는 조회라 헤더만(metadata 단계) 가져와 저장 후 응답
+    "not_modified": 0,  # If-None-Match 일치로 304 응답
+    "label_updates": 0,  # history 라벨 변경 반영
+    "invalidated": 0,  # 라벨 목록이 없는 변경이라 다음 조회 때 다시 가져오도록 표시
+}
+
+
+def _count(key: str):
+    with _lock:
+        _stats[key] += 1
+
+
+def detail_etag(email: Email, include_body: bool) -> str:
+    """상세 응답의 ETag를 만듭니다. (행이 바뀌면 updated_at이 바뀌므로 본문을 읽지 않고 계산)"""
+    changed_at = email.updated_at or email.processed_at or email.received_at
+    variant = "full" if include_body else "headers"
+    return f'W/"{email.id}-{int(changed_at.timestamp() * 1000000)}-{variant}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 헤더(쉼표로 구분된 목록 또는 *)가 ETag와 일치하는지 확인합니다."""
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(',')]
+    return '*' in candidates or etag in candidates
+
+
+def record_not_modified():
+    _count("not_modified")
+
+
+async def ensure_synced(db: AsyncSession, email: Email, get_gmail_service: Callable[[], GmailService],
+                        include_body: bool = True) -> bool:
+    """저장된 헤더/본문이 없으면 Gmail에서 가져와 저장합니다. Gmail을 조회했으면 True를 반환합니다.
+
+    include_body가 False이면 헤더만 확인하고, 없을 때 본문 없이 metadata 단계로 가져옵니다.
+    (synced_at은 그대로 두므로 본문이 필요한 조회에서 full 단계로 다시 가져옴)
+    get_gmail_service는 Gmail 조회가 필요할 때만 호출됩니다.
+    """
+    if email.synced_at is not None:
+        _count("hits")
+        return False
+
+    if not include_body:
+        await db.refresh(email, attribute_names=['headers'])
+        if email.headers is not None:
+            _count("hits")
+            return False
+        email_data = await get_gmail_service().get_email_headers(email.email_id)
+    else:
+        email_data = await get_gmail_service().get_email(email.email_id)
+
+    def apply(session: Session):
+        email.headers = email_data['headers']
+        email.snippet = email_data['snippet']
+        replace_labels(email, email_data['label_ids'])
+        if include_body:
+            email.content = email_data['content'] or None
+            email.html_content = email_data['html_content']
+            email.synced_at = datetime.utcnow()
+
+    try:
+        await db.run_sync(apply)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise Exception(f"이메일 상세 캐시 저장 실패: {str(e)}")
+    _count("misses" if include_body else "header_misses")
+    return True
+
+
+async def build_detail(db: AsyncSession, email: Email, include_body: bool = True) -> Dict:
+    """저장된 데이터로 상세 응답을 만듭니다. (본문은 include_body일 때만 읽음)"""
+    attributes = ['headers', 'content', 'html_content'] if include_body else ['headers']
+    await db.refresh(email, attribute_names=attributes)
+
+    return {
+        "id": email.email_id,
+        "threadId": email.thread_id,
+        "labelIds": email.label_ids or [],
+        "snippet": email.snippet or '',
+        "headers": email.headers or {},
+        "body": (email.html_content or email.content or None) if include_body else None,
+        "summary": email.summary,
+        "key_points": email.key_points,
+        "sentiment": email.sentiment,
+        "action_items": email.action_items,
+        "category": email.category,
+        "importance": email.importance,
+        "received_at": email.received_at.isoformat() if email.received_at else None,
+        "processed_at": email.processed_at.isoformat() if email.processed_at else None
+    }
+
+
+def apply_label_changes(db: Session, user_id: str, label_changes: Dict[str, Optional[List[str]]]) -> int:
+    """history에 기록된 라벨 변경을 저장된 이메일에 반영합니다. (커밋은 호출한 쪽에서)
+
+    변경 후 라벨 목록이 없는 항목은 다음 상세 조회 때 Gmail에서 다시 가져오도록 synced_at을 비웁니다.
+    반영한 이메일 수를 반환합니다.
+    """
+    if not label_changes:
+        return 0
+
+    emails = db.query(Email).filter(
+        Email.user_id == user_id,
+        Email.email_id.in_(list(label_changes))
+    ).all()
+    updated = 0
+    for email in emails:
+        label_ids = label_changes[email.email_id]
+        if label_ids is None:
+            email.synced_at = None
+            _count("invalidated")
+        elif label_ids != (email.label_ids or []):
+            replace_labels(email, label_ids)
+            _count("label_updates")
+        else:
+            continue
+        updated += 1
+    return updated
+
+
+def get_detail_cache_stats() -> Dict:
+    """상세 조회 캐시 지표를 반환합니다."""
+    with _lock:
+        stats = dict(_stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    return stats
@@ -1,201 +1,419 @@
-import google.generativeai as genai
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple, Union
 import os
 from dotenv import load_dotenv
 from datetime import datetime
 import json
-import re
-from sqlalchemy.orm import Session
-from models.email_model import Email
-from services.gmail_service import GmailService
-from services.email_classifier import classify_email
-from services.email_summarizer import summarize_email
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+from models.email_model import Email, CategorySource
+from models.email_thread_model import EmailThread
+from models.email_label_model import EmailLabel, make_labels
+from services.gmail_service import GmailService, parse_email_date, to_utc_naive
+from services.email_analyzer import EmailCategory, analyze_email
+from services.email_classifier import classify_emails_batch
+from services.rule_classifier import classify_by_rules, record_tier, RULE_CONFIDENCE_THRESHOLD
+from services import email_writer
+from services.thread_summarizer import thread_lock, analyze_thread_update, resolve_message_category, apply_to_thread
+from services.mime_extractor import extract_body, get_headers
+from services.gemini_client import GeminiThrottled
 import base64
+import time
 
 load_dotenv()
 
-# Gemini API 설정
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-model = genai.GenerativeModel('gemini-1.5-flash')
-
-class EmailCategory:
-    WORK = "WORK"  # 업무 관련 중요 이메일
-    PERSONAL = "PERSONAL"  # 개인 통신
-    NEWSLETTER = "NEWSLETTER"  # 뉴스레터
-    SPAM = "SPAM"  # 스팸
-    ADVERTISEMENT = "ADVERTISEMENT"  # 광고
-    SOCIAL = "SOCIAL"  # 소셜 미디어 알림
-    UNKNOWN = "UNKNOWN"  # 분류 불가
-
-def parse_gemini_response(response_text: str) -> Dict:
-    """Gemini API 응답을 파싱합니다."""
-    try:
-        # JSON 형식 찾기
-        json_match = re.search(r'\{[\s\S]*\}', response_text)
-        if json_match:
-            json_str = json_match.group()
-            return json.loads(json_str)
-        
-        # JSON 형식이 아닌 경우 기본 구조 생성
-        return {
-            "category": EmailCategory.UNKNOWN,
-            "importance": 50
-        }
-    except json.JSONDecodeError:
-        # JSON 파싱 실패 시 기본 구조 생성
-        return {
-            "category": EmailCategory.UNKNOWN,
-            "importance": 50
-        }
+# 목록 조회에 필요한 컬럼 (본문/수신자/라벨은 읽지 않음)
+LIST_COLUMNS = (
+    Email.id, Email.email_id, Email.subject, Email.sender, Email.snippet, Email.category,
+    Email.importance, Email.summary, Email.key_points, Email.sentiment, Email.action_items,
+    Email.received_at,
+)
+
+# 배치 분류 결과가 이 카테고리이면 개별 요약(Gemini 호출) 없이 스니펫을 요약으로 사용
+SNIPPET_SUMMARY_CATEGORIES = {
+    EmailCategory.NEWSLETTER, EmailCategory.ADVERTISEMENT, EmailCategory.SPAM, EmailCategory.SOCIAL,
+}
 
-async def process_email(email_id: str, gmail_service: GmailService, db: Session) -> Optional[Email]:
-    """이메일을 처리(분류 및 요약)합니다."""
+async def process_email(email_id: str, gmail_service: GmailService, db: AsyncSession,
+                        email_data: Optional[Dict] = None, classification: Optional[Dict] = None) -> Optional[Email]:
+    """이메일을 처리(분류 및 요약)합니다.
+
+    email_data는 미리 가져온 get_email 결과, classification은 배치 분류 결과입니다.
+    """
     try:
         # 이미 처리된 이메일인지 확인
-        existing = db.query(Email).filter(Email.email_id == email_id).first()
+        user_id = gmail_service.user_id
+        existing = await db.scalar(select(Email).where(Email.user_id == user_id, Email.email_id == email_id))
         if existing:
             return existing
 
         # 이메일 내용 가져오기
-        email_data = await gmail_service.get_email(email_id)
+        if email_data is None:
+            email_data = await gmail_service.get_email(email_id)
         
-        # 이메일 분류
-        classification = await classify_email(
-            subject=email_data['subject'],
-            content=email_data['content'],
-            sender=email_data['sender']
+        # 라벨/헤더 기반 규칙 분류로 확실한 이메일은 Gemini 호출 생략
+        started_at = time.monotonic()
+        rule_result = classify_by_rules(
+            sender=email_data['sender'],
+            label_ids=email_data['label_ids'],
+            headers=email_data['headers']
         )
-        
-        # 이메일 요약
-        try:
-            summary_result = await summarize_email(
-                content=email_data['content'],
+        rule_seconds = time.monotonic() - started_at
+
+        thread_id = email_data['thread_id']
+
+        # 같은 스레드의 메시지는 순서대로 처리 (스레드 요약 갱신이 유실되지 않도록)
+        async with thread_lock(user_id, thread_id or email_id):
+            thread = await db.get(EmailThread, (user_id, thread_id)) if thread_id else None
+            thread_analysis = None
+
+            if rule_result['confidence'] >= RULE_CONFIDENCE_THRESHOLD:
+                record_tier(escalated=False, rule_seconds=rule_seconds)
+                analysis = {
+                    "category": rule_result['category'],
+                    "importance": rule_result['importance'],
+                    "summary": email_data['snippet'],
+                    "key_points": [],
+                    "action_items": [],
+                    "sentiment": None
+                }
+                category, category_source = analysis["category"], CategorySource.RULE
+            elif thread is not None:
+                # 이전 스레드 요약 + 새 메시지만으로 스레드와 메시지를 함께 분석 (Gemini 1회 호출)
+                started_at = time.monotonic()
+                update = await analyze_thread_update(
+                    thread,
+                    subject=email_data['subject'],
+                    content=email_data['content'],
+                    sender=email_data['sender'],
+                    user_id=user_id
+                )
+                record_tier(escalated=True, rule_seconds=rule_seconds, llm_seconds=time.monotonic() - started_at)
+                analysis, thread_analysis = update["message"], update["thread"]
+                category, category_source = resolve_message_category(thread_analysis["category"], analysis["category"])
+            elif classification is not None and classification["category"] in SNIPPET_SUMMARY_CATEGORIES:
+                # 배치 분류로 요약이 필요 없는 메일로 판단됨 (추가 Gemini 호출 없음)
+                record_tier(escalated=True, rule_seconds=rule_seconds)
+                analysis = {
+                    "category": classification["category"],
+                    "importance": classification["importance"],
+                    "summary": email_data['snippet'],
+                    "key_points": [],
+                    "action_items": [],
+                    "sentiment": None
+                }
+                category, category_source = analysis["category"], CategorySource.THREAD
+            else:
+                # 스레드의 첫 메시지: 이메일 분류 및 요약 (Gemini 1회 호출)
+                started_at = time.monotonic()
+                analysis = await analyze_email(
+                    subject=email_data['subject'],
+                    content=email_data['content'],
+                    sender=email_data['sender'],
+                    user_id=user_id
+                )
+                record_tier(escalated=True, rule_seconds=rule_seconds, llm_seconds=time.monotonic() - started_at)
+                category, category_source = analysis["category"], CategorySource.THREAD
+            key_points = analysis['key_points']
+            action_items = analysis['action_items']
+
+            # DB에 저장
+            email = Email(
+                email_id=email_id,
+                user_id=user_id,
+                thread_id=thread_id,
                 subject=email_data['subject'],
-                sender=email_data['sender']
+                sender=email_data['sender'],
+                snippet=email_data['snippet'],
+                content=email_data['content'],
+                html_content=email_data['html_content'],
+                headers=email_data['headers'],
+                category=category,
+                category_source=category_source,
+                importance=float(analysis["importance"]),
+                summary=analysis["summary"] or None,
+                sentiment=analysis["sentiment"],
+                key_points=key_points or None,
+                action_items=action_items or None,
+                has_action_items=bool(action_items),
+                label_ids=email_data['label_ids'],
+                labels=make_labels(user_id, email_data['label_ids']),
+                received_at=email_data['date'],
+                synced_at=datetime.utcnow()
             )
-            summary = summary_result.get('summary') if summary_result else None
-            key_points = summary_result.get('key_points') if summary_result else None
-            action_items = summary_result.get('action_items') if summary_result else None
+            # 여러 워커의 저장을 모아 한 트랜잭션으로 커밋 (다른 워커가 먼저 저장했으면 기존 행 반환)
+            saved = await email_writer.save_email(email)
+            if saved is None:
+                return await db.scalar(select(Email).where(Email.user_id == user_id, Email.email_id == email_id))
+
+            # 스레드 요약/분류 반영
+            if thread_id:
+                await apply_to_thread(db, thread, saved, thread_analysis)
+            return saved
+
+    except GeminiThrottled:
+        await db.rollback()
+        raise
+    except Exception as e:
+        await db.rollback()
+        raise Exception(f"이메일 처리 실패: {str(e)}")
+
+async def process_emails(email_ids: List[str], gmail_service: GmailService,
+                         db: AsyncSession) -> Dict[str, Union[Email, Exception]]:
+    """한 사용자의 여러 이메일을 처리합니다.
+
+    규칙으로 분류되지 않는 새 스레드 메시지가 둘 이상이면 한 번의 Gemini 요청으로 함께 분류하고,
+    요약이 필요 없는 카테고리(SNIPPET_SUMMARY_CATEGORIES)는 개별 분석을 생략합니다.
+    결과는 이메일 ID별 저장된 Email 또는 처리 중 발생한 예외입니다.
+    """
+    user_id = gmail_service.user_id
+    results = {}
+    prepared = {}
+    for email_id in email_ids:
+        try:
+            existing = await db.scalar(select(Email).where(Email.user_id == user_id, Email.email_id == email_id))
+            if existing:
+                results[email_id] = existing
+            else:
+                prepared[email_id] = await gmail_service.get_email(email_id)
         except Exception as e:
-            print(f"이메일 요약 실패: {str(e)}")
-            summary = None
-            key_points = None
-            action_items = None
+            results[email_id] = e
 
-        # DB에 저장
-        email = Email(
-            email_id=email_id,
-            subject=email_data['subject'],
+    # 배치 분류 대상: 규칙 분류 신뢰도가 낮고 기존 스레드가 없는 메시지
+    candidates = []
+    for email_id, email_data in prepared.items():
+        rule_result = classify_by_rules(
             sender=email_data['sender'],
-            content=email_data['content'],
-            category=classification["category"],
-            importance=float(classification["importance"]),
-            summary=summary,
-            key_points=json.dumps(key_points) if key_points else None,
-            action_items=json.dumps(action_items) if action_items else None,
-            received_at=email_data['date']
+            label_ids=email_data['label_ids'],
+            headers=email_data['headers']
         )
-        db.add(email)
-        db.commit()
-        db.refresh(email)
-        
-        return email
+        if rule_result['confidence'] >= RULE_CONFIDENCE_THRESHOLD:
+            continue
+        thread_id = email_data['thread_id']
+        if thread_id and await db.get(EmailThread, (user_id, thread_id)) is not None:
+            continue
+        candidates.append({
+            'id': email_id,
+            'subject': email_data['subject'],
+            'sender': email_data['sender'],
+            'content': email_data['content'] or ''
+        })
 
-    except Exception as e:
-        db.rollback()
-        raise Exception(f"이메일 처리 실패: {str(e)}")
+    classifications = {}
+    if len(candidates) > 1:
+        try:
+            classifications = await classify_emails_batch(candidates, user_id=user_id, fallback=False)
+        except Exception as e:
+            # 한도 초과/실패 시 메시지별 분석으로 처리 (한도 초과는 메시지별로 연기됨)
+            print(f"배치 분류 실패, 개별 분석으로 처리: {str(e)}")
+
+    for email_id, email_data in prepared.items():
+        try:
+            results[email_id] = await process_email(
+                email_id, gmail_service, db,
+                email_data=email_data,
+                classification=classifications.get(email_id)
+            )
+        except Exception as e:
+            results[email_id] = e
+    return results
+
+def encode_cursor(email: Email, sort_by: str) -> str:
+    """마지막 행의 정렬 키를 페이지 커서 문자열로 만듭니다."""
+    key = {"received_at": to_utc_naive(email.received_at).isoformat(), "id": email.id}
+    if sort_by == "importance":
+        key["importance"] = email.importance
+    return base64.urlsafe_b64encode(json.dumps(key).encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor: str) -> Dict:
+    """페이지 커서 문자열을 정렬 키로 되돌립니다."""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        key["received_at"] = to_utc_naive(datetime.fromisoformat(key["received_at"]))
+        return key
+    except Exception:
+        raise ValueError("잘못된 페이지 커서입니다.")
+
+async def query_emails(
+    db: AsyncSession,
+    user_id: str,
+    category: Optional[str] = None,
+    sort_by: str = "importance",
+    sort_order: str = "desc",
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    label: Optional[str] = None,
+    has_action_items: Optional[bool] = None
+) -> Tuple[List[Email], Optional[str]]:
+    """DB에 저장된 이메일을 키셋(커서) 페이지네이션으로 조회합니다.
+
+    중요도순은 (importance, received_at, id), 날짜순은 (received_at, id) 순으로 정렬하며
+    다음 페이지 커서를 함께 반환합니다.
+    """
+    query = select(Email).options(load_only(*LIST_COLUMNS)).where(Email.user_id == user_id)
+
+    # 카테고리 필터
+    if category:
+        query = query.where(Email.category == category)
+
+    # 라벨 필터 (email_labels 인덱스 사용)
+    if label:
+        query = query.where(Email.id.in_(
+            select(EmailLabel.email_id).where(EmailLabel.user_id == user_id, EmailLabel.label_id == label)
+        ))
+
+    # 액션 아이템 유무 필터
+    if has_action_items is not None:
+        query = query.where(Email.has_action_items == has_action_items)
+
+    # 정렬 키
+    if sort_by == "importance":
+        columns = [Email.importance, Email.received_at, Email.id]
+    else:
+        columns = [Email.received_at, Email.id]
+    descending = sort_order == "desc"
+
+    # 커서 이후의 행만 조회
+    if cursor:
+        key = decode_cursor(cursor)
+        values = [key["received_at"], key["id"]]
+        if sort_by == "importance":
+            values.insert(0, key["importance"])
+        if descending:
+            query = query.where(tuple_(*columns) < tuple_(*values))
+        else:
+            query = query.where(tuple_(*columns) > tuple_(*values))
+
+    query = query.order_by(*[column.desc() if descending else column.asc() for column in columns])
+
+    # 다음 페이지 존재 여부 확인을 위해 하나 더 조회
+    results = (await db.scalars(query.limit(limit + 1))).all()
+    next_cursor = encode_cursor(results[limit - 1], sort_by) if len(results) > limit else None
+    return results[:limit], next_cursor
+
+def encode_thread_cursor(thread: EmailThread, sort_by: str) -> str:
+    """마지막 스레드의 정렬 키를 페이지 커서 문자열로 만듭니다."""
+    key = {"last_message_at": to_utc_naive(thread.last_message_at).isoformat(), "thread_id": thread.thread_id}
+    if sort_by == "importance":
+        key["importance"] = thread.importance
+    return base64.urlsafe_b64encode(json.dumps(key).encode('utf-8')).decode('ascii')
+
+def decode_thread_cursor(cursor: str) -> Dict:
+    """페이지 커서 문자열을 스레드 정렬 키로 되돌립니다."""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        key["last_message_at"] = to_utc_naive(datetime.fromisoformat(key["last_message_at"]))
+        return key
+    except Exception:
+        raise ValueError("잘못된 페이지 커서입니다.")
+
+async def query_threads(
+    db: AsyncSession,
+    user_id: str,
+    category: Optional[str] = None,
+    sort_by: str = "last_message_at",
+    sort_order: str = "desc",
+    limit: int = 20,
+    cursor: Optional[str] = None
+) -> Tuple[List[EmailThread], Optional[str]]:
+    """스레드 목록을 키셋(커서) 페이지네이션으로 조회합니다.
+
+    중요도순은 (importance, last_message_at, thread_id), 최신순은 (last_message_at, thread_id) 순으로 정렬합니다.
+    """
+    query = select(EmailThread).where(EmailThread.user_id == user_id)
+    if category:
+        query = query.where(EmailThread.category == category)
+
+    if sort_by == "importance":
+        columns = [EmailThread.importance, EmailThread.last_message_at, EmailThread.thread_id]
+    else:
+        columns = [EmailThread.last_message_at, EmailThread.thread_id]
+    descending = sort_order == "desc"
+
+    if cursor:
+        key = decode_thread_cursor(cursor)
+        values = [key["last_message_at"], key["thread_id"]]
+        if sort_by == "importance":
+            values.insert(0, key["importance"])
+        if descending:
+            query = query.where(tuple_(*columns) < tuple_(*values))
+        else:
+            query = query.where(tuple_(*columns) > tuple_(*values))
+
+    query = query.order_by(*[column.desc() if descending else column.asc() for column in columns])
+
+    results = (await db.scalars(query.limit(limit + 1))).all()
+    next_cursor = encode_thread_cursor(results[limit - 1], sort_by) if len(results) > limit else None
+    return results[:limit], next_cursor
+
+async def get_thread_messages(db: AsyncSession, user_id: str, thread_id: str) -> List[Email]:
+    """스레드의 메시지를 오래된 순으로 조회합니다. (목록 컬럼만)"""
+    query = select(Email).options(load_only(*LIST_COLUMNS, Email.category_source)).where(
+        Email.user_id == user_id,
+        Email.thread_id == thread_id
+    ).order_by(Email.received_at.asc(), Email.id.asc())
+    return (await db.scalars(query)).all()
 
 async def get_emails_by_category(
-    db: Session,
+    db: AsyncSession,
+    user_id: str,
     category: str,
     sort_by: str = "importance",
     sort_order: str = "desc",
     limit: int = 100
 ) -> List[Dict]:
     """카테고리별 이메일 목록을 조회합니다."""
-    query = db.query(Email).filter(Email.category == category)
-    
-    # 정렬
-    if sort_by == "importance":
-        query = query.order_by(
-            Email.importance.desc() if sort_order == "desc" 
-            else Email.importance.asc()
-        )
-    elif sort_by == "received_at":
-        query = query.order_by(
-            Email.received_at.desc() if sort_order == "desc"
-            else Email.received_at.asc()
-        )
-    
-    # 결과 반환
-    results = query.limit(limit).all()
-    return [email.to_dict() for email in results]
-
-async def get_latest_email_id(gmail_service: GmailService) -> str:
-    """가장 최근 이메일의 ID를 가져옵니다."""
-    emails = await gmail_service.get_emails(max_results=1)
-    return emails['messages'][0]['id'] if emails and emails['messages'] else None
+    results, _ = await query_emails(db, user_id, category=category, sort_by=sort_by, sort_order=sort_order, limit=limit)
+    return [
+        {
+            **{column.key: getattr(email, column.key) for column in LIST_COLUMNS},
+            "received_at": email.received_at.isoformat(),
+        }
+        for email in results
+    ]
 
-async def save_email_to_db(db: Session, message: dict, category: str = "UNCATEGORIZED", importance: float = 50.0) -> Email:
+async def save_email_to_db(db: AsyncSession, message: dict, category: str = "UNCATEGORIZED", importance: float = 50.0,
+                           user_id: Optional[str] = None) -> Email:
     """이메일 데이터를 데이터베이스에 저장합니다."""
     try:
-        # 이메일 본문 디코딩
-        def decode_body(part):
-            if 'body' in part and 'data' in part['body']:
-                return base64.urlsafe_b64decode(part['body']['data']).decode('utf-8')
-            return None
-
-        # 이메일 본문 추출
-        content = None
-        html_content = None
-        if 'payload' in message:
-            payload = message['payload']
-            if 'body' in payload and 'data' in payload['body']:
-                content = decode_body(payload)
-            elif 'parts' in payload:
-                for part in payload['parts']:
-                    if part['mimeType'] == 'text/html':
-                        html_content = decode_body(part)
-                    elif part['mimeType'] == 'text/plain':
-                        content = decode_body(part)
-
-        # 헤더 정보 추출
-        headers = {}
-        if 'payload' in message and 'headers' in message['payload']:
-            for header in message['payload']['headers']:
-                headers[header['name']] = header['value']
-
-        # 수신 시간 파싱
-        received_at = datetime.utcnow()
-        if 'Date' in headers:
-            try:
-                received_at = datetime.strptime(headers['Date'], '%a, %d %b %Y %H:%M:%S %z')
-            except:
-                pass
+        # 이메일 본문/헤더 추출 (중첩 multipart, charset 처리)
+        payload = message.get('payload', {})
+        body = extract_body(payload)
+        content = body['text'] or None
+        html_content = body['html']
+        headers = get_headers(payload)
+
+        # 수신 시간 파싱 (UTC 기준)
+        received_at = parse_email_date(headers.get('Date'))
 
         # 새 이메일 객체 생성
         email = Email(
             email_id=message['id'],
+            user_id=user_id,
             thread_id=message['threadId'],
             subject=headers.get('Subject', ''),
             sender=headers.get('From', ''),
             recipient=headers.get('To', ''),
+            snippet=message.get('snippet'),
             content=content,
             html_content=html_content,
+            headers=headers,
             category=category,
             importance=importance,
-            label_ids=json.dumps(message.get('labelIds', [])),
-            received_at=received_at
+            label_ids=message.get('labelIds', []),
+            labels=make_labels(user_id, message.get('labelIds', [])),
+            received_at=received_at,
+            synced_at=datetime.utcnow() if 'payload' in message else None
         )
 
         # DB에 저장
         db.add(email)
-        db.commit()
-        db.refresh(email)
+        await db.commit()
+        await db.refresh(email)
         
         return email
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise e 
 
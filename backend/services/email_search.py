@@ -0,0 +1,120 @@
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+from sqlalchemy import bindparam, DateTime, Float, Integer, text
+from sqlalchemy.ext.asyncio import AsyncSession
+import base64
+import html
+import json
+import re
+from services.gmail_service import to_utc_naive
+
+# 검색 결과 미리보기에 강조 표시할 태그와 최대 토큰 수
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+SNIPPET_TOKENS = 16
+# DB가 일치 부분에 붙이는 임시 표시 (본문을 HTML 이스케이프한 뒤 강조 태그로 바꿈)
+_MARK_START = "\ue000"
+_MARK_END = "\ue001"
+
+# 필드별 가중치 (제목 > 요약 > 보낸 사람 > 본문) - bm25() 인자 순서는 색인 컬럼 순서(subject, sender, content, summary)
+BM25_WEIGHTS = "10.0, 3.0, 1.0, 5.0"
+
+_TERM_PATTERN = re.compile(r"[\w@.+-]+", re.UNICODE)
+
+
+def _terms(query: str) -> List[str]:
+    """검색어를 FTS 문법 문자가 없는 단어 목록으로 나눕니다."""
+    return [term for term in _TERM_PATTERN.findall(query) if term.strip('.+-@')]
+
+
+def _match_expression(terms: List[str], dialect: str) -> str:
+    """모든 단어를 접두어로 포함하는 검색식을 만듭니다. (한국어 조사가 붙은 단어도 검색되도록 접두어 검색)"""
+    if dialect == 'postgresql':
+        return " & ".join(f"'{term.replace(chr(39), '')}':*" for term in terms)
+    return " ".join('"' + term.replace('"', '') + '"*' for term in terms)
+
+
+def _highlight(snippet: Optional[str]) -> Optional[str]:
+    """미리보기 본문을 HTML 이스케이프하고 임시 표시만 강조 태그로 바꿉니다."""
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(_MARK_START, HIGHLIGHT_START).replace(_MARK_END, HIGHLIGHT_END)
+
+
+def encode_search_cursor(rank: float, email_pk: int) -> str:
+    """마지막 결과의 (순위, id)를 페이지 커서 문자열로 만듭니다."""
+    return base64.urlsafe_b64encode(json.dumps({"rank": rank, "id": email_pk}).encode('utf-8')).decode('ascii')
+
+
+def decode_search_cursor(cursor: str) -> Dict:
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return {"rank": float(key["rank"]), "id": int(key["id"])}
+    except Exception:
+        raise ValueError("잘못된 페이지 커서입니다.")
+
+
+async def search_emails(
+    db: AsyncSession,
+    user_id: str,
+    query: str,
+    category: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    limit: int = 20,
+    cursor: Optional[str] = None
+) -> Tuple[List[Dict], Optional[str]]:
+    """제목/보낸 사람/본문/요약 전문 검색 결과를 관련도순으로 반환합니다.
+
+    SQLite는 FTS5(bm25), PostgreSQL은 tsvector(ts_rank)를 사용하며 (순위, id) 키셋 커서로 페이지를 나눕니다.
+    순위는 두 DB 모두 작을수록 관련도가 높습니다.
+    """
+    terms = _terms(query)
+    if not terms:
+        return [], None
+
+    dialect = db.bind.dialect.name
+    params = {"match": _match_expression(terms, dialect), "user_id": user_id, "limit": limit + 1,
+              "mark_start": _MARK_START, "mark_end": _MARK_END}
+
+    if dialect == 'postgresql':
+        rank = "-ts_rank(emails_fts.document, to_tsquery('simple', :match))"
+        snippet = (f"ts_headline('simple', emails_fts.content, to_tsquery('simple', :match), "
+                   f"'StartSel=' || :mark_start || ',StopSel=' || :mark_end || ',MaxWords={SNIPPET_TOKENS},MinWords=5')")
+        match = "emails_fts.document @@ to_tsquery('simple', :match)"
+    else:
+        rank = f"bm25(emails_fts, {BM25_WEIGHTS})"
+        snippet = f"snippet(emails_fts, -1, :mark_start, :mark_end, '…', {SNIPPET_TOKENS})"
+        match = "emails_fts MATCH :match"
+
+    conditions = [match, "emails.user_id = :user_id"]
+    if category:
+        conditions.append("emails.category = :category")
+        params["category"] = category
+    if date_from:
+        conditions.append("emails.received_at >= :date_from")
+        params["date_from"] = to_utc_naive(date_from)
+    if date_to:
+        conditions.append("emails.received_at < :date_to")
+        params["date_to"] = to_utc_naive(date_to)
+    if cursor:
+        key = decode_search_cursor(cursor)
+        conditions.append(f"({rank} > :cursor_rank OR ({rank} = :cursor_rank AND emails.id > :cursor_id))")
+        params["cursor_rank"] = key["rank"]
+        params["cursor_id"] = key["id"]
+
+    sql = (
+        f"SELECT emails.id, emails.email_id, emails.subject, emails.sender, emails.category, "
+        f"emails.importance, emails.summary, emails.received_at, {rank} AS rank, {snippet} AS snippet "
+        f"FROM emails_fts JOIN emails ON emails.id = emails_fts.rowid "
+        f"WHERE {' AND '.join(conditions)} "
+        f"ORDER BY rank, emails.id LIMIT :limit"
+    )
+    statement = text(sql).bindparams(
+        *[bindparam(name, type_=DateTime) for name in ("date_from", "date_to") if name in params]
+    ).columns(id=Integer, received_at=DateTime, rank=Float)
+    rows = (await db.execute(statement, params)).mappings().all()
+
+    results = [{**row, "snippet": _highlight(row["snippet"])} for row in rows[:limit]]
+    next_cursor = encode_search_cursor(rows[limit - 1]["rank"], rows[limit - 1]["id"]) if len(rows) > limit else None
+    return results, next_cursor
@@ -0,0 +1,118 @@
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+import asyncio
+import os
+import time
+from models.database import engine
+from models.email_model import Email
+from services.executor import run_blocking
+
+load_dotenv()
+
+# 한 번에 커밋할 최대 이메일 수와 첫 커밋 전 대기 시간(ms)
+# 커밋 중에 들어온 이메일은 다음 커밋에 모이므로(그룹 커밋) 대기 시간 없이도 동시 저장이 묶임
+EMAIL_WRITE_BATCH_SIZE = int(os.getenv("EMAIL_WRITE_BATCH_SIZE", "50"))
+EMAIL_WRITE_FLUSH_MS = int(os.getenv("EMAIL_WRITE_FLUSH_MS", "0"))
+
+# 커밋 후에도 저장된 객체의 속성을 읽을 수 있도록 expire_on_commit 비활성화
+WriterSession = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+_buffer: List[Tuple[Email, asyncio.Future]] = []
+_flush_task: Optional[asyncio.Task] = None
+_stats = {
+    "written": 0,
+    "duplicates": 0,
+    "batches": 0,
+    "commit_seconds": 0.0,
+}
+
+
+def _commit_batch(emails: List[Email]) -> List[bool]:
+    """이메일 묶음을 한 트랜잭션으로 저장합니다.
+
+    중복(이미 저장된 email_id)이 섞여 있으면 한 건씩 다시 저장하고, 저장 여부 목록을 반환합니다.
+    """
+    db = WriterSession()
+    try:
+        db.add_all(emails)
+        db.commit()
+        return [True] * len(emails)
+    except IntegrityError:
+        db.rollback()
+        saved = []
+        for email in emails:
+            try:
+                db.add(email)
+                db.commit()
+                saved.append(True)
+            except IntegrityError:
+                db.rollback()
+                db.expunge_all()
+                saved.append(False)
+        return saved
+    finally:
+        db.close()
+
+
+async def flush():
+    """버퍼에 쌓인 이메일을 최대 EMAIL_WRITE_BATCH_SIZE개까지 즉시 저장합니다."""
+    global _buffer
+    if not _buffer:
+        return
+    batch, _buffer = _buffer[:EMAIL_WRITE_BATCH_SIZE], _buffer[EMAIL_WRITE_BATCH_SIZE:]
+    emails = [email for email, _ in batch]
+
+    started_at = time.monotonic()
+    try:
+        saved = await run_blocking(_commit_batch, emails)
+    except Exception as e:
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(e)
+        return
+
+    _stats["batches"] += 1
+    _stats["commit_seconds"] += time.monotonic() - started_at
+    for (email, future), ok in zip(batch, saved):
+        _stats["written" if ok else "duplicates"] += 1
+        if not future.done():
+            future.set_result(email if ok else None)
+
+
+async def _flush_loop():
+    """버퍼가 빌 때까지 커밋합니다. 커밋하는 동안 들어온 이메일은 다음 커밋에 함께 저장됩니다."""
+    global _flush_task
+    try:
+        if EMAIL_WRITE_FLUSH_MS > 0:
+            await asyncio.sleep(EMAIL_WRITE_FLUSH_MS / 1000)
+        while _buffer:
+            await flush()
+    finally:
+        _flush_task = None
+
+
+async def save_email(email: Email) -> Optional[Email]:
+    """이메일을 배치 저장 버퍼에 넣고 커밋될 때까지 기다립니다.
+
+    진행 중인 커밋이 없으면 바로 커밋하고, 커밋 중이면 끝난 뒤 그동안 모인 이메일을
+    (최대 EMAIL_WRITE_BATCH_SIZE개씩) 한 번에 커밋합니다. 이미 저장된 이메일이면 None을 반환합니다.
+    """
+    global _flush_task
+    future = asyncio.get_running_loop().create_future()
+    _buffer.append((email, future))
+
+    if _flush_task is None:
+        _flush_task = asyncio.create_task(_flush_loop())
+
+    return await future
+
+
+def get_writer_stats() -> Dict:
+    """배치 저장 지표를 반환합니다."""
+    stats = dict(_stats)
+    stats["buffered"] = len(_buffer)
+    stats["avg_batch_size"] = (stats["written"] + stats["duplicates"]) / stats["batches"] if stats["batches"] else 0.0
+    stats["avg_commit_ms"] = stats["commit_seconds"] / stats["batches"] * 1000 if stats["batches"] else 0.0
+    return stats
@@ -0,0 +1,78 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+from dotenv import load_dotenv
+import asyncio
+import functools
+import os
+import threading
+import time
+
+load_dotenv()
+
+# 동기 네트워크 호출(googleapiclient .execute(), Gemini generate_content)을 실행할 전용 스레드 풀 크기
+BLOCKING_POOL_SIZE = int(os.getenv("BLOCKING_POOL_SIZE", "16"))
+
+_executor = ThreadPoolExecutor(max_workers=BLOCKING_POOL_SIZE, thread_name_prefix="blocking-io")
+_lock = threading.Lock()
+_stats = {
+    "submitted": 0,
+    "running": 0,
+    "completed": 0,
+    "failed": 0,
+    "max_queued": 0,
+    "total_wait_seconds": 0.0,
+    "total_run_seconds": 0.0,
+}
+
+
+def _run(func: Callable, submitted_at: float):
+    """풀 스레드에서 함수를 실행하며 대기/실행 시간을 기록합니다."""
+    started_at = time.monotonic()
+    with _lock:
+        _stats["running"] += 1
+        _stats["total_wait_seconds"] += started_at - submitted_at
+    try:
+        result = func()
+    except Exception:
+        with _lock:
+            _stats["failed"] += 1
+        raise
+    finally:
+        with _lock:
+            _stats["running"] -= 1
+            _stats["completed"] += 1
+            _stats["total_run_seconds"] += time.monotonic() - started_at
+    return result
+
+
+async def run_blocking(func: Callable, *args, **kwargs):
+    """동기 함수를 전용 스레드 풀에서 실행하여 이벤트 루프를 막지 않도록 합니다."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        _stats["submitted"] += 1
+        queued = _stats["submitted"] - _stats["completed"] - _stats["running"]
+        _stats["max_queued"] = max(_stats["max_queued"], queued)
+    return await loop.run_in_executor(
+        _executor,
+        _run,
+        functools.partial(func, *args, **kwargs),
+        time.monotonic()
+    )
+
+
+async def execute(request):
+    """googleapiclient 요청 객체의 .execute()를 스레드 풀에서 실행합니다."""
+    return await run_blocking(request.execute)
+
+
+def get_pool_stats() -> Dict:
+    """스레드 풀 포화도 지표를 반환합니다."""
+    with _lock:
+        stats = dict(_stats)
+    in_flight = stats["submitted"] - stats["completed"]
+    stats["max_workers"] = BLOCKING_POOL_SIZE
+    stats["queued"] = max(in_flight - stats["running"], 0)
+    stats["saturation"] = stats["running"] / BLOCKING_POOL_SIZE
+    stats["avg_wait_ms"] = (stats["total_wait_seconds"] / stats["completed"] * 1000) if stats["completed"] else 0.0
+    stats["avg_run_ms"] = (stats["total_run_seconds"] / stats["completed"] * 1000) if stats["completed"] else 0.0
+    return stats
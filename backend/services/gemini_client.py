@@ -0,0 +1,307 @@
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Optional
+from dotenv import load_dotenv
+from datetime import date
+from google.api_core.exceptions import TooManyRequests
+import google.generativeai as genai
+import asyncio
+import os
+import random
+import re
+import time
+from services.executor import run_blocking
+from services.text_preprocessor import estimate_tokens
+
+load_dotenv()
+
+# Gemini API 설정
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+if not GEMINI_API_KEY:
+    raise ValueError("GEMINI_API_KEY environment variable is not set")
+
+MODEL_NAME = 'gemini-1.5-flash'
+
+genai.configure(api_key=GEMINI_API_KEY)
+model = genai.GenerativeModel(MODEL_NAME)
+
+# 분당 요청 수(RPM)/토큰 수(TPM) 한도 (기본값은 gemini-1.5-flash 무료 등급)
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", "15"))
+GEMINI_TPM = int(os.getenv("GEMINI_TPM", "1000000"))
+GEMINI_RPD = int(os.getenv("GEMINI_RPD", "1500"))  # 일일 요청 한도 (대시보드 표시용)
+# 요청 전 TPM 차감에 쓰는 응답 토큰 추정치 (응답 후 실제 사용량으로 보정)
+GEMINI_OUTPUT_TOKENS_ESTIMATE = int(os.getenv("GEMINI_OUTPUT_TOKENS_ESTIMATE", "512"))
+# 동시 요청 수 한도 범위 (429가 나면 절반으로 줄이고, 성공할 때마다 조금씩 늘림)
+GEMINI_MIN_CONCURRENCY = int(os.getenv("GEMINI_MIN_CONCURRENCY", "1"))
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+# 429 재시도 횟수와 Retry-After가 없을 때의 지수 백오프 범위(초)
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "3"))
+GEMINI_BACKOFF_BASE_SECONDS = float(os.getenv("GEMINI_BACKOFF_BASE_SECONDS", "2"))
+GEMINI_BACKOFF_MAX_SECONDS = float(os.getenv("GEMINI_BACKOFF_MAX_SECONDS", "60"))
+
+_RETRY_IN = re.compile(r'retry in ([\d.]+)\s*s', re.IGNORECASE)
+_RETRY_DELAY_SECONDS = re.compile(r'retry_delay\s*\{\s*seconds:\s*(\d+)', re.IGNORECASE)
+
+
+class GeminiThrottled(Exception):
+    """재시도 후에도 Gemini 한도(429)에 걸린 경우. retry_after초 뒤에 다시 처리하면 됩니다."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Gemini 요청 한도 초과 ({retry_after:.0f}초 후 재시도)")
+        self.retry_after = retry_after
+
+
+class _TokenBucket:
+    """분당 한도를 초 단위로 채우는 토큰 버킷 (최대 1분치까지 한 번에 사용 가능)"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = float(per_minute)
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_seconds(self, amount: float, now: float) -> float:
+        """amount만큼 사용할 수 있을 때까지 기다려야 하는 시간을 반환합니다."""
+        self._refill(now)
+        amount = min(amount, self.capacity)  # 한도보다 큰 요청은 버킷이 가득 찼을 때 통과
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def take(self, amount: float, now: float):
+        """토큰을 차감합니다. 실제 사용량 보정으로 음수(다음 요청이 더 기다림)가 될 수 있습니다."""
+        self._refill(now)
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+    def available(self, now: float) -> float:
+        self._refill(now)
+        return self.tokens
+
+
+class _Waiter:
+    __slots__ = ("future", "tokens", "enqueued_at")
+
+    def __init__(self, future: asyncio.Future, tokens: int):
+        self.future = future
+        self.tokens = tokens
+        self.enqueued_at = time.monotonic()
+
+
+_request_bucket = _TokenBucket(GEMINI_RPM)
+_token_bucket = _TokenBucket(GEMINI_TPM)
+_queues: "OrderedDict[str, Deque[_Waiter]]" = OrderedDict()  # 사용자별 대기열 (라운드 로빈 순서)
+_concurrency_limit = float(min(max(GEMINI_MIN_CONCURRENCY, 2), GEMINI_MAX_CONCURRENCY))
+_in_flight = 0
+_blocked_until = 0.0  # 429 이후 모든 요청을 멈추는 시각 (time.monotonic())
+_timer: Optional[asyncio.TimerHandle] = None
+_recent = deque()  # 최근 1분간 (시각, 토큰 수)
+_today = {"date": None, "requests": 0, "tokens": 0}
+_stats = {
+    "requests": 0,
+    "dispatched": 0,  # 대기열에서 내보낸 호출 수 (재시도 포함)
+    "succeeded": 0,
+    "failed": 0,
+    "throttled": 0,  # 429 응답 수
+    "retries": 0,
+    "gave_up": 0,  # 재시도 후에도 429라 GeminiThrottled로 넘긴 요청 수
+    "estimated_tokens": 0,
+    "actual_tokens": 0,
+    "total_queue_wait_seconds": 0.0,
+    "max_queue_wait_seconds": 0.0,
+}
+
+
+def _schedule_dispatch(delay: float):
+    """토큰이 다시 찰 때 대기열을 처리하도록 예약합니다."""
+    global _timer
+    if _timer is not None:
+        _timer.cancel()
+    _timer = asyncio.get_running_loop().call_later(delay, _dispatch)
+
+
+def _dispatch():
+    """동시 요청 한도와 RPM/TPM 토큰이 허용하는 만큼 사용자별 대기열에서 번갈아 요청을 내보냅니다."""
+    global _in_flight, _timer
+    if _timer is not None:
+        _timer.cancel()
+        _timer = None
+    now = time.monotonic()
+    while _queues and _in_flight < int(_concurrency_limit):
+        user_id, waiters = next(iter(_queues.items()))
+        waiter = waiters[0]
+        if waiter.future.done():
+            # 대기 중 취소된 요청
+            waiters.popleft()
+            if not waiters:
+                del _queues[user_id]
+            continue
+
+        wait = max(_blocked_until - now,
+                   _request_bucket.wait_seconds(1, now),
+                   _token_bucket.wait_seconds(waiter.tokens, now))
+        if wait > 0:
+            _schedule_dispatch(wait)
+            return
+
+        waiters.popleft()
+        if waiters:
+            _queues.move_to_end(user_id)
+        else:
+            del _queues[user_id]
+
+        _request_bucket.take(1, now)
+        _token_bucket.take(waiter.tokens, now)
+        _in_flight += 1
+
+        queue_wait = now - waiter.enqueued_at
+        _stats["dispatched"] += 1
+        _stats["total_queue_wait_seconds"] += queue_wait
+        _stats["max_queue_wait_seconds"] = max(_stats["max_queue_wait_seconds"], queue_wait)
+        waiter.future.set_result(None)
+
+
+def _reject_waiting(retry_after: float):
+    """대기 중인 요청을 모두 GeminiThrottled로 끝냅니다. (한도 해제까지 오래 걸려 기다리지 않는 경우)"""
+    for waiters in _queues.values():
+        for waiter in waiters:
+            if not waiter.future.done():
+                waiter.future.set_exception(GeminiThrottled(retry_after))
+    _queues.clear()
+
+
+async def _acquire(user_id: Optional[str], tokens: int):
+    """요청 슬롯을 받을 때까지 사용자 대기열에서 기다립니다.
+
+    429로 멈춘 시간이 GEMINI_BACKOFF_MAX_SECONDS보다 길게 남아 있으면 기다리지 않고 GeminiThrottled를 발생시킵니다.
+    """
+    blocked_seconds = _blocked_until - time.monotonic()
+    if blocked_seconds > GEMINI_BACKOFF_MAX_SECONDS:
+        raise GeminiThrottled(blocked_seconds)
+    waiter = _Waiter(asyncio.get_running_loop().create_future(), tokens)
+    _queues.setdefault(user_id or "", deque()).append(waiter)
+    _dispatch()
+    try:
+        await waiter.future
+    except asyncio.CancelledError:
+        # 슬롯을 받은 직후 취소되면 슬롯을 반납
+        if waiter.future.done() and not waiter.future.cancelled():
+            _release(succeeded=False)
+        raise
+
+
+def _release(succeeded: bool, throttled: bool = False):
+    """요청 슬롯을 반납하고 동시 요청 한도를 조정합니다. (성공 시 가산 증가, 429 시 절반으로 감소)"""
+    global _in_flight, _concurrency_limit
+    _in_flight -= 1
+    if throttled:
+        _concurrency_limit = max(float(GEMINI_MIN_CONCURRENCY), _concurrency_limit / 2)
+    elif succeeded:
+        _concurrency_limit = min(float(GEMINI_MAX_CONCURRENCY), _concurrency_limit + 1 / _concurrency_limit)
+    _dispatch()
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """429 응답에 포함된 재시도 대기 시간(RetryInfo 또는 메시지의 'retry in Ns')을 찾습니다."""
+    for detail in getattr(error, 'details', None) or []:
+        delay = getattr(detail, 'retry_delay', None)
+        if delay is not None and getattr(delay, 'seconds', None) is not None:
+            return delay.seconds + getattr(delay, 'nanos', 0) / 1e9
+    message = str(error)
+    match = _RETRY_IN.search(message) or _RETRY_DELAY_SECONDS.search(message)
+    return float(match.group(1)) if match else None
+
+
+def _backoff_seconds(attempt: int) -> float:
+    """Retry-After가 없을 때의 지수 백오프 (지터 포함)"""
+    delay = min(GEMINI_BACKOFF_MAX_SECONDS, GEMINI_BACKOFF_BASE_SECONDS * (2 ** attempt))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _record_usage(estimated: int, response) -> int:
+    """실제 사용 토큰으로 TPM 버킷을 보정하고 사용량을 기록합니다."""
+    usage = getattr(response, 'usage_metadata', None)
+    actual = getattr(usage, 'total_token_count', None) or estimated
+    now = time.monotonic()
+    _token_bucket.take(actual - estimated, now)
+
+    _recent.append((now, actual))
+    today = date.today()
+    if _today["date"] != today:
+        _today.update(date=today, requests=0, tokens=0)
+    _today["requests"] += 1
+    _today["tokens"] += actual
+    _stats["estimated_tokens"] += estimated
+    _stats["actual_tokens"] += actual
+    return actual
+
+
+async def generate_content(prompt: str, user_id: Optional[str] = None):
+    """Gemini generate_content를 요청 한도 안에서 호출합니다.
+
+    RPM/TPM 토큰 버킷과 동시 요청 한도를 넘지 않도록 사용자별 대기열에서 번갈아 기다렸다가 호출합니다.
+    429 응답은 Retry-After(없으면 지수 백오프)만큼 모든 요청을 멈춘 뒤 재시도하고,
+    GEMINI_MAX_RETRIES번 넘게 실패하거나 Retry-After가 GEMINI_BACKOFF_MAX_SECONDS보다 길면
+    GeminiThrottled를 발생시킵니다. (호출한 쪽에서 retry_after 뒤에 다시 처리)
+    """
+    global _blocked_until
+    estimated = estimate_tokens(prompt) + GEMINI_OUTPUT_TOKENS_ESTIMATE
+    _stats["requests"] += 1
+    for attempt in range(GEMINI_MAX_RETRIES + 1):
+        await _acquire(user_id, estimated)
+        try:
+            response = await run_blocking(model.generate_content, prompt)
+        except TooManyRequests as e:
+            delay = _retry_after(e) or _backoff_seconds(attempt)
+            _blocked_until = max(_blocked_until, time.monotonic() + delay)
+            _stats["throttled"] += 1
+            if delay > GEMINI_BACKOFF_MAX_SECONDS:
+                # 일일 한도 등 오래 기다려야 하는 경우 대기 중인 요청도 함께 나중으로 미룸
+                _reject_waiting(delay)
+            _release(succeeded=False, throttled=True)
+            if attempt == GEMINI_MAX_RETRIES or delay > GEMINI_BACKOFF_MAX_SECONDS:
+                _stats["gave_up"] += 1
+                raise GeminiThrottled(delay)
+            _stats["retries"] += 1
+            continue
+        except BaseException:
+            _stats["failed"] += 1
+            _release(succeeded=False)
+            raise
+
+        _release(succeeded=True)
+        _record_usage(estimated, response)
+        _stats["succeeded"] += 1
+        return response
+
+
+def get_quota_stats() -> Dict:
+    """Gemini 사용량/한도 대시보드 지표를 반환합니다."""
+    now = time.monotonic()
+    while _recent and _recent[0][0] < now - 60:
+        _recent.popleft()
+    # 사용자 ID(이메일)는 노출하지 않고 대기 수만 집계
+    waiting = [len(waiters) for waiters in _queues.values() if waiters]
+    requests_today = _today["requests"] if _today["date"] == date.today() else 0
+    stats = dict(_stats)
+    stats.update({
+        "model": MODEL_NAME,
+        "rpm_limit": GEMINI_RPM,
+        "tpm_limit": GEMINI_TPM,
+        "rpd_limit": GEMINI_RPD,
+        "requests_last_minute": len(_recent),
+        "tokens_last_minute": sum(tokens for _, tokens in _recent),
+        "requests_today": requests_today,
+        "rpd_remaining": max(GEMINI_RPD - requests_today, 0),
+        "request_tokens_available": round(_request_bucket.available(now), 2),
+        "tpm_tokens_available": round(_token_bucket.available(now)),
+        "concurrency_limit": round(_concurrency_limit, 2),
+        "in_flight": _in_flight,
+        "queued": sum(waiting),
+        "queued_users": len(waiting),
+        "max_queued_per_user": max(waiting, default=0),
+        "blocked_seconds": round(max(_blocked_until - now, 0.0), 2),
+        "avg_queue_wait_ms": (stats["total_queue_wait_seconds"] / stats["dispatched"] * 1000
+                              if stats["dispatched"] else 0.0),
+    })
+    return stats
@@ -0,0 +1,122 @@
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from dotenv import load_dotenv
+from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build
+from googleapiclient.http import HttpRequest
+import httplib2
+import os
+import threading
+import time
+
+load_dotenv()
+
+# 풀에 보관할 최대 사용자 수와 미사용 클라이언트 만료 시간(초)
+GMAIL_CLIENT_POOL_SIZE = int(os.getenv("GMAIL_CLIENT_POOL_SIZE", "256"))
+GMAIL_CLIENT_IDLE_SECONDS = int(os.getenv("GMAIL_CLIENT_IDLE_SECONDS", "900"))
+GMAIL_HTTP_TIMEOUT_SECONDS = int(os.getenv("GMAIL_HTTP_TIMEOUT_SECONDS", "30"))
+
+GMAIL_SCOPES = [
+    'https://www.googleapis.com/auth/gmail.readonly',
+    'https://www.googleapis.com/auth/gmail.send'
+]
+
+
+class _PooledClient:
+    """사용자 한 명의 Gmail 서비스 객체와 인증 정보
+
+    httplib2.Http는 스레드 안전하지 않으므로 스레드마다 keep-alive 연결을 따로 유지합니다.
+    """
+
+    def __init__(self, credentials: Credentials):
+        self.credentials = credentials
+        self.last_used = time.monotonic()
+        self._local = threading.local()
+        self.service = build(
+            'gmail', 'v1',
+            credentials=credentials,
+            requestBuilder=self._build_request,
+            cache_discovery=False
+        )
+
+    def _http(self) -> AuthorizedHttp:
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = AuthorizedHttp(self.credentials, http=httplib2.Http(timeout=GMAIL_HTTP_TIMEOUT_SECONDS))
+            self._local.http = http
+        return http
+
+    def _build_request(self, http, *args, **kwargs) -> HttpRequest:
+        return HttpRequest(self._http(), *args, **kwargs)
+
+
+_clients: "OrderedDict[str, _PooledClient]" = OrderedDict()
+_lock = threading.Lock()
+_stats = {
+    "hits": 0,
+    "misses": 0,
+    "evictions": 0,
+}
+
+
+def _create_credentials(access_token: Optional[str], refresh_token: Optional[str]) -> Credentials:
+    return Credentials(
+        token=access_token,
+        refresh_token=refresh_token,
+        token_uri="https://oauth2.googleapis.com/token",
+        client_id=os.getenv('GOOGLE_CLIENT_ID'),
+        client_secret=os.getenv('GOOGLE_CLIENT_SECRET'),
+        scopes=GMAIL_SCOPES
+    )
+
+
+def _evict_idle(now: float):
+    """오래 사용되지 않은 클라이언트를 제거합니다. (_lock 안에서 호출)"""
+    while _clients:
+        user_id, client = next(iter(_clients.items()))
+        if now - client.last_used < GMAIL_CLIENT_IDLE_SECONDS:
+            break
+        del _clients[user_id]
+        _stats["evictions"] += 1
+
+
+def get_gmail_client(user_id: str, access_token: Optional[str], refresh_token: Optional[str]) -> Tuple[object, Credentials]:
+    """사용자별로 재사용되는 Gmail 서비스 객체와 인증 정보를 반환합니다.
+
+    같은 refresh token이면 풀에 있는 인증 정보를 그대로 사용합니다. 풀의 인증 정보가 이미
+    갱신되어 유효하다면 호출자가 가진 오래된 access token으로 덮어쓰지 않습니다.
+    """
+    now = time.monotonic()
+    with _lock:
+        _evict_idle(now)
+        client = _clients.get(user_id)
+        if client is not None and client.credentials.refresh_token == refresh_token:
+            if access_token and access_token != client.credentials.token and not client.credentials.valid:
+                client.credentials.token = access_token
+                client.credentials.expiry = None
+            client.last_used = now
+            _clients.move_to_end(user_id)
+            _stats["hits"] += 1
+            return client.service, client.credentials
+        _stats["misses"] += 1
+
+    # 서비스 생성은 락 밖에서 수행
+    client = _PooledClient(_create_credentials(access_token, refresh_token))
+    with _lock:
+        _clients[user_id] = client
+        _clients.move_to_end(user_id)
+        while len(_clients) > GMAIL_CLIENT_POOL_SIZE:
+            _clients.popitem(last=False)
+            _stats["evictions"] += 1
+    return client.service, client.credentials
+
+
+def get_client_pool_stats() -> Dict:
+    """클라이언트 풀 지표를 반환합니다."""
+    with _lock:
+        stats = dict(_stats)
+        stats["size"] = len(_clients)
+    stats["max_size"] = GMAIL_CLIENT_POOL_SIZE
+    stats["idle_seconds"] = GMAIL_CLIENT_IDLE_SECONDS
+    return stats
@@ -6,161 +6,290 @@ import base64
 import os
 import json
 from typing import List, Optional, Dict
-from datetime import datetime
+from datetime import datetime, timezone
 import email
 from email.mime.text import MIMEText
 from dotenv import load_dotenv
-from email.header import decode_header
 import re
+import threading
+from services.executor import execute, run_blocking
+from services.gmail_client_pool import get_gmail_client
+from services.mime_extractor import extract_body, decode_header_value
 
 load_dotenv()
 
 SCOPES = ['https://www.googleapis.com/auth/gmail.readonly']
 
+# 배치 요청 하나에 담을 최대 메시지 수 (Gmail 권장 상한 50, 최대 100)
+GMAIL_BATCH_SIZE = min(int(os.getenv('GMAIL_BATCH_SIZE', '50')), 100)
+METADATA_HEADERS = ['From', 'Subject', 'Date']
+
+# 메시지 조회 단계 (화면에 필요한 만큼만 받도록 가벼운 단계를 사용)
+FETCH_METADATA = 'metadata'  # ID, 스레드, 라벨, 스니펫, 헤더
+FETCH_FULL = 'full'  # + 본문 파트 트리
+
+# full 조회 시 partial response에 포함할 multipart 중첩 깊이 (더 깊은 파트는 응답에서 제외됨)
+GMAIL_FULL_PARTS_DEPTH = int(os.getenv('GMAIL_FULL_PARTS_DEPTH', '6'))
+
+_MESSAGE_FIELDS = 'id,threadId,labelIds,snippet,historyId'
+_PART_FIELDS = 'mimeType,filename,headers(name,value),body(data,attachmentId)'
+
+
+def _parts_mask(depth: int) -> str:
+    """중첩 파트 트리의 fields 마스크를 만듭니다. (partId, body.size 등 본문 추출에 쓰지 않는 필드 제외)"""
+    mask = _PART_FIELDS
+    for _ in range(depth):
+        mask = f"{_PART_FIELDS},parts({mask})"
+    return mask
+
+
+# 단계별 partial response 마스크 (fields=)
+FETCH_FIELDS = {
+    FETCH_METADATA: f"{_MESSAGE_FIELDS},payload/headers(name,value)",
+    FETCH_FULL: f"{_MESSAGE_FIELDS},payload({_parts_mask(GMAIL_FULL_PARTS_DEPTH)})",
+}
+
+_fetch_lock = threading.Lock()
+_fetch_stats = {tier: {"requests": 0, "bytes": 0} for tier in FETCH_FIELDS}
+
+
+def _count_bytes(request, tier: str):
+    """응답 본문 크기(JSON 바이트)를 단계별로 집계하도록 요청 객체의 후처리를 감쌉니다. (배치 요청에도 적용)"""
+    postproc = request.postproc
+
+    def counted(resp, content):
+        with _fetch_lock:
+            _fetch_stats[tier]["requests"] += 1
+            _fetch_stats[tier]["bytes"] += len(content or b'')
+        return postproc(resp, content)
+
+    request.postproc = counted
+    return request
+
+
+def message_request(service, message_id: str, tier: str = FETCH_METADATA,
+                    metadata_headers: Optional[List[str]] = None):
+    """단계별 format과 fields 마스크를 적용한 messages.get 요청 객체를 만듭니다.
+
+    metadata 단계에서 metadata_headers를 주면 해당 헤더만 받습니다. (없으면 모든 헤더)
+    """
+    if tier not in FETCH_FIELDS:
+        raise ValueError(f"알 수 없는 조회 단계입니다: {tier}")
+    params = {'userId': 'me', 'id': message_id, 'format': tier, 'fields': FETCH_FIELDS[tier]}
+    if tier == FETCH_METADATA and metadata_headers:
+        params['metadataHeaders'] = metadata_headers
+    return _count_bytes(service.users().messages().get(**params), tier)
+
+
+def get_fetch_stats() -> Dict:
+    """조회 단계별 요청 수와 응답 바이트를 반환합니다."""
+    with _fetch_lock:
+        stats = {tier: dict(values) for tier, values in _fetch_stats.items()}
+    for values in stats.values():
+        values["avg_bytes"] = values["bytes"] / values["requests"] if values["requests"] else 0.0
+    return stats
+
+def to_utc_naive(value: datetime) -> datetime:
+    """시간대가 있는 시각을 UTC로 바꾸고 시간대 정보를 뺍니다. (DB에는 UTC 기준 naive 시각으로 저장)"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def parse_email_date(date_str: Optional[str]) -> datetime:
+    """Date 헤더를 UTC 기준 naive 시각으로 파싱합니다. 파싱할 수 없으면 현재 UTC 시각을 반환합니다."""
+    if date_str:
+        date_str = re.sub(r'\s+\([A-Z]+\)$', '', date_str.strip())
+        for date_format in ('%a, %d %b %Y %H:%M:%S %z', '%a, %d %b %Y %H:%M:%S'):
+            try:
+                # 시간대가 없는 날짜는 UTC로 간주
+                return to_utc_naive(datetime.strptime(date_str, date_format))
+            except ValueError:
+                continue
+    return datetime.utcnow()
+
+
 class GmailService:
     def __init__(self, user_id: str, access_token: str, refresh_token: str):
         self.user_id = user_id
-        self.credentials = Credentials(
-            token=access_token,
-            refresh_token=refresh_token,
-            token_uri="https://oauth2.googleapis.com/token",
-            client_id=os.getenv('GOOGLE_CLIENT_ID'),
-            client_secret=os.getenv('GOOGLE_CLIENT_SECRET'),
-            scopes=[
-                'https://www.googleapis.com/auth/gmail.readonly',
-                'https://www.googleapis.com/auth/gmail.send'
-            ]
-        )
-        self.service = build('gmail', 'v1', credentials=self.credentials)
-
-    def _decode_email_header(self, header: str) -> str:
-        """이메일 헤더 디코딩"""
-        decoded_header = decode_header(header)
-        header_parts = []
-        for content, charset in decoded_header:
-            if isinstance(content, bytes):
-                if charset:
-                    header_parts.append(content.decode(charset))
-                else:
-                    header_parts.append(content.decode('utf-8', errors='replace'))
-            else:
-                header_parts.append(content)
-        return ''.join(header_parts)
+        # 사용자별로 캐시된 서비스 객체와 인증 정보 재사용
+        self.service, self.credentials = get_gmail_client(user_id, access_token, refresh_token)
 
     def _parse_date(self, date_str: str) -> datetime:
         """이메일 날짜 파싱"""
-        try:
-            date_str = re.sub(r'\s+\([A-Z]+\)$', '', date_str)
-            return datetime.strptime(date_str, '%a, %d %b %Y %H:%M:%S %z')
-        except ValueError:
-            try:
-                return datetime.strptime(date_str, '%a, %d %b %Y %H:%M:%S')
-            except ValueError:
-                return datetime.now()
+        return parse_email_date(date_str)
+
+    def _batch_get_metadata(self, service, message_ids: List[str]) -> Dict[str, dict]:
+        """메시지 메타데이터를 배치 HTTP 요청으로 가져옵니다.
+
+        GMAIL_BATCH_SIZE 단위로 나누어 요청하며, 배치 안에서 실패한 메시지는
+        개별 요청으로 한 번 더 시도합니다.
+        """
+        results = {}
+        failed = []
 
-    async def get_emails(self, max_results: int = 10, page_token: Optional[str] = None) -> Dict:
-        """이메일 목록을 가져옵니다."""
+        def callback(request_id, response, exception):
+            if exception is not None:
+                failed.append(request_id)
+            else:
+                results[request_id] = response
+
+        for start in range(0, len(message_ids), GMAIL_BATCH_SIZE):
+            batch = service.new_batch_http_request(callback=callback)
+            for message_id in message_ids[start:start + GMAIL_BATCH_SIZE]:
+                batch.add(
+                    message_request(service, message_id, FETCH_METADATA, METADATA_HEADERS),
+                    request_id=message_id
+                )
+            batch.execute()
+
+        for message_id in failed:
+            results[message_id] = message_request(service, message_id, FETCH_METADATA, METADATA_HEADERS).execute()
+
+        return results
+
+    async def get_metadata(self, message_ids: List[str]) -> List[Dict]:
+        """메시지 목록의 제목/보낸 사람/날짜/스니펫을 배치 요청(metadata 단계)으로 가져옵니다. (순서 유지)"""
+        metadata = await run_blocking(self._batch_get_metadata, self.service, message_ids)
+
+        emails = []
+        for message_id in message_ids:
+            msg = metadata.get(message_id)
+            if msg is None:
+                continue
+            headers = {h['name'].lower(): h['value'] for h in msg.get('payload', {}).get('headers', [])}
+            emails.append({
+                'id': message_id,
+                'thread_id': msg.get('threadId'),
+                'subject': decode_header_value(headers.get('subject', '')),
+                'sender': decode_header_value(headers.get('from', '')),
+                'date': parse_email_date(headers.get('date')),
+                'snippet': msg.get('snippet', '')
+            })
+        return emails
+
+    async def fetch_message(self, email_id: str, tier: str = FETCH_METADATA,
+                            metadata_headers: Optional[List[str]] = None) -> Dict:
+        """메시지 원본(Gmail API 응답)을 지정한 단계로 가져옵니다.
+
+        metadata는 라벨/스니펫/헤더, full은 본문 파트 트리까지 포함합니다.
+        """
+        return await execute(message_request(self.service, email_id, tier, metadata_headers))
+
+    async def get_email_headers(self, email_id: str) -> Dict:
+        """본문 없이 헤더/라벨/스니펫만 가져옵니다. (metadata 단계)"""
         try:
-            # Gmail API 서비스 초기화
-            service = build('gmail', 'v1', credentials=self.credentials)
-            
-            # 이메일 목록 요청
-            results = service.users().messages().list(
-                userId='me',
-                maxResults=max_results,
-                pageToken=page_token
-            ).execute()
-            
-            messages = results.get('messages', [])
-            next_page_token = results.get('nextPageToken')
-            previous_page_token = results.get('previousPageToken')
-            
-            # 각 이메일의 상세 정보 가져오기
-            emails = []
-            for message in messages:
-                msg = service.users().messages().get(
-                    userId='me',
-                    id=message['id'],
-                    format='metadata',
-                    metadataHeaders=['From', 'Subject', 'Date']
-                ).execute()
-                
-                # 헤더 정보 추출
-                headers = {}
-                if 'payload' in msg and 'headers' in msg['payload']:
-                    for header in msg['payload']['headers']:
-                        headers[header['name']] = header['value']
-                
-                # 날짜 파싱
-                date = datetime.utcnow()
-                if 'Date' in headers:
-                    try:
-                        date = datetime.strptime(headers['Date'], '%a, %d %b %Y %H:%M:%S %z')
-                    except:
-                        pass
-                
-                emails.append({
-                    'id': message['id'],
-                    'subject': headers.get('Subject', ''),
-                    'sender': headers.get('From', ''),
-                    'date': date,
-                    'snippet': msg.get('snippet', '')
-                })
-            
+            msg = await self.fetch_message(email_id, FETCH_METADATA)
             return {
-                'messages': emails,
-                'next_page_token': next_page_token,
-                'previous_page_token': previous_page_token
+                'id': email_id,
+                'thread_id': msg.get('threadId'),
+                'snippet': msg.get('snippet', ''),
+                'label_ids': msg.get('labelIds', []),
+                'headers': {h['name']: h['value'] for h in msg.get('payload', {}).get('headers', [])}
             }
-            
         except Exception as e:
-            raise Exception(f"이메일 목록 조회 실패: {str(e)}")
+            raise Exception(f"Failed to fetch email headers: {str(e)}")
 
-    async def get_email(self, email_id: str) -> Dict:
-        """특정 이메일의 상세 내용을 가져옵니다."""
+    async def get_email(self, email_id: str, max_chars: Optional[int] = None) -> Dict:
+        """특정 이메일의 상세 내용을 가져옵니다.
+
+        max_chars를 주면 본문을 그 길이까지만 추출합니다. (기본값 MIME_MAX_TEXT_CHARS)
+        """
         try:
-            msg = self.service.users().messages().get(
-                userId='me',
-                id=email_id,
-                format='full'
-            ).execute()
+            msg = await self.fetch_message(email_id, FETCH_FULL)
             
             headers = msg['payload']['headers']
-            subject = next((self._decode_email_header(h['value']) for h in headers if h['name'].lower() == 'subject'), '')
-            sender = next((self._decode_email_header(h['value']) for h in headers if h['name'].lower() == 'from'), '')
+            subject = next((decode_header_value(h['value']) for h in headers if h['name'].lower() == 'subject'), '')
+            sender = next((decode_header_value(h['value']) for h in headers if h['name'].lower() == 'from'), '')
             date_str = next((h['value'] for h in headers if h['name'].lower() == 'date'), '')
             date = self._parse_date(date_str)
             
-            # 이메일 본문 가져오기
-            if 'parts' in msg['payload']:
-                parts = msg['payload']['parts']
-                content = ''
-                for part in parts:
-                    if part['mimeType'] == 'text/plain':
-                        data = part['body'].get('data', '')
-                        if data:
-                            content += base64.urlsafe_b64decode(data).decode('utf-8')
-            else:
-                data = msg['payload']['body'].get('data', '')
-                content = base64.urlsafe_b64decode(data).decode('utf-8') if data else ''
+            # 이메일 본문 가져오기 (중첩 multipart, charset 처리)
+            body = extract_body(msg['payload'], max_chars=max_chars)
             
             return {
                 'id': email_id,
+                'thread_id': msg.get('threadId'),
                 'subject': subject,
                 'sender': sender,
                 'date': date,
-                'content': content
+                'content': body['text'],
+                'html_content': body['html'],
+                'snippet': msg.get('snippet', ''),
+                'label_ids': msg.get('labelIds', []),
+                'headers': {h['name']: h['value'] for h in headers}
             }
             
         except Exception as e:
             raise Exception(f"Failed to fetch email: {str(e)}")
 
-    def _get_content_from_parts(self, parts: List[dict]) -> str:
-        content = ""
-        for part in parts:
-            if part['mimeType'] == 'text/plain':
-                content += base64.urlsafe_b64decode(
-                    part['body']['data']).decode()
-            elif 'parts' in part:
-                content += self._get_content_from_parts(part['parts'])
-        return content 
\ No newline at end of file
+    async def get_history_id(self) -> str:
+        """메일함의 현재 historyId를 가져옵니다."""
+        profile = await execute(self.service.users().getProfile(userId='me'))
+        return profile['historyId']
+
+    async def watch(self, topic_name: str) -> Dict:
+        """메일함 변경 알림을 Pub/Sub 토픽으로 받도록 등록합니다."""
+        return await execute(self.service.users().watch(
+            userId='me',
+            body={
+                'topicName': topic_name,
+                'labelIds': ['INBOX'],
+                'labelFilterBehavior': 'include'
+            }
+        ))
+
+    async def list_message_ids(self, max_results: int) -> List[str]:
+        """최신 메시지 ID를 최대 max_results개까지 가져옵니다."""
+        message_ids = []
+        page_token = None
+        while len(message_ids) < max_results:
+            results = await execute(self.service.users().messages().list(
+                userId='me',
+                maxResults=min(max_results - len(message_ids), 500),
+                pageToken=page_token
+            ))
+            message_ids.extend(message['id'] for message in results.get('messages', []))
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                break
+        return message_ids
+
+    async def list_history(self, start_history_id: str) -> Dict:
+        """start_history_id 이후 추가된 메시지 ID, 라벨이 바뀐 메시지, 최신 historyId를 가져옵니다.
+
+        label_changes는 {message_id: 변경 후 라벨 목록}이며 같은 메시지는 마지막 변경만 남깁니다.
+        historyId가 만료된 경우 HttpError(404)가 그대로 전달됩니다.
+        """
+        added_ids = []
+        label_changes = {}
+        seen = set()
+        history_id = start_history_id
+        page_token = None
+        while True:
+            results = await execute(self.service.users().history().list(
+                userId='me',
+                startHistoryId=start_history_id,
+                historyTypes=['messageAdded', 'labelAdded', 'labelRemoved'],
+                pageToken=page_token
+            ))
+            for history in results.get('history', []):
+                for added in history.get('messagesAdded', []):
+                    message = added['message']
+                    if 'DRAFT' in message.get('labelIds', []) or message['id'] in seen:
+                        continue
+                    seen.add(message['id'])
+                    added_ids.append(message['id'])
+                for changed in history.get('labelsAdded', []) + history.get('labelsRemoved', []):
+                    message = changed['message']
+                    label_changes[message['id']] = message.get('labelIds')
+            history_id = results.get('historyId', history_id)
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                break
+        return {
+            'message_ids': added_ids,
+            'label_changes': label_changes,
+            'history_id': history_id
+        }
+ 
\ No newline at end of file
@@ -0,0 +1,92 @@
+from typing import List, Optional
+from dotenv import load_dotenv
+from datetime import datetime
+from googleapiclient.errors import HttpError
+import os
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.email_model import Email
+from models.migrations import claim_ownerless_emails
+from models.sync_state_model import SyncState
+from services.gmail_service import GmailService
+from services import processing_queue
+from services.email_detail_cache import apply_label_changes
+
+load_dotenv()
+
+# historyId가 없거나 만료됐을 때 다시 가져올 최신 메시지 수
+FULL_RESYNC_MAX_MESSAGES = int(os.getenv("FULL_RESYNC_MAX_MESSAGES", "100"))
+
+
+async def _enqueue_unprocessed(message_ids: List[str], gmail_service: GmailService, db: AsyncSession,
+                               notified_at: Optional[float] = None) -> List[str]:
+    """DB에 없는 메시지만 처리 큐에 추가합니다.
+
+    소유자가 없는 기존 이메일 중 Gmail 메시지 ID가 일치하는 것은 이 사용자에게 할당합니다.
+    """
+    if not message_ids:
+        return []
+    await db.run_sync(lambda session: claim_ownerless_emails(session.connection(), gmail_service.user_id, message_ids))
+    processed_ids = set(await db.scalars(
+        select(Email.email_id).where(
+            Email.user_id == gmail_service.user_id,
+            Email.email_id.in_(message_ids)
+        )
+    ))
+    queued = []
+    for message_id in message_ids:
+        if message_id not in processed_ids:
+            await processing_queue.enqueue(message_id, gmail_service, notified_at)
+            queued.append(message_id)
+    return queued
+
+
+async def full_resync(gmail_service: GmailService, db: AsyncSession, state: SyncState) -> List[str]:
+    """최신 메시지 일부를 다시 가져오고 현재 historyId부터 동기화를 재시작합니다."""
+    # 목록 조회 중 도착한 메일을 놓치지 않도록 historyId를 먼저 가져옴
+    history_id = await gmail_service.get_history_id()
+    message_ids = await gmail_service.list_message_ids(FULL_RESYNC_MAX_MESSAGES)
+
+    # 오래된 메일부터 처리
+    queued = await _enqueue_unprocessed(list(reversed(message_ids)), gmail_service, db)
+
+    state.history_id = history_id
+    state.last_full_sync_at = datetime.utcnow()
+    await db.commit()
+    return queued
+
+
+async def sync_mailbox(gmail_service: GmailService, db: AsyncSession, notified_at: Optional[float] = None) -> List[str]:
+    """마지막 historyId 이후 추가된 메시지를 모두 처리 큐에 추가하고 라벨 변경을 반영합니다.
+
+    큐에 추가된 메시지 ID 목록을 반환합니다. notified_at은 푸시 알림으로 시작된 동기화의
+    알림 수신 시각입니다.
+    """
+    try:
+        state = await db.get(SyncState, gmail_service.user_id)
+        if state is None:
+            state = SyncState(user_id=gmail_service.user_id)
+            db.add(state)
+
+        if not state.history_id:
+            return await full_resync(gmail_service, db, state)
+
+        try:
+            delta = await gmail_service.list_history(state.history_id)
+        except HttpError as e:
+            # historyId가 만료된 경우(404) 제한된 전체 재동기화
+            if e.resp.status == 404:
+                return await full_resync(gmail_service, db, state)
+            raise
+
+        queued = await _enqueue_unprocessed(delta['message_ids'], gmail_service, db, notified_at)
+        # 라벨 변경은 저장된 이메일에 바로 반영 (상세 조회 시 Gmail을 다시 조회하지 않도록)
+        await db.run_sync(apply_label_changes, gmail_service.user_id, delta['label_changes'])
+
+        state.history_id = delta['history_id']
+        await db.commit()
+        return queued
+
+    except Exception as e:
+        await db.rollback()
+        raise Exception(f"메일함 동기화 실패: {str(e)}")
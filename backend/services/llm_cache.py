@@ -0,0 +1,203 @@
+from typing import Dict, Optional
+from dotenv import load_dotenv
+from datetime import datetime, timedelta
+from email.utils import parseaddr
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+from sqlalchemy import or_
+from models.email_model import SessionLocal, init_db
+from models.llm_cache_model import LlmCacheEntry
+
+load_dotenv()
+
+# 캐시 만료 시간(초)과 최대 항목 수
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+
+_SUBJECT_PREFIX = re.compile(r'^\s*((re|fw|fwd|답장|전달)\s*(\[\d+\])?\s*:\s*)+', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+_lock = threading.Lock()
+_stats = {
+    "hits": 0,
+    "misses": 0,
+    "stores": 0,
+    "evictions": 0,
+}
+
+
+def _count(name: str, amount: int = 1):
+    with _lock:
+        _stats[name] += amount
+
+
+def normalize_subject(subject: str) -> str:
+    """Re:/Fwd: 접두어와 공백 차이를 제거한 제목을 반환합니다."""
+    subject = _SUBJECT_PREFIX.sub('', subject or '')
+    return _WHITESPACE.sub(' ', subject).strip().lower()
+
+
+def sender_domain(sender: str) -> str:
+    """발신자 주소의 도메인을 반환합니다."""
+    address = parseaddr(sender or '')[1]
+    return address.rsplit('@', 1)[-1].lower() if '@' in address else address.lower()
+
+
+def normalize_body(content: str) -> str:
+    """공백 차이를 제거한 본문을 반환합니다."""
+    return _WHITESPACE.sub(' ', content or '').strip().lower()
+
+
+def make_cache_key(subject: str, sender: str, content: str, prompt_version: str, model_name: str) -> str:
+    """정규화된 제목, 발신자 도메인, 본문과 프롬프트 버전, 모델명으로 캐시 키를 만듭니다."""
+    digest = hashlib.sha256()
+    for part in (prompt_version, model_name, normalize_subject(subject),
+                 sender_domain(sender), normalize_body(content)):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+def get_cached(cache_key: str) -> Optional[Dict]:
+    """캐시된 분석 결과를 조회합니다. 만료된 항목은 삭제하고 None을 반환합니다."""
+    db = SessionLocal()
+    try:
+        entry = db.get(LlmCacheEntry, cache_key)
+        if entry is None:
+            _count("misses")
+            return None
+
+        now = datetime.utcnow()
+        if entry.created_at < now - timedelta(seconds=LLM_CACHE_TTL_SECONDS):
+            db.delete(entry)
+            db.commit()
+            _count("misses")
+            _count("evictions")
+            return None
+
+        entry.hit_count = (entry.hit_count or 0) + 1
+        entry.last_accessed_at = now
+        db.commit()
+        _count("hits")
+        return json.loads(entry.result)
+    finally:
+        db.close()
+
+
+def set_cached(cache_key: str, result: Dict, prompt_version: str, model_name: str):
+    """분석 결과를 캐시에 저장하고 크기 제한을 넘으면 오래된 항목을 제거합니다."""
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        db.merge(LlmCacheEntry(
+            cache_key=cache_key,
+            prompt_version=prompt_version,
+            model_name=model_name,
+            result=json.dumps(result, ensure_ascii=False),
+            hit_count=0,
+            created_at=now,
+            last_accessed_at=now
+        ))
+        db.commit()
+        _count("stores")
+
+        # 최대 항목 수 초과 시 가장 오래 사용되지 않은 항목부터 제거
+        overflow = db.query(LlmCacheEntry).count() - LLM_CACHE_MAX_ENTRIES
+        if overflow > 0:
+            stale_keys = [
+                key for (key,) in db.query(LlmCacheEntry.cache_key)
+                .order_by(LlmCacheEntry.last_accessed_at.asc())
+                .limit(overflow)
+            ]
+            db.query(LlmCacheEntry).filter(
+                LlmCacheEntry.cache_key.in_(stale_keys)
+            ).delete(synchronize_session=False)
+            db.commit()
+            _count("evictions", len(stale_keys))
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def purge_expired() -> int:
+    """TTL이 지난 항목을 모두 삭제합니다."""
+    db = SessionLocal()
+    try:
+        cutoff = datetime.utcnow() - timedelta(seconds=LLM_CACHE_TTL_SECONDS)
+        deleted = db.query(LlmCacheEntry).filter(
+            LlmCacheEntry.created_at < cutoff
+        ).delete(synchronize_session=False)
+        db.commit()
+        _count("evictions", deleted)
+        return deleted
+    finally:
+        db.close()
+
+
+def invalidate(prompt_version: Optional[str] = None, model_name: Optional[str] = None) -> int:
+    """캐시를 무효화합니다.
+
+    prompt_version/model_name이 주어지면 해당 버전과 모델이 아닌 항목만 삭제하고,
+    둘 다 없으면 전체를 삭제합니다.
+    """
+    db = SessionLocal()
+    try:
+        query = db.query(LlmCacheEntry)
+        conditions = []
+        if prompt_version is not None:
+            conditions.append(LlmCacheEntry.prompt_version != prompt_version)
+        if model_name is not None:
+            conditions.append(LlmCacheEntry.model_name != model_name)
+        if conditions:
+            query = query.filter(or_(*conditions))
+        deleted = query.delete(synchronize_session=False)
+        db.commit()
+        _count("evictions", deleted)
+        return deleted
+    finally:
+        db.close()
+
+
+def get_cache_stats() -> Dict:
+    """캐시 적중/미스 지표를 반환합니다."""
+    with _lock:
+        stats = dict(_stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    db = SessionLocal()
+    try:
+        stats["entries"] = db.query(LlmCacheEntry).count()
+    finally:
+        db.close()
+    stats["max_entries"] = LLM_CACHE_MAX_ENTRIES
+    stats["ttl_seconds"] = LLM_CACHE_TTL_SECONDS
+    return stats
+
+
+if __name__ == "__main__":
+    # 프롬프트 템플릿 변경 시 캐시 무효화: python -m services.llm_cache invalidate
+    parser = argparse.ArgumentParser(description="Gemini 분석 결과 캐시 관리")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    invalidate_parser = subparsers.add_parser("invalidate", help="현재 프롬프트 버전/모델이 아닌 항목 삭제")
+    invalidate_parser.add_argument("--all", action="store_true", help="모든 항목 삭제")
+    subparsers.add_parser("purge", help="만료된 항목 삭제")
+    subparsers.add_parser("stats", help="캐시 상태 출력")
+    args = parser.parse_args()
+
+    init_db()
+    if args.command == "invalidate":
+        if args.all:
+            print(f"삭제된 항목: {invalidate()}")
+        else:
+            from services.email_analyzer import ANALYSIS_PROMPT_VERSION, MODEL_NAME
+            print(f"삭제된 항목: {invalidate(ANALYSIS_PROMPT_VERSION, MODEL_NAME)}")
+    elif args.command == "purge":
+        print(f"삭제된 항목: {purge_expired()}")
+    elif args.command == "stats":
+        print(json.dumps(get_cache_stats(), indent=2))
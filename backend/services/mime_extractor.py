@@ -0,0 +1,186 @@
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from email.header import decode_header
+import base64
+import codecs
+import html
+import os
+import re
+import threading
+
+load_dotenv()
+
+# 한 메시지에서 추출할 본문 최대 길이 (초대형 메일의 메모리 사용 제한)
+MIME_MAX_TEXT_CHARS = int(os.getenv("MIME_MAX_TEXT_CHARS", "200000"))
+
+# 디코딩 단위 (base64 4글자 = 3바이트이므로 4의 배수)
+_CHUNK_CHARS = 64 * 1024
+
+_CHARSET = re.compile(r'charset\s*=\s*"?([^";\s]+)"?', re.IGNORECASE)
+_SCRIPT_STYLE = re.compile(r'<(script|style|head)\b[^>]*>.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+_BLOCK_TAG = re.compile(r'<\s*(br|/p|/div|/tr|/li|/h[1-6])\b[^>]*>', re.IGNORECASE)
+_TAG = re.compile(r'<[^>]+>')
+_BLANK_LINES = re.compile(r'\n\s*\n+')
+
+_lock = threading.Lock()
+_stats = {
+    "messages": 0,
+    "parts_visited": 0,
+    "bytes_decoded": 0,
+    "truncated": 0,
+    "charset_fallbacks": 0,
+}
+
+
+def _headers(part: Dict) -> Dict[str, str]:
+    return {h['name'].lower(): h['value'] for h in part.get('headers', [])}
+
+
+def _charset(headers: Dict[str, str]) -> str:
+    """Content-Type의 charset을 찾고, 알 수 없는 charset이면 UTF-8을 사용합니다."""
+    match = _CHARSET.search(headers.get('content-type', ''))
+    charset = match.group(1).lower() if match else 'utf-8'
+    try:
+        codecs.lookup(charset)
+        return charset
+    except LookupError:
+        with _lock:
+            _stats["charset_fallbacks"] += 1
+        return 'utf-8'
+
+
+def _is_attachment(part: Dict, headers: Dict[str, str]) -> bool:
+    if part.get('filename') or part.get('body', {}).get('attachmentId'):
+        return True
+    return headers.get('content-disposition', '').lower().startswith('attachment')
+
+
+def _decode_data(data: str, charset: str, max_chars: int) -> Tuple[str, bool]:
+    """base64url 본문을 조각 단위로 디코딩하다가 max_chars를 채우면 멈춥니다.
+
+    본문 전체를 bytes와 str로 한꺼번에 복사하지 않고, 멀티바이트 문자가 조각 경계에서 잘리지 않도록
+    증분 디코더를 사용합니다. (텍스트, 잘렸는지 여부)를 반환합니다.
+    """
+    decoder = codecs.getincrementaldecoder(charset)(errors='replace')
+    chunks: List[str] = []
+    length = 0
+    decoded_bytes = 0
+    for start in range(0, len(data), _CHUNK_CHARS):
+        chunk = data[start:start + _CHUNK_CHARS]
+        raw = base64.urlsafe_b64decode(chunk + '=' * (-len(chunk) % 4))
+        decoded_bytes += len(raw)
+        text = decoder.decode(raw, final=start + _CHUNK_CHARS >= len(data))
+        if length + len(text) >= max_chars:
+            chunks.append(text[:max_chars - length])
+            with _lock:
+                _stats["bytes_decoded"] += decoded_bytes
+            return ''.join(chunks), True
+        chunks.append(text)
+        length += len(text)
+    with _lock:
+        _stats["bytes_decoded"] += decoded_bytes
+    return ''.join(chunks), False
+
+
+def html_to_text(value: str) -> str:
+    """HTML 본문에서 태그를 제거해 텍스트만 남깁니다. (text/plain 파트가 없는 메일용)"""
+    value = _SCRIPT_STYLE.sub('', value)
+    value = _BLOCK_TAG.sub('\n', value)
+    value = html.unescape(_TAG.sub('', value))
+    return _BLANK_LINES.sub('\n\n', value).strip()
+
+
+def extract_body(payload: Dict, max_chars: Optional[int] = None, include_html: bool = True) -> Dict:
+    """Gmail API 메시지 payload(format=full)에서 본문을 추출합니다.
+
+    중첩된 multipart(alternative/mixed/related, 첨부된 message/rfc822 포함)를 순서대로 탐색하고
+    파트별 charset으로 디코딩합니다. 첨부파일은 건너뜁니다. text/plain이 max_chars를 채우면
+    나머지 파트는 읽지 않습니다. text/plain이 없으면 HTML에서 텍스트를 만듭니다.
+
+    {"text": 평문 본문, "html": HTML 본문(include_html=False이면 None), "truncated": 잘렸는지 여부}를 반환합니다.
+    """
+    max_chars = max_chars or MIME_MAX_TEXT_CHARS
+    text_parts: List[str] = []
+    html_parts: List[str] = []
+    text_length = 0
+    html_length = 0
+    truncated = False
+    visited = 0
+
+    # 깊이 우선으로 문서 순서대로 탐색
+    stack = [payload]
+    while stack and text_length < max_chars:
+        part = stack.pop()
+        visited += 1
+        headers = _headers(part)
+        mime_type = part.get('mimeType', '').lower()
+
+        if part.get('parts'):
+            stack.extend(reversed(part['parts']))
+            continue
+        if _is_attachment(part, headers):
+            continue
+
+        data = part.get('body', {}).get('data')
+        if not data:
+            continue
+
+        if mime_type == 'text/plain':
+            text, cut = _decode_data(data, _charset(headers), max_chars - text_length)
+            text_parts.append(text)
+            text_length += len(text)
+            truncated = truncated or cut
+        elif mime_type == 'text/html' and (include_html or not text_parts) and html_length < max_chars:
+            # HTML은 표시용 또는 text/plain이 없을 때의 대체 본문으로만 사용
+            value, cut = _decode_data(data, _charset(headers), max_chars - html_length)
+            html_parts.append(value)
+            html_length += len(value)
+            truncated = truncated or cut
+
+    if stack:
+        truncated = True
+
+    html_body = '\n'.join(html_parts) if html_parts else None
+    if text_parts:
+        text_body = '\n'.join(text_parts)
+    else:
+        text_body = html_to_text(html_body)[:max_chars] if html_body else ''
+
+    with _lock:
+        _stats["messages"] += 1
+        _stats["parts_visited"] += visited
+        if truncated:
+            _stats["truncated"] += 1
+
+    return {
+        "text": text_body,
+        "html": html_body if include_html else None,
+        "truncated": truncated
+    }
+
+
+def decode_header_value(value: str) -> str:
+    """RFC 2047 인코딩 헤더(=?charset?B?...?=)를 디코딩합니다. 알 수 없는 charset은 UTF-8로 대체합니다."""
+    parts = []
+    for content, charset in decode_header(value):
+        if isinstance(content, bytes):
+            try:
+                parts.append(content.decode(charset or 'utf-8', errors='replace'))
+            except LookupError:
+                parts.append(content.decode('utf-8', errors='replace'))
+        else:
+            parts.append(content)
+    return ''.join(parts)
+
+
+def get_headers(payload: Dict) -> Dict[str, str]:
+    """최상위 헤더를 {이름: 값}으로 반환합니다."""
+    return {h['name']: h['value'] for h in payload.get('headers', [])}
+
+
+def get_mime_stats() -> Dict:
+    """본문 추출 지표를 반환합니다."""
+    with _lock:
+        stats = dict(_stats)
+    stats["avg_parts_per_message"] = stats["parts_visited"] / stats["messages"] if stats["messages"] else 0.0
+    return stats
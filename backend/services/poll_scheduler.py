@@ -0,0 +1,213 @@
+from typing import Dict, Optional, Set
+from dotenv import load_dotenv
+from datetime import datetime, timedelta
+from googleapiclient.errors import HttpError
+import asyncio
+import os
+import random
+from sqlalchemy import func, select
+from models.database import AsyncSessionLocal
+from models.user_model import User
+from services.gmail_service import GmailService
+from services.history_sync import sync_mailbox
+from services.push_service import ensure_watch, has_active_watch, PUSH_FALLBACK_POLL_INTERVAL_SECONDS
+
+load_dotenv()
+
+# 기본 폴링 주기, 주기 흔들기 비율, 동시 폴링 수 상한
+POLL_INTERVAL_SECONDS = int(os.getenv("POLL_INTERVAL_SECONDS", "300"))
+POLL_JITTER_RATIO = float(os.getenv("POLL_JITTER_RATIO", "0.1"))
+POLL_MAX_CONCURRENCY = int(os.getenv("POLL_MAX_CONCURRENCY", "20"))
+# 스케줄러가 폴링 대상을 확인하는 간격과 한 번에 가져올 최대 사용자 수
+POLL_TICK_SECONDS = float(os.getenv("POLL_TICK_SECONDS", "5"))
+POLL_BATCH_LIMIT = int(os.getenv("POLL_BATCH_LIMIT", "500"))
+# 할당량 오류 시 최대 대기 시간
+POLL_MAX_BACKOFF_SECONDS = int(os.getenv("POLL_MAX_BACKOFF_SECONDS", "3600"))
+
+QUOTA_ERROR_REASONS = {"rateLimitExceeded", "userRateLimitExceeded", "quotaExceeded", "dailyLimitExceeded"}
+
+_scheduler_task: Optional[asyncio.Task] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+_in_flight: Set[str] = set()
+_poll_tasks: Set[asyncio.Task] = set()  # 실행 중인 폴링 태스크 (가비지 컬렉션으로 사라지지 않도록 참조 유지)
+_repoll: Dict[str, float] = {}  # 폴링 중에 푸시 알림이 온 사용자 (알림 수신 시각)
+_stats = {
+    "polls": 0,
+    "failures": 0,
+    "quota_errors": 0,
+}
+
+
+def _jittered(seconds: float) -> float:
+    """주기에 ±POLL_JITTER_RATIO 만큼 무작위 흔들림을 더합니다."""
+    return seconds * random.uniform(1 - POLL_JITTER_RATIO, 1 + POLL_JITTER_RATIO)
+
+
+def _is_quota_error(error: Exception) -> bool:
+    """Gmail 할당량/속도 제한 오류인지 확인합니다."""
+    if not isinstance(error, HttpError):
+        return False
+    if error.resp.status == 429:
+        return True
+    if error.resp.status == 403:
+        reasons = {detail.get('reason') for detail in (error.error_details or []) if isinstance(detail, dict)}
+        return bool(reasons & QUOTA_ERROR_REASONS)
+    return False
+
+
+async def _poll_user(user_id: str, notified_at: Optional[float] = None):
+    """사용자 한 명의 메일함을 동기화하고 다음 폴링 시간을 정합니다."""
+    async with _semaphore:
+        db = AsyncSessionLocal()
+        try:
+            user = await db.get(User, user_id)
+            if user is None or not user.is_active:
+                return
+            interval = user.poll_interval_seconds or POLL_INTERVAL_SECONDS
+
+            try:
+                gmail_service = GmailService(
+                    user_id=user.user_id,
+                    access_token=user.access_token,
+                    refresh_token=user.refresh_token
+                )
+                await sync_mailbox(gmail_service, db, notified_at)
+
+                # 푸시 알림 watch 등록/갱신 (실패해도 폴링은 계속)
+                try:
+                    await ensure_watch(gmail_service, db)
+                except Exception as e:
+                    await db.rollback()
+                    await db.refresh(user)
+                    print(f"Gmail watch 등록 실패 ({user_id}): {str(e)}")
+                if await has_active_watch(db, user_id):
+                    interval = max(interval, PUSH_FALLBACK_POLL_INTERVAL_SECONDS)
+
+                # 자동 갱신된 액세스 토큰 저장
+                if gmail_service.credentials.token and gmail_service.credentials.token != user.access_token:
+                    user.access_token = gmail_service.credentials.token
+
+                user.consecutive_failures = 0
+                user.last_error = None
+                user.next_poll_at = datetime.utcnow() + timedelta(seconds=_jittered(interval))
+            except Exception as e:
+                # 롤백으로 만료된 사용자 행을 다시 읽은 뒤 실패 기록
+                await db.rollback()
+                await db.refresh(user)
+                cause = e.__cause__ or e.__context__ or e
+                user.consecutive_failures = (user.consecutive_failures or 0) + 1
+                user.last_error = str(e)
+                _stats["failures"] += 1
+                if _is_quota_error(cause):
+                    _stats["quota_errors"] += 1
+                # 실패가 반복될수록 지수적으로 대기
+                backoff = min(interval * (2 ** user.consecutive_failures), POLL_MAX_BACKOFF_SECONDS)
+                user.next_poll_at = datetime.utcnow() + timedelta(seconds=_jittered(backoff))
+                print(f"이메일 폴링 실패 ({user_id}): {str(e)}")
+
+            user.last_polled_at = datetime.utcnow()
+            _stats["polls"] += 1
+            await db.commit()
+        finally:
+            await db.close()
+            _in_flight.discard(user_id)
+
+    # 폴링 중에 도착한 푸시 알림 처리
+    if user_id in _repoll:
+        trigger_poll(user_id, _repoll.pop(user_id))
+
+
+def trigger_poll(user_id: str, notified_at: Optional[float] = None):
+    """예정 시간과 관계없이 사용자의 메일함을 바로 동기화합니다. (푸시 알림용)"""
+    if _semaphore is None:
+        return
+    if user_id in _in_flight:
+        _repoll.setdefault(user_id, notified_at)
+        return
+    _in_flight.add(user_id)
+    _start_poll(user_id, notified_at)
+
+
+def _start_poll(user_id: str, notified_at: Optional[float] = None):
+    """폴링 태스크를 시작하고 끝날 때까지 참조를 유지합니다."""
+    task = asyncio.create_task(_poll_user(user_id, notified_at))
+    _poll_tasks.add(task)
+    task.add_done_callback(_poll_tasks.discard)
+
+
+async def _restagger_overdue():
+    """서버 재시작 후 밀린 폴링이 한꺼번에 실행되지 않도록 주기 안에 다시 분산합니다."""
+    async with AsyncSessionLocal() as db:
+        now = datetime.utcnow()
+        overdue = await db.scalars(select(User).where(
+            User.is_active == True,
+            (User.next_poll_at == None) | (User.next_poll_at < now)
+        ))
+        for user in overdue:
+            interval = user.poll_interval_seconds or POLL_INTERVAL_SECONDS
+            user.next_poll_at = now + timedelta(seconds=random.uniform(0, interval))
+        await db.commit()
+
+
+async def _run_scheduler():
+    """폴링 시간이 된 사용자를 찾아 동시 실행 수 제한 안에서 폴링합니다."""
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                due_user_ids = list(await db.scalars(
+                    select(User.user_id).where(
+                        User.is_active == True,
+                        User.next_poll_at <= datetime.utcnow()
+                    ).order_by(User.next_poll_at.asc()).limit(POLL_BATCH_LIMIT)
+                ))
+        except Exception as e:
+            print(f"폴링 대상 조회 실패: {str(e)}")
+            due_user_ids = []
+
+        for user_id in due_user_ids:
+            if user_id in _in_flight:
+                continue
+            _in_flight.add(user_id)
+            _start_poll(user_id)
+
+        await asyncio.sleep(POLL_TICK_SECONDS)
+
+
+async def start_scheduler():
+    """폴링 스케줄러를 시작합니다."""
+    global _scheduler_task, _semaphore
+    if _scheduler_task is not None:
+        return
+    _semaphore = asyncio.Semaphore(POLL_MAX_CONCURRENCY)
+    await _restagger_overdue()
+    _scheduler_task = asyncio.create_task(_run_scheduler())
+
+
+async def stop_scheduler():
+    """폴링 스케줄러를 종료합니다."""
+    global _scheduler_task
+    if _scheduler_task is None:
+        return
+    _scheduler_task.cancel()
+    for task in list(_poll_tasks):
+        task.cancel()
+    await asyncio.gather(_scheduler_task, *_poll_tasks, return_exceptions=True)
+    _scheduler_task = None
+
+
+async def get_scheduler_stats() -> Dict:
+    """폴링 스케줄러 지표를 반환합니다."""
+    async with AsyncSessionLocal() as db:
+        now = datetime.utcnow()
+        active = select(func.count()).select_from(User).where(User.is_active == True)
+        registered = await db.scalar(active)
+        due = await db.scalar(active.where(User.next_poll_at <= now))
+        backing_off = await db.scalar(active.where(User.consecutive_failures > 0))
+    return {
+        "registered_users": registered,
+        "due_users": due,
+        "backing_off_users": backing_off,
+        "in_flight": len(_in_flight),
+        "max_concurrency": POLL_MAX_CONCURRENCY,
+        **_stats,
+    }
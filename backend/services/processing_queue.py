@@ -0,0 +1,233 @@
+from typing import Dict, List, Optional, Set, Tuple
+from dotenv import load_dotenv
+import asyncio
+import os
+import time
+from models.database import AsyncSessionLocal
+from services.gmail_service import GmailService
+from services.email_processor import process_emails
+from services.gemini_client import GeminiThrottled
+
+load_dotenv()
+
+# 이메일 분류/요약을 처리할 워커 수
+PROCESSING_WORKERS = int(os.getenv("PROCESSING_WORKERS", "2"))
+# 워커가 한 번에 꺼내 함께 처리(배치 분류)할 최대 이메일 수
+PROCESSING_BATCH_SIZE = int(os.getenv("PROCESSING_BATCH_SIZE", "10"))
+# 처리 실패(일시적인 Gmail/Gemini 오류) 시 재시도 횟수와 대기 시간 (지수적으로 증가)
+PROCESSING_MAX_RETRIES = int(os.getenv("PROCESSING_MAX_RETRIES", "5"))
+PROCESSING_RETRY_BASE_SECONDS = float(os.getenv("PROCESSING_RETRY_BASE_SECONDS", "30"))
+PROCESSING_RETRY_MAX_SECONDS = float(os.getenv("PROCESSING_RETRY_MAX_SECONDS", "3600"))
+
+class ProcessingStatus:
+    PENDING = "PENDING"  # 큐에서 대기 중
+    PROCESSING = "PROCESSING"  # 워커가 처리 중
+    DEFERRED = "DEFERRED"  # Gemini 요청 한도 초과 또는 일시적 오류로 나중에 다시 처리 예정
+    DONE = "DONE"  # 처리 완료 (DB 저장됨)
+    FAILED = "FAILED"  # PROCESSING_MAX_RETRIES번 재시도해도 실패
+
+_queue: Optional[asyncio.Queue] = None
+_workers: List[asyncio.Task] = []
+_statuses: Dict[str, str] = {}  # 처리 완료 전 이메일 ID별 상태
+_subscribers: Dict[str, Set[asyncio.Queue]] = {}  # 사용자별 이벤트 구독 큐
+_notified_at: Dict[str, float] = {}  # 푸시 알림으로 들어온 이메일의 알림 수신 시각
+_attempts: Dict[str, int] = {}  # 이메일 ID별 실패 횟수
+_owners: Dict[str, str] = {}  # 처리 완료 전(실패 포함) 이메일 ID별 사용자 (추가된 순서)
+_stats = {
+    "enqueued": 0,
+    "processed": 0,
+    "failed": 0,
+    "retried": 0,
+    "deferred": 0,
+    "batches": 0,
+    "notified_processed": 0,
+    "notified_latency_seconds": 0.0,
+    "max_notified_latency_seconds": 0.0,
+}
+
+
+def _notify(user_id: str, email_id: str, status: str):
+    """완료/실패 이벤트를 해당 사용자의 구독자에게만 전달합니다."""
+    event = {"id": email_id, "status": status, "user_id": user_id}
+    for subscriber in list(_subscribers.get(user_id, ())):
+        subscriber.put_nowait(event)
+
+
+async def _worker():
+    """큐에서 이메일 ID를 최대 PROCESSING_BATCH_SIZE개씩 꺼내 사용자별로 함께 처리합니다."""
+    while True:
+        items = [await _queue.get()]
+        while len(items) < PROCESSING_BATCH_SIZE and not _queue.empty():
+            items.append(_queue.get_nowait())
+        try:
+            groups: Dict[str, List[Tuple[str, GmailService]]] = {}
+            for email_id, gmail_service in items:
+                groups.setdefault(gmail_service.user_id, []).append((email_id, gmail_service))
+            for group in groups.values():
+                await _process_group(group)
+        finally:
+            for _ in items:
+                _queue.task_done()
+
+
+async def _process_group(items: List[Tuple[str, GmailService]]):
+    """한 사용자의 이메일들을 처리하고 이메일별 결과를 반영합니다."""
+    email_ids = [email_id for email_id, _ in items]
+    for email_id in email_ids:
+        _statuses[email_id] = ProcessingStatus.PROCESSING
+    _stats["batches"] += 1
+    db = AsyncSessionLocal()
+    try:
+        results = await process_emails(email_ids, items[0][1], db)
+    except Exception as e:
+        results = {email_id: e for email_id in email_ids}
+    finally:
+        await db.close()
+
+    for email_id, gmail_service in items:
+        _finish(email_id, gmail_service, results.get(email_id))
+
+
+def _finish(email_id: str, gmail_service: GmailService, result):
+    """처리 결과(저장된 이메일 또는 예외)에 따라 완료/연기/재시도/실패로 상태를 바꿉니다."""
+    if isinstance(result, GeminiThrottled):
+        # 실패로 처리하지 않고 한도가 풀린 뒤 다시 큐에 추가
+        print(f"이메일 처리 연기 ({email_id}): {str(result)}")
+        _statuses[email_id] = ProcessingStatus.DEFERRED
+        _stats["deferred"] += 1
+        asyncio.get_running_loop().call_later(result.retry_after, _requeue, email_id, gmail_service)
+    elif isinstance(result, Exception):
+        attempts = _attempts.get(email_id, 0) + 1
+        if attempts <= PROCESSING_MAX_RETRIES:
+            # 일시적인 오류일 수 있으므로 지수적으로 대기한 뒤 다시 큐에 추가
+            delay = min(PROCESSING_RETRY_BASE_SECONDS * 2 ** (attempts - 1), PROCESSING_RETRY_MAX_SECONDS)
+            print(f"이메일 처리 실패, {delay:.0f}초 후 재시도 ({email_id}, {attempts}/{PROCESSING_MAX_RETRIES}): {str(result)}")
+            _attempts[email_id] = attempts
+            _statuses[email_id] = ProcessingStatus.DEFERRED
+            _stats["retried"] += 1
+            asyncio.get_running_loop().call_later(delay, _requeue, email_id, gmail_service)
+        else:
+            print(f"이메일 처리 실패 ({email_id}): {str(result)}")
+            _attempts.pop(email_id, None)
+            _statuses[email_id] = ProcessingStatus.FAILED
+            _notified_at.pop(email_id, None)
+            _stats["failed"] += 1
+            _notify(gmail_service.user_id, email_id, ProcessingStatus.FAILED)
+    else:
+        _statuses.pop(email_id, None)
+        _attempts.pop(email_id, None)
+        _owners.pop(email_id, None)
+        _stats["processed"] += 1
+
+        # 알림 수신부터 분류 완료까지의 지연 시간 기록
+        notified_at = _notified_at.pop(email_id, None)
+        if notified_at is not None:
+            latency = time.monotonic() - notified_at
+            _stats["notified_processed"] += 1
+            _stats["notified_latency_seconds"] += latency
+            _stats["max_notified_latency_seconds"] = max(_stats["max_notified_latency_seconds"], latency)
+        _notify(gmail_service.user_id, email_id, ProcessingStatus.DONE)
+
+
+def _requeue(email_id: str, gmail_service: GmailService):
+    """연기된 이메일을 다시 큐에 추가합니다."""
+    if _queue is None or _statuses.get(email_id) != ProcessingStatus.DEFERRED:
+        return
+    _statuses[email_id] = ProcessingStatus.PENDING
+    _queue.put_nowait((email_id, gmail_service))
+
+
+async def start_workers():
+    """처리 워커를 시작합니다."""
+    global _queue
+    if _queue is None:
+        _queue = asyncio.Queue()
+    while len(_workers) < PROCESSING_WORKERS:
+        _workers.append(asyncio.create_task(_worker()))
+
+
+async def stop_workers():
+    """처리 워커를 종료합니다."""
+    for worker in _workers:
+        worker.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+
+
+async def enqueue(email_id: str, gmail_service: GmailService, notified_at: Optional[float] = None) -> str:
+    """처리되지 않은 이메일을 큐에 추가하고 현재 상태를 반환합니다.
+
+    notified_at은 푸시 알림 수신 시각(time.monotonic())으로, 처리 완료까지의 지연 시간 측정에 사용합니다.
+    """
+    if _queue is None:
+        await start_workers()
+
+    status = _statuses.get(email_id)
+    if status in (ProcessingStatus.PENDING, ProcessingStatus.PROCESSING, ProcessingStatus.DEFERRED):
+        return status
+
+    _statuses[email_id] = ProcessingStatus.PENDING
+    _owners.pop(email_id, None)
+    _owners[email_id] = gmail_service.user_id
+    if notified_at is not None:
+        _notified_at[email_id] = notified_at
+    _stats["enqueued"] += 1
+    _queue.put_nowait((email_id, gmail_service))
+    return ProcessingStatus.PENDING
+
+
+def get_status(email_id: str, user_id: Optional[str] = None) -> Optional[str]:
+    """처리 중인 이메일의 상태를 반환합니다. 큐에 없거나 user_id의 이메일이 아니면 None을 반환합니다."""
+    if user_id is not None and _owners.get(email_id) != user_id:
+        return None
+    return _statuses.get(email_id)
+
+
+def get_pending(user_id: str, limit: int) -> List[Tuple[str, str]]:
+    """사용자의 아직 처리되지 않은 이메일 (ID, 상태)를 최근에 추가된 순서로 최대 limit개 반환합니다."""
+    pending = []
+    for email_id in reversed(list(_owners)):
+        if len(pending) >= limit:
+            break
+        status = _statuses.get(email_id)
+        if _owners.get(email_id) == user_id and status in (
+                ProcessingStatus.PENDING, ProcessingStatus.PROCESSING, ProcessingStatus.DEFERRED):
+            pending.append((email_id, status))
+    return pending
+
+
+def subscribe(user_id: str) -> asyncio.Queue:
+    """사용자의 처리 완료 이벤트를 받을 구독 큐를 등록합니다."""
+    subscriber = asyncio.Queue()
+    _subscribers.setdefault(user_id, set()).add(subscriber)
+    return subscriber
+
+
+def unsubscribe(user_id: str, subscriber: asyncio.Queue):
+    """구독 큐를 해제합니다."""
+    subscribers = _subscribers.get(user_id)
+    if subscribers is not None:
+        subscribers.discard(subscriber)
+        if not subscribers:
+            del _subscribers[user_id]
+
+
+def get_queue_stats() -> Dict:
+    """처리 큐 지표를 반환합니다."""
+    statuses = list(_statuses.values())
+    notified_processed = _stats["notified_processed"]
+    return {
+        "avg_notified_latency_ms": (
+            _stats["notified_latency_seconds"] / notified_processed * 1000 if notified_processed else 0.0
+        ),
+        "depth": _queue.qsize() if _queue is not None else 0,
+        "workers": len(_workers),
+        "max_workers": PROCESSING_WORKERS,
+        "batch_size": PROCESSING_BATCH_SIZE,
+        "processing": statuses.count(ProcessingStatus.PROCESSING),
+        "deferred_waiting": statuses.count(ProcessingStatus.DEFERRED),
+        "retrying": len(_attempts),
+        "failed_exhausted": statuses.count(ProcessingStatus.FAILED),
+        "subscribers": sum(len(subscribers) for subscribers in _subscribers.values()),
+        **_stats,
+    }
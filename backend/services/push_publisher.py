@@ -0,0 +1,25 @@
+from dotenv import load_dotenv
+import argparse
+import httpx
+import os
+from services.push_service import encode_notification
+
+load_dotenv()
+
+# Pub/Sub 없이 웹훅 경로를 테스트하기 위한 로컬 발행기
+# 사용 예: python -m services.push_publisher --email user@gmail.com --history-id 12345
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gmail 푸시 알림 로컬 발행기")
+    parser.add_argument("--email", required=True, help="알림을 보낼 Gmail 주소")
+    parser.add_argument("--history-id", required=True, help="알림에 담을 historyId")
+    parser.add_argument("--url", default="http://localhost:8000/api/webhooks/gmail", help="웹훅 URL")
+    parser.add_argument("--token", default=os.getenv("GMAIL_PUSH_VERIFICATION_TOKEN"), help="검증 토큰")
+    args = parser.parse_args()
+
+    response = httpx.post(
+        args.url,
+        params={"token": args.token} if args.token else None,
+        json=encode_notification(args.email, args.history_id)
+    )
+    print(f"{response.status_code} {response.text}")
@@ -0,0 +1,142 @@
+from typing import Dict, Optional
+from dotenv import load_dotenv
+from datetime import datetime, timedelta
+from google.auth.transport.requests import Request
+from google.oauth2 import id_token
+from sqlalchemy.ext.asyncio import AsyncSession
+import base64
+import json
+import os
+from models.gmail_watch_model import GmailWatch
+from services.executor import run_blocking
+from services.gmail_service import GmailService
+
+load_dotenv()
+
+# Gmail 알림을 받을 Pub/Sub 토픽 (projects/<project>/topics/<topic>), 없으면 푸시 비활성화
+GMAIL_PUBSUB_TOPIC = os.getenv("GMAIL_PUBSUB_TOPIC")
+# Pub/Sub 푸시 구독 URL에 붙인 ?token= 값 (없으면 푸시 비활성화)
+GMAIL_PUSH_VERIFICATION_TOKEN = os.getenv("GMAIL_PUSH_VERIFICATION_TOKEN")
+# 푸시 구독의 인증(OIDC) 토큰 audience와 서비스 계정, 설정하면 Authorization 헤더의 JWT를 검증
+GMAIL_PUSH_AUDIENCE = os.getenv("GMAIL_PUSH_AUDIENCE")
+GMAIL_PUSH_SERVICE_ACCOUNT = os.getenv("GMAIL_PUSH_SERVICE_ACCOUNT")
+# 만료 전 watch 갱신 여유 시간
+WATCH_RENEW_BEFORE_SECONDS = int(os.getenv("WATCH_RENEW_BEFORE_SECONDS", str(24 * 3600)))
+# 푸시가 활성화된 사용자는 폴링을 보조 수단으로만 사용하므로 주기를 늘림
+PUSH_FALLBACK_POLL_INTERVAL_SECONDS = int(os.getenv("PUSH_FALLBACK_POLL_INTERVAL_SECONDS", "1800"))
+
+_stats = {
+    "notifications": 0,
+    "triggered": 0,
+    "ignored": 0,
+    "watch_registrations": 0,
+    "rejected": 0,
+}
+
+if GMAIL_PUBSUB_TOPIC and not GMAIL_PUSH_VERIFICATION_TOKEN:
+    print("GMAIL_PUSH_VERIFICATION_TOKEN이 설정되지 않아 푸시 알림을 사용하지 않습니다.")
+
+
+def is_push_enabled() -> bool:
+    """토픽과 검증 토큰이 모두 설정된 경우에만 푸시를 사용합니다."""
+    return bool(GMAIL_PUBSUB_TOPIC and GMAIL_PUSH_VERIFICATION_TOKEN)
+
+
+def verify_token(token: Optional[str]) -> bool:
+    """푸시 요청의 검증 토큰을 확인합니다. 토큰이 설정되지 않았으면 모두 거부합니다."""
+    return bool(GMAIL_PUSH_VERIFICATION_TOKEN) and token == GMAIL_PUSH_VERIFICATION_TOKEN
+
+
+async def verify_oidc(authorization: Optional[str]) -> bool:
+    """Pub/Sub가 Authorization 헤더에 붙인 OIDC 토큰(JWT)을 검증합니다.
+
+    서명/만료/audience(GMAIL_PUSH_AUDIENCE)와 발급 서비스 계정(GMAIL_PUSH_SERVICE_ACCOUNT)을 확인하며,
+    GMAIL_PUSH_AUDIENCE가 설정되지 않았으면 검증하지 않습니다.
+    """
+    if not GMAIL_PUSH_AUDIENCE:
+        return True
+    if not authorization or not authorization.startswith("Bearer "):
+        return False
+    try:
+        claims = await run_blocking(
+            id_token.verify_oauth2_token, authorization[len("Bearer "):], Request(), GMAIL_PUSH_AUDIENCE
+        )
+    except Exception as e:
+        print(f"푸시 인증 토큰 검증 실패: {str(e)}")
+        return False
+    if GMAIL_PUSH_SERVICE_ACCOUNT and (
+            claims.get('email') != GMAIL_PUSH_SERVICE_ACCOUNT or not claims.get('email_verified')):
+        return False
+    return True
+
+
+async def has_active_watch(db: AsyncSession, user_id: str) -> bool:
+    """사용자의 watch가 아직 유효한지 확인합니다."""
+    if not is_push_enabled():
+        return False
+    watch = await db.get(GmailWatch, user_id)
+    return watch is not None and watch.expiration > datetime.utcnow()
+
+
+async def ensure_watch(gmail_service: GmailService, db: AsyncSession) -> Optional[GmailWatch]:
+    """watch가 없거나 곧 만료되면 다시 등록합니다."""
+    if not is_push_enabled():
+        return None
+
+    watch = await db.get(GmailWatch, gmail_service.user_id)
+    renew_at = datetime.utcnow() + timedelta(seconds=WATCH_RENEW_BEFORE_SECONDS)
+    if watch is not None and watch.topic_name == GMAIL_PUBSUB_TOPIC and watch.expiration > renew_at:
+        return watch
+
+    response = await gmail_service.watch(GMAIL_PUBSUB_TOPIC)
+    if watch is None:
+        watch = GmailWatch(user_id=gmail_service.user_id)
+        db.add(watch)
+    watch.topic_name = GMAIL_PUBSUB_TOPIC
+    watch.history_id = str(response.get('historyId'))
+    watch.expiration = datetime.utcfromtimestamp(int(response['expiration']) / 1000)
+    watch.registered_at = datetime.utcnow()
+    await db.commit()
+    _stats["watch_registrations"] += 1
+    return watch
+
+
+def parse_notification(body: Dict) -> Dict:
+    """Pub/Sub 푸시 메시지에서 emailAddress와 historyId를 추출합니다."""
+    data = body['message']['data']
+    payload = json.loads(base64.b64decode(data + '=' * (-len(data) % 4)).decode('utf-8'))
+    return {
+        "email_address": payload['emailAddress'],
+        "history_id": str(payload['historyId'])
+    }
+
+
+def encode_notification(email_address: str, history_id: str, message_id: str = "local") -> Dict:
+    """Pub/Sub 푸시 형식의 메시지를 만듭니다. (로컬 테스트용)"""
+    data = json.dumps({"emailAddress": email_address, "historyId": int(history_id)})
+    return {
+        "message": {
+            "data": base64.b64encode(data.encode('utf-8')).decode('ascii'),
+            "messageId": message_id,
+            "publishTime": datetime.utcnow().isoformat() + "Z"
+        },
+        "subscription": "projects/local/subscriptions/gmail-push"
+    }
+
+
+def record_rejected():
+    _stats["rejected"] += 1
+
+
+def record_notification(triggered: bool):
+    _stats["notifications"] += 1
+    _stats["triggered" if triggered else "ignored"] += 1
+
+
+def get_push_stats() -> Dict:
+    """푸시 알림 처리 지표를 반환합니다."""
+    return {
+        "enabled": is_push_enabled(),
+        "topic": GMAIL_PUBSUB_TOPIC,
+        **_stats,
+    }
@@ -0,0 +1,102 @@
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+from email.utils import parseaddr
+import os
+import re
+import threading
+from services.email_analyzer import EmailCategory
+
+load_dotenv()
+
+# 이 신뢰도 이상이면 Gemini를 호출하지 않고 규칙 분류 결과를 사용
+RULE_CONFIDENCE_THRESHOLD = float(os.getenv("RULE_CONFIDENCE_THRESHOLD", "0.85"))
+
+# Gmail 라벨 ID -> (카테고리, 중요도, 신뢰도)
+LABEL_RULES = {
+    "SPAM": (EmailCategory.SPAM, 0.0, 0.99),
+    "CATEGORY_PROMOTIONS": (EmailCategory.ADVERTISEMENT, 10.0, 0.9),
+    "CATEGORY_SOCIAL": (EmailCategory.SOCIAL, 20.0, 0.9),
+    "CATEGORY_FORUMS": (EmailCategory.NEWSLETTER, 25.0, 0.7),
+    "CATEGORY_UPDATES": (EmailCategory.NEWSLETTER, 30.0, 0.6),
+}
+
+# 소셜 미디어 알림 발신 도메인
+SOCIAL_DOMAINS = {
+    "facebookmail.com", "linkedin.com", "x.com", "twitter.com", "instagram.com",
+    "youtube.com", "discord.com", "slack.com", "reddit.com", "kakao.com",
+}
+
+_NO_REPLY_SENDER = re.compile(r'^(no-?reply|do-?not-?reply|notifications?|mailer-daemon|newsletter|news)([+.\-_].*)?@', re.IGNORECASE)
+
+# 사람이 직접 보냈을 가능성을 나타내는 라벨 (규칙 신뢰도를 낮춤)
+PERSONAL_LABELS = {"CATEGORY_PERSONAL", "IMPORTANT", "STARRED"}
+
+_lock = threading.Lock()
+_stats = {
+    "total": 0,
+    "rule_hits": 0,
+    "escalated": 0,
+    "rule_seconds": 0.0,
+    "llm_seconds": 0.0,
+}
+
+
+def classify_by_rules(sender: str, label_ids: Optional[List[str]] = None,
+                      headers: Optional[Dict[str, str]] = None) -> Dict:
+    """Gmail 라벨, List-Unsubscribe 헤더, 발신자 주소로 이메일을 분류합니다.
+
+    근거가 없으면 UNKNOWN과 신뢰도 0을 반환합니다.
+    """
+    label_ids = label_ids or []
+    headers = {name.lower(): value for name, value in (headers or {}).items()}
+    address = parseaddr(sender or '')[1].lower()
+    domain = address.rsplit('@', 1)[-1] if '@' in address else ''
+
+    candidates = []
+    for label_id in label_ids:
+        if label_id in LABEL_RULES:
+            category, importance, confidence = LABEL_RULES[label_id]
+            candidates.append((confidence, category, importance, f"label:{label_id}"))
+
+    if domain in SOCIAL_DOMAINS or any(domain.endswith('.' + social) for social in SOCIAL_DOMAINS):
+        candidates.append((0.9, EmailCategory.SOCIAL, 20.0, f"domain:{domain}"))
+
+    has_unsubscribe = 'list-unsubscribe' in headers
+    is_no_reply = bool(_NO_REPLY_SENDER.match(address))
+    if has_unsubscribe and is_no_reply:
+        candidates.append((0.9, EmailCategory.NEWSLETTER, 25.0, "list-unsubscribe+no-reply"))
+    elif has_unsubscribe:
+        candidates.append((0.85, EmailCategory.NEWSLETTER, 30.0, "list-unsubscribe"))
+    elif is_no_reply:
+        candidates.append((0.7, EmailCategory.NEWSLETTER, 35.0, "no-reply"))
+
+    if not candidates:
+        return {"category": EmailCategory.UNKNOWN, "importance": 50.0, "confidence": 0.0, "reason": None}
+
+    confidence, category, importance, reason = max(candidates, key=lambda candidate: candidate[0])
+
+    # 중요/개인 라벨이 있으면 스팸을 제외하고 LLM 판단을 받도록 신뢰도를 낮춤
+    if category != EmailCategory.SPAM and PERSONAL_LABELS.intersection(label_ids):
+        confidence *= 0.5
+
+    return {"category": category, "importance": importance, "confidence": confidence, "reason": reason}
+
+
+def record_tier(escalated: bool, rule_seconds: float, llm_seconds: float = 0.0):
+    """분류 단계별 처리 결과와 소요 시간을 기록합니다."""
+    with _lock:
+        _stats["total"] += 1
+        _stats["escalated" if escalated else "rule_hits"] += 1
+        _stats["rule_seconds"] += rule_seconds
+        _stats["llm_seconds"] += llm_seconds
+
+
+def get_tier_stats() -> Dict:
+    """규칙 분류 적중률, LLM 위임 비율, 단계별 평균 지연 시간을 반환합니다."""
+    with _lock:
+        stats = dict(_stats)
+    stats["threshold"] = RULE_CONFIDENCE_THRESHOLD
+    stats["escalation_rate"] = stats["escalated"] / stats["total"] if stats["total"] else 0.0
+    stats["avg_rule_ms"] = stats["rule_seconds"] / stats["total"] * 1000 if stats["total"] else 0.0
+    stats["avg_llm_ms"] = stats["llm_seconds"] / stats["escalated"] * 1000 if stats["escalated"] else 0.0
+    return stats
@@ -0,0 +1,125 @@
+from typing import Dict, Tuple
+from dotenv import load_dotenv
+from urllib.parse import urlparse
+import os
+import re
+import threading
+
+load_dotenv()
+
+# 작업별 본문 토큰 예산 (분류는 요약보다 훨씬 적은 텍스트로 충분)
+CLASSIFY_TOKEN_BUDGET = int(os.getenv("CLASSIFY_TOKEN_BUDGET", "400"))
+SUMMARY_TOKEN_BUDGET = int(os.getenv("SUMMARY_TOKEN_BUDGET", "2000"))
+
+# 토큰 추정 비율 (한글 비중을 고려해 3자당 1토큰)
+CHARS_PER_TOKEN = 3
+# 정리 전에 남길 최대 길이 (토큰 예산의 배수, 인용/푸터 제거 후에도 예산을 채울 만큼만 정규식에 넘김)
+PREPROCESS_INPUT_RATIO = int(os.getenv("PREPROCESS_INPUT_RATIO", "4"))
+
+# 이 줄부터는 이전 메일 인용이므로 잘라냄
+# (\s는 줄바꿈도 포함해 빈 줄이 이어지면 줄마다 다시 탐색하므로 줄 안의 공백은 [ \t]로만 매칭)
+_REPLY_HEADERS = [
+    re.compile(r'^[ \t]*On .{0,200}wrote:[ \t]*$', re.IGNORECASE | re.MULTILINE),
+    re.compile(r'^.{0,200}님이 작성:[ \t]*$', re.MULTILINE),
+    re.compile(r'^[ \t]*-{2,}[ \t]*Original Message[ \t]*-{2,}[ \t]*$', re.IGNORECASE | re.MULTILINE),
+    re.compile(r'^[ \t]*-{2,}[ \t]*원본 메일[ \t]*-{2,}[ \t]*$', re.MULTILINE),
+    re.compile(r'^[ \t]*From: .+\n[ \t]*(Sent|Date): ', re.IGNORECASE | re.MULTILINE),
+]
+# 서명 구분선 ("-- ")
+_SIGNATURE = re.compile(r'^-- ?$', re.MULTILINE)
+# 수신거부/발신전용 등 반복되는 푸터 문구
+_FOOTER_LINE = re.compile(
+    r'unsubscribe|view (this|it) in (your|a) browser|privacy policy|all rights reserved|'
+    r'수신\s*거부|구독\s*(취소|해지)|발신\s*전용|회신되지 않습니다',
+    re.IGNORECASE
+)
+_URL = re.compile(r'https?://\S+')
+_INLINE_SPACE = re.compile(r'[ \t\u00a0]+')
+_BLANK_LINES = re.compile(r'\n\s*\n+')
+
+# 긴 URL(추적 링크 등)은 도메인만 남김
+MAX_URL_LENGTH = 40
+
+_lock = threading.Lock()
+_stats = {
+    "messages": 0,
+    "original_tokens": 0,
+    "final_tokens": 0,
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """텍스트의 대략적인 토큰 수를 추정합니다."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _shorten_url(match: re.Match) -> str:
+    url = match.group()
+    if len(url) <= MAX_URL_LENGTH:
+        return url
+    return f"[link:{urlparse(url).netloc}]"
+
+
+def clean_body(content: str) -> str:
+    """인용된 이전 메일, 서명, 푸터, 긴 링크를 제거하고 공백을 정리합니다."""
+    text = (content or '').replace('\r\n', '\n').replace('\r', '\n')
+
+    # 답장 헤더 이후의 인용 내용 제거
+    cut = len(text)
+    for pattern in _REPLY_HEADERS:
+        match = pattern.search(text)
+        if match and match.start() > 0:
+            cut = min(cut, match.start())
+    signature = _SIGNATURE.search(text)
+    if signature and signature.start() > 0:
+        cut = min(cut, signature.start())
+    text = text[:cut]
+
+    # 인용 줄(>)과 푸터 문구 줄 제거
+    lines = [
+        line for line in text.split('\n')
+        if not line.lstrip().startswith('>') and not _FOOTER_LINE.search(line)
+    ]
+    text = '\n'.join(lines)
+
+    text = _URL.sub(_shorten_url, text)
+    text = _INLINE_SPACE.sub(' ', text)
+    text = _BLANK_LINES.sub('\n\n', text)
+    return text.strip()
+
+
+def preprocess_body(content: str, token_budget: int) -> Tuple[str, Dict]:
+    """본문을 정리하고 토큰 예산에 맞게 자른 뒤 절감된 토큰 수와 함께 반환합니다."""
+    original_tokens = estimate_tokens(content or '')
+    max_chars = token_budget * CHARS_PER_TOKEN
+    # 초대형 본문이 정규식에 그대로 들어가지 않도록 먼저 자름
+    text = clean_body((content or '')[:max_chars * PREPROCESS_INPUT_RATIO])
+
+    if len(text) > max_chars:
+        text = text[:max_chars].rstrip() + " …(이하 생략)"
+
+    final_tokens = estimate_tokens(text)
+    with _lock:
+        _stats["messages"] += 1
+        _stats["original_tokens"] += original_tokens
+        _stats["final_tokens"] += final_tokens
+
+    return text, {
+        "original_tokens": original_tokens,
+        "final_tokens": final_tokens,
+        "saved_tokens": max(original_tokens - final_tokens, 0)
+    }
+
+
+def get_preprocess_stats() -> Dict:
+    """본문 전처리로 절감된 토큰 지표를 반환합니다."""
+    with _lock:
+        stats = dict(_stats)
+    stats["saved_tokens"] = max(stats["original_tokens"] - stats["final_tokens"], 0)
+    stats["avg_saved_tokens_per_message"] = (
+        stats["saved_tokens"] / stats["messages"] if stats["messages"] else 0.0
+    )
+    stats["saved_ratio"] = (
+        stats["saved_tokens"] / stats["original_tokens"] if stats["original_tokens"] else 0.0
+    )
+    return stats
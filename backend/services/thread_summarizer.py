@@ -0,0 +1,224 @@
+from contextlib import asynccontextmanager
+from pydantic import BaseModel, ValidationError
+from typing import Dict, Optional, Tuple
+from dotenv import load_dotenv
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+import json
+import os
+import re
+from models.email_model import Email, CategorySource
+from models.email_thread_model import EmailThread
+from services.email_analyzer import EmailAnalysis, EmailCategory
+from services.executor import run_blocking
+from services.gemini_client import GeminiThrottled, generate_content
+from services.gmail_service import to_utc_naive
+from services.text_preprocessor import estimate_tokens, preprocess_body, SUMMARY_TOKEN_BUDGET
+
+load_dotenv()
+
+# 스레드 요약 최대 길이 (다음 메시지 요약 시 프롬프트에 그대로 들어가므로 길이를 제한)
+THREAD_SUMMARY_MAX_CHARS = int(os.getenv("THREAD_SUMMARY_MAX_CHARS", "1000"))
+
+_locks: Dict[Tuple[str, str], list] = {}  # (user_id, thread_id) -> [Lock, 사용 중인 작업 수]
+_stats = {
+    "thread_updates": 0,  # 이전 요약 + 새 메시지로 갱신한 횟수
+    "thread_prompt_tokens": 0,  # 갱신 프롬프트에 보낸 토큰 추정치
+    "full_body_tokens": 0,  # 같은 메시지를 인용 포함 전체 본문으로 보냈을 때의 토큰 추정치
+    "category_overrides": 0,  # 스레드와 다르게 분류된 메시지 수
+}
+
+
+class ThreadUpdateAnalysis(BaseModel):
+    """스레드 갱신 응답 스키마"""
+    thread: EmailAnalysis = EmailAnalysis()
+    message: EmailAnalysis = EmailAnalysis()
+
+
+@asynccontextmanager
+async def thread_lock(user_id: str, thread_id: str):
+    """같은 스레드의 메시지가 동시에 처리되어 요약 갱신이 유실되지 않도록 순서대로 처리합니다."""
+    key = (user_id, thread_id)
+    entry = _locks.get(key)
+    if entry is None:
+        entry = _locks[key] = [asyncio.Lock(), 0]
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0:
+            _locks.pop(key, None)
+
+
+def parse_thread_update_response(response_text: str, thread: EmailThread) -> ThreadUpdateAnalysis:
+    """Gemini 응답을 파싱합니다. 실패하면 스레드 정보는 유지하고 응답 전체를 메시지 요약으로 사용합니다."""
+    try:
+        json_match = re.search(r'\{[\s\S]*\}', response_text)
+        if json_match:
+            return ThreadUpdateAnalysis.model_validate(json.loads(json_match.group()))
+    except (json.JSONDecodeError, ValidationError):
+        pass
+
+    return ThreadUpdateAnalysis(
+        thread=EmailAnalysis(
+            category=thread.category,
+            importance=thread.importance,
+            summary=thread.summary or "",
+            key_points=thread.key_points or [],
+            action_items=thread.action_items or [],
+            sentiment=thread.sentiment
+        ),
+        message=EmailAnalysis(category=thread.category, importance=thread.importance, summary=response_text.strip())
+    )
+
+
+async def analyze_thread_update(thread: EmailThread, subject: str, content: str, sender: str,
+                                user_id: Optional[str] = None) -> Dict:
+    """이전 스레드 요약과 새 메시지만으로 스레드 요약/분류와 메시지 분석을 함께 갱신합니다.
+
+    인용된 이전 메시지는 전처리에서 제거되므로 메시지 수가 늘어나도 프롬프트 크기가 일정합니다.
+    """
+    try:
+        full_body_tokens = estimate_tokens(content or '')
+        content, _ = await run_blocking(preprocess_body, content, SUMMARY_TOKEN_BUDGET)
+        previous_summary = (thread.summary or '')[:THREAD_SUMMARY_MAX_CHARS]
+
+        prompt = f"""
+        다음은 이메일 스레드의 기존 요약과 새로 도착한 메시지입니다.
+        기존 요약에 새 메시지 내용을 반영해 스레드 분석을 갱신하고, 새 메시지 자체도 분석해주세요.
+
+        [기존 스레드]
+        제목: {thread.subject}
+        분류: {thread.category}
+        중요도: {thread.importance}
+        요약: {previous_summary}
+        남은 실행 항목: {json.dumps(thread.action_items or [], ensure_ascii=False)}
+
+        [새 메시지]
+        제목: {subject}
+        발신자: {sender}
+        내용: {content}
+
+        category는 WORK, PERSONAL, NEWSLETTER, SPAM, ADVERTISEMENT, SOCIAL, UNKNOWN 중 하나입니다.
+        새 메시지가 스레드와 같은 성격이면 message.category는 thread.category와 같게 해주세요.
+        thread.summary는 {THREAD_SUMMARY_MAX_CHARS}자 이내로, 완료된 실행 항목은 thread.action_items에서 빼주세요.
+        importance는 0-100 사이의 숫자, sentiment는 POSITIVE, NEUTRAL, NEGATIVE 중 하나입니다.
+
+        반드시 다음 JSON 형식으로만 응답해주세요:
+        {{
+            "thread": {{
+                "category": "카테고리",
+                "importance": 중요도 점수,
+                "summary": "스레드 전체 요약",
+                "key_points": ["핵심 포인트"],
+                "action_items": ["남은 실행 항목"],
+                "sentiment": "감정"
+            }},
+            "message": {{
+                "category": "카테고리",
+                "importance": 중요도 점수,
+                "summary": "새 메시지 요약",
+                "key_points": ["핵심 포인트"],
+                "action_items": ["실행 항목"],
+                "sentiment": "감정"
+            }}
+        }}
+        """
+
+        response = await generate_content(prompt, user_id=user_id)
+        update = parse_thread_update_response(response.text, thread)
+
+        _stats["thread_updates"] += 1
+        _stats["thread_prompt_tokens"] += estimate_tokens(prompt)
+        _stats["full_body_tokens"] += full_body_tokens
+
+        return {
+            "thread": update.thread.model_dump(),
+            "message": update.message.model_dump(),
+        }
+
+    except GeminiThrottled:
+        raise
+    except Exception as e:
+        raise Exception(f"스레드 요약 갱신 실패: {str(e)}")
+
+
+def resolve_message_category(thread_category: str, message_category: Optional[str]) -> Tuple[str, str]:
+    """메시지 분류를 정합니다. 메시지가 스레드와 다르게 분류된 경우에만 개별 분류(MESSAGE)로 남깁니다."""
+    if message_category and message_category != EmailCategory.UNKNOWN and message_category != thread_category:
+        _stats["category_overrides"] += 1
+        return message_category, CategorySource.MESSAGE
+    return thread_category, CategorySource.THREAD
+
+
+async def apply_to_thread(db: AsyncSession, thread: Optional[EmailThread], email: Email,
+                    thread_analysis: Optional[Dict] = None) -> EmailThread:
+    """저장된 메시지를 스레드에 반영합니다.
+
+    thread_analysis가 있으면 스레드 요약/분류를 갱신하고, 스레드 분류가 바뀌면 개별 분류가 없는
+    메시지(THREAD)의 분류도 함께 바꿉니다.
+    """
+    try:
+        if thread is None:
+            thread = EmailThread(
+                user_id=email.user_id,
+                thread_id=email.thread_id,
+                subject=email.subject,
+                category=email.category,
+                importance=email.importance,
+                summary=email.summary,
+                key_points=email.key_points,
+                action_items=email.action_items,
+                sentiment=email.sentiment,
+                message_count=0,
+                summarized_count=0,
+                last_message_at=to_utc_naive(email.received_at)
+            )
+            db.add(thread)
+            if email.category_source != CategorySource.RULE:
+                thread.summarized_count = 1
+        elif thread_analysis is not None:
+            previous_category = thread.category
+            thread.category = thread_analysis["category"]
+            thread.importance = float(thread_analysis["importance"])
+            thread.summary = thread_analysis["summary"] or thread.summary
+            thread.key_points = thread_analysis["key_points"] or None
+            thread.action_items = thread_analysis["action_items"] or None
+            thread.sentiment = thread_analysis["sentiment"]
+            thread.summarized_count += 1
+
+            if thread.category != previous_category:
+                await db.execute(
+                    update(Email).where(
+                        Email.user_id == email.user_id,
+                        Email.thread_id == email.thread_id,
+                        Email.category_source == CategorySource.THREAD
+                    ).values(category=thread.category).execution_options(synchronize_session=False)
+                )
+
+        thread.message_count += 1
+        thread.last_email_id = email.email_id
+        # DB에는 UTC 기준 naive 시각으로 저장하므로 같은 기준으로 비교
+        received_at = to_utc_naive(email.received_at) if email.received_at else None
+        if received_at and received_at > to_utc_naive(thread.last_message_at):
+            thread.last_message_at = received_at
+        await db.commit()
+        return thread
+
+    except Exception as e:
+        await db.rollback()
+        raise Exception(f"스레드 갱신 실패: {str(e)}")
+
+
+def get_thread_stats() -> Dict:
+    """스레드 요약 갱신 지표를 반환합니다. (전체 본문 대비 실제로 보낸 토큰 비율)"""
+    stats = dict(_stats)
+    stats["active_locks"] = len(_locks)
+    stats["avg_thread_prompt_tokens"] = (stats["thread_prompt_tokens"] / stats["thread_updates"]
+                                         if stats["thread_updates"] else 0.0)
+    stats["token_ratio"] = (stats["thread_prompt_tokens"] / stats["full_body_tokens"]
+                            if stats["full_body_tokens"] else 0.0)
+    return stats
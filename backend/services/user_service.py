@@ -0,0 +1,60 @@
+from typing import Optional
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.migrations import claim_ownerless_emails
+from models.user_model import User
+from services.poll_scheduler import POLL_INTERVAL_SECONDS
+import random
+
+
+async def create_or_update_user(db: AsyncSession, user_id: str, email: str, access_token: Optional[str],
+                                refresh_token: Optional[str], name: Optional[str] = None,
+                                update_tokens: bool = True) -> User:
+    """사용자 정보와 토큰을 저장합니다.
+
+    update_tokens가 False이면 기존 사용자의 토큰은 바꾸지 않습니다. (JWT에 담긴 토큰은 스케줄러가
+    갱신해 저장한 토큰보다 오래되었을 수 있으므로 OAuth 콜백에서만 토큰을 저장)
+    새 사용자는 폴링이 한꺼번에 몰리지 않도록 첫 폴링 시간을 주기 안에서 무작위로 정합니다.
+    첫 사용자가 등록되면 소유자가 없는 기존 이메일을 그 사용자에게 할당합니다.
+    """
+    try:
+        user = await db.get(User, user_id)
+        if user is None:
+            # 첫 사용자에게 이전 버전에서 저장된 소유자 없는 이메일을 할당
+            if not await db.scalar(select(User.user_id).limit(1)):
+                await db.run_sync(lambda session: claim_ownerless_emails(session.connection(), user_id))
+            user = User(
+                user_id=user_id,
+                email=email,
+                name=name,
+                access_token=access_token,
+                refresh_token=refresh_token,
+                consecutive_failures=0,
+                next_poll_at=datetime.utcnow() + timedelta(seconds=random.uniform(0, POLL_INTERVAL_SECONDS))
+            )
+            db.add(user)
+            await db.commit()
+            return user
+
+        changed = False
+        if update_tokens and access_token and user.access_token != access_token:
+            user.access_token = access_token
+            changed = True
+        # Google은 재동의 시에만 refresh token을 다시 발급하므로 값이 있을 때만 갱신
+        if update_tokens and refresh_token and user.refresh_token != refresh_token:
+            user.refresh_token = refresh_token
+            changed = True
+        if name and user.name != name:
+            user.name = name
+            changed = True
+        if not user.is_active:
+            user.is_active = True
+            changed = True
+        if changed:
+            await db.commit()
+        return user
+
+    except Exception:
+        await db.rollback()
+        raise
@@ -0,0 +1,97 @@
+"""분류 호출이 몰릴 때의 응답성: 이벤트 루프에서 직접 호출 vs 기본 executor vs 전용 풀 (user-002)
+
+Gemini generate_content를 --classify-ms 동안 막히는 호출로 대신해 --calls개를 동시에 실행하면서
+`/`와 `/api/emails/` 응답 시간, 같은 경로로 보낸 짧은 Gmail 호출(5ms)의 완료 시간을 잽니다.
+    python tests/benchmarks/bench_executor.py --calls 32 --classify-ms 200
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from common import print_table
+
+import httpx
+import jwt
+
+import main
+from models.email_model import init_db
+from routers.auth import ALGORITHM, JWT_SECRET_KEY
+from services import executor
+from services.executor import run_blocking
+
+
+async def _scenario(mode: str, calls: int, classify_seconds: float, requests: int, interval: float = 0.05):
+    loop = asyncio.get_running_loop()
+
+    async def offload(func):
+        if mode == "inline":
+            return func()  # 변경 전: async 함수 안에서 동기 호출
+        if mode == "default executor":
+            return await loop.run_in_executor(None, func)
+        return await run_blocking(func)
+
+    token = jwt.encode({"sub": "bench@example.com", "user_id": "bench", "access_token": "a", "refresh_token": "r"},
+                       JWT_SECRET_KEY, algorithm=ALGORITHM)
+    latencies = {"/": [], "/api/emails/": []}
+
+    async def probe(client, path):
+        # 요청을 interval마다 보내야 하는 시각 기준으로 지연 시간을 잼 (루프가 멈춘 동안 밀린 요청 포함)
+        probe_started_at = time.perf_counter()
+        for index in range(requests):
+            scheduled_at = probe_started_at + index * interval
+            await asyncio.sleep(max(scheduled_at - time.perf_counter(), 0))
+            response = await client.get(path)
+            response.raise_for_status()
+            latencies[path].append((time.perf_counter() - scheduled_at) * 1000)
+
+    async def gmail_call(scheduled_at):
+        # 분류가 몰린 중(시작 10ms 후)에 보낸 짧은 Gmail 호출
+        await asyncio.sleep(max(scheduled_at - time.perf_counter(), 0))
+        await offload(lambda: time.sleep(0.005))
+        return (time.perf_counter() - scheduled_at) * 1000
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench",
+                                 headers={"Authorization": f"Bearer {token}"}) as client:
+        await client.get("/api/emails/")  # 사용자 등록/연결 준비
+        started_at = time.perf_counter()
+        probes = [asyncio.create_task(probe(client, path)) for path in latencies]
+        flood = [asyncio.create_task(offload(lambda: time.sleep(classify_seconds))) for _ in range(calls)]
+        gmail_ms = await gmail_call(started_at + 0.01)
+        await asyncio.gather(*probes)
+
+    await asyncio.gather(*flood)
+    total_ms = (time.perf_counter() - started_at) * 1000
+    return [
+        mode,
+        statistics.median(latencies["/"]), max(latencies["/"]),
+        statistics.median(latencies["/api/emails/"]), max(latencies["/api/emails/"]),
+        gmail_ms, total_ms,
+    ]
+
+
+def run():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=32)
+    parser.add_argument("--classify-ms", type=float, default=200)
+    parser.add_argument("--requests", type=int, default=10)
+    args = parser.parse_args()
+
+    init_db()
+    rows = []
+    for mode in ("inline", "default executor", "blocking pool"):
+        rows.append(asyncio.run(_scenario(mode, args.calls, args.classify_ms / 1000, args.requests)))
+
+    default_workers = min(32, (os.cpu_count() or 1) + 4)
+    print(f"{args.calls} concurrent {args.classify_ms:.0f} ms classify calls; "
+          f"default executor workers={default_workers}, BLOCKING_POOL_SIZE={executor.BLOCKING_POOL_SIZE}")
+    print_table(["mode", "root_p50_ms", "root_max_ms", "list_p50_ms", "list_max_ms", "gmail_call_ms", "all_done_ms"],
+                rows)
+    stats = executor.get_pool_stats()
+    print(f"blocking pool: max_queued={stats['max_queued']}, avg_wait_ms={stats['avg_wait_ms']:.1f}")
+
+
+if __name__ == "__main__":
+    run()
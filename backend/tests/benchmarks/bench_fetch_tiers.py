@@ -0,0 +1,60 @@
+"""Gmail 메시지 조회 단계별 응답 크기: format=full 전체 vs 단계별 fields 마스크 (user-023)
+
+로컬 가짜 Gmail 서버에서 같은 메시지를 단계별로 받아 응답 JSON 바이트를 잽니다. 단계별 요청은 message_request를
+그대로 사용하고 get_fetch_stats 집계도 함께 출력합니다. (로컬 서버의 마스크 처리 비용이 섞이므로 시간은 재지 않음)
+    python tests/benchmarks/bench_fetch_tiers.py --body-chars 4000 --attachments 3
+"""
+import argparse
+
+from common import print_table
+from fake_gmail_server import FakeGmailServer
+
+from services.gmail_service import FETCH_FULL, FETCH_METADATA, METADATA_HEADERS, get_fetch_stats, message_request
+
+
+def _response_bytes(request) -> int:
+    """요청을 실행하고 응답 본문 크기를 반환합니다."""
+    sizes = []
+    postproc = request.postproc
+
+    def counted(resp, content):
+        sizes.append(len(content))
+        return postproc(resp, content)
+
+    request.postproc = counted
+    request.execute()
+    return sizes[0]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--body-chars", type=int, default=4000)
+    parser.add_argument("--attachments", type=int, default=3)
+    args = parser.parse_args()
+
+    with FakeGmailServer(latency=0, body_chars=args.body_chars, attachments=args.attachments) as server:
+        service = server.service()
+        variants = [
+            # 변경 전 get_email/save_email: 마스크 없이 전체 파트 트리
+            ("full, no fields mask (before)",
+             lambda: service.users().messages().get(userId="me", id="m1", format="full")),
+            ("full + fields mask (body views)", lambda: message_request(service, "m1", FETCH_FULL)),
+            ("metadata + fields mask (headers-only detail)", lambda: message_request(service, "m1", FETCH_METADATA)),
+            ("metadata, From/Subject/Date (list rows)",
+             lambda: message_request(service, "m1", FETCH_METADATA, metadata_headers=METADATA_HEADERS)),
+        ]
+
+        rows = []
+        baseline = None
+        for name, make_request in variants:
+            size = _response_bytes(make_request())
+            baseline = baseline or size
+            rows.append([name, size, f"{size / baseline:.0%}"])
+
+    print(f"one message ({args.body_chars}-char text + HTML alternative, {args.attachments} attachments)")
+    print_table(["request", "response_bytes", "vs_before"], rows)
+    print({tier: {key: round(value) for key, value in values.items()} for tier, values in get_fetch_stats().items()})
+
+
+if __name__ == "__main__":
+    main()
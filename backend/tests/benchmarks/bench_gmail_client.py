@@ -0,0 +1,62 @@
+"""요청마다 Gmail 클라이언트 생성 vs 사용자별 풀 재사용 (user-011)
+
+1) 클라이언트 준비 시간: 변경 전처럼 요청마다 Credentials + build('gmail', 'v1') vs get_gmail_client(풀 적중)
+2) 준비 + messages.get 1회: 로컬 가짜 Gmail 서버에 요청마다 새 클라이언트/연결 vs 재사용 (keep-alive)
+    python tests/benchmarks/bench_gmail_client.py --iterations 200
+"""
+import argparse
+
+from common import measure, print_table
+from fake_gmail_server import FakeGmailServer
+
+from googleapiclient.discovery import build
+
+from services import gmail_client_pool
+from services.gmail_client_pool import _create_credentials, get_gmail_client
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    iterations = args.iterations
+
+    def build_per_request():
+        for _ in range(iterations):
+            build("gmail", "v1", credentials=_create_credentials("access", "refresh"), cache_discovery=False)
+
+    get_gmail_client("bench", "access", "refresh")  # 풀 채우기 (첫 요청은 build와 같은 비용)
+
+    def pooled():
+        for _ in range(iterations):
+            get_gmail_client("bench", "access", "refresh")
+
+    cold_ms = measure(lambda: (gmail_client_pool._clients.clear(), get_gmail_client("bench", "access", "refresh")))
+    rows = [
+        ["build per request", measure(build_per_request, 3) / iterations * 1000],
+        ["pool (cold miss)", cold_ms * 1000],
+        ["pool (hit)", measure(pooled, 3) / iterations * 1000],
+    ]
+
+    with FakeGmailServer(latency=0) as server:
+        shared = server.service()
+
+        def fetch_with_new_client():
+            for _ in range(iterations):
+                service = build("gmail", "v1", http=server.http(), static_discovery=True, cache_discovery=False)
+                service.users().messages().get(userId="me", id="m1", format="metadata").execute()
+
+        def fetch_with_shared_client():
+            for _ in range(iterations):
+                shared.users().messages().get(userId="me", id="m1", format="metadata").execute()
+
+        rows.append(["build + get (new connection)", measure(fetch_with_new_client, 3) / iterations * 1000])
+        rows.append(["reuse + get (keep-alive)", measure(fetch_with_shared_client, 3) / iterations * 1000])
+
+    print(f"per-request cost in microseconds, {iterations} iterations, median of runs")
+    print_table(["path", "us_per_request"], rows)
+    print(gmail_client_pool.get_client_pool_stats())
+
+
+if __name__ == "__main__":
+    main()
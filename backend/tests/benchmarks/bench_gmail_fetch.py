@@ -0,0 +1,54 @@
+"""목록 메타데이터 조회: 메시지별 순차 요청 vs 배치 요청 (user-001)
+
+로컬 가짜 Gmail 서버(요청당 --latency-ms 지연)에 대해 페이지 크기별로 한 페이지를 가져오는 시간을 잽니다.
+    python tests/benchmarks/bench_gmail_fetch.py --latency-ms 20
+"""
+import argparse
+import asyncio
+
+from common import measure, print_table
+from fake_gmail_server import FakeGmailServer
+
+from services import gmail_service
+from services.gmail_service import METADATA_HEADERS, GmailService
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with FakeGmailServer(latency=args.latency_ms / 1000) as server:
+        service = server.service()
+        gmail_service.get_gmail_client = lambda *args: (service, None)
+        client = GmailService("bench", "access", "refresh")
+
+        rows = []
+        for page_size in (10, 25, 50, 100):
+            ids = [f"m{index}" for index in range(page_size)]
+
+            def sequential():
+                # 변경 전: 메시지마다 messages.get(format=metadata)을 차례로 실행
+                for message_id in ids:
+                    service.users().messages().get(
+                        userId="me", id=message_id, format="metadata", metadataHeaders=METADATA_HEADERS
+                    ).execute()
+
+            before = server.requests
+            sequential_ms = measure(sequential, args.repeat)
+            sequential_requests = (server.requests - before) // args.repeat
+
+            before = server.requests
+            batch_ms = measure(lambda: asyncio.run(client.get_metadata(ids)), args.repeat)
+            batch_requests = (server.requests - before) // args.repeat
+
+            rows.append([page_size, sequential_ms, sequential_requests, batch_ms, batch_requests,
+                         f"{sequential_ms / batch_ms:.1f}x"])
+
+    print(f"latency per HTTP round trip: {args.latency_ms:.0f} ms, median of {args.repeat}")
+    print_table(["page", "sequential_ms", "requests", "batch_ms", "requests", "speedup"], rows)
+
+
+if __name__ == "__main__":
+    main()
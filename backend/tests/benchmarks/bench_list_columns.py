@@ -0,0 +1,108 @@
+"""100건 목록 조회: 전체 행 로드 + to_dict(본문 포함) vs 목록 컬럼만 조회 (user-017)
+
+본문(--body-kb)과 HTML(--html-kb)이 있는 이메일 --emails개를 저장한 뒤, 한 페이지(--limit)를
+응답 JSON까지 만드는 시간의 중앙값과 tracemalloc 최대 메모리를 잽니다.
+    python tests/benchmarks/bench_list_columns.py --emails 1000 --limit 100
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from common import print_table
+
+from sqlalchemy import select
+from sqlalchemy.orm import undefer
+
+from models.database import AsyncSessionLocal, SessionLocal
+from models.email_label_model import make_labels
+from models.email_model import Email, init_db
+from services.email_processor import LIST_COLUMNS, query_emails
+
+
+def _seed(emails: int, body_kb: int, html_kb: int):
+    text = ("회의 안건과 분기 실적 보고입니다. Quarterly numbers and notes. " * (body_kb * 20))[:body_kb * 1024]
+    html = f"<html><body><p>{text}</p></body></html>" * max(html_kb // max(body_kb, 1), 1)
+    db = SessionLocal()
+    try:
+        for index in range(emails):
+            db.add(Email(
+                email_id=f"m{index}", user_id="bench", thread_id=f"t{index}",
+                subject=f"subject {index}", sender="sender@example.com", snippet=text[:200],
+                content=text, html_content=html, headers={"Subject": f"subject {index}"},
+                category="WORK", importance=float(index % 100), summary="요약 " * 20,
+                key_points=["point 1", "point 2"], action_items=["item"], has_action_items=True,
+                label_ids=["INBOX"], labels=make_labels("bench", ["INBOX"]),
+                received_at=datetime(2026, 1, 1) + timedelta(minutes=index),
+            ))
+            if index % 200 == 199:
+                db.commit()
+        db.commit()
+    finally:
+        db.close()
+
+
+async def _full_rows(limit: int) -> str:
+    # 변경 전: 모든 컬럼을 읽고 to_dict()로 본문/HTML까지 직렬화
+    async with AsyncSessionLocal() as db:
+        emails = (await db.scalars(
+            select(Email).options(undefer(Email.content), undefer(Email.html_content), undefer(Email.headers))
+            .where(Email.user_id == "bench").order_by(Email.importance.desc(), Email.received_at.desc())
+            .limit(limit)
+        )).all()
+        return json.dumps([{**email.to_dict(include_body=True), "headers": email.headers} for email in emails])
+
+
+async def _list_columns(limit: int) -> str:
+    # 변경 후: 목록 컬럼만 읽고 목록 응답 필드만 직렬화
+    async with AsyncSessionLocal() as db:
+        emails, _ = await query_emails(db, "bench", sort_by="importance", limit=limit)
+        return json.dumps([
+            {**{column.key: getattr(email, column.key) for column in LIST_COLUMNS},
+             "received_at": email.received_at.isoformat()}
+            for email in emails
+        ])
+
+
+def _measure(func, limit: int, repeat: int):
+    """지연 시간은 메모리 추적 없이, 최대 메모리는 tracemalloc으로 따로 잽니다."""
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        asyncio.run(func(limit))
+        timings.append((time.perf_counter() - started_at) * 1000)
+
+    tracemalloc.start()
+    size = len(asyncio.run(func(limit)))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(timings), peak / 1024 / 1024, size / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--emails", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--body-kb", type=int, default=20)
+    parser.add_argument("--html-kb", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    init_db()
+    _seed(args.emails, args.body_kb, args.html_kb)
+
+    rows = []
+    for name, func in (("full rows + to_dict", _full_rows), ("list columns", _list_columns)):
+        latency_ms, peak_mb, response_kb = _measure(func, args.limit, args.repeat)
+        rows.append([name, latency_ms, peak_mb, response_kb])
+
+    print(f"{args.limit}-row page from {args.emails} emails ({args.body_kb} KB text + ~{args.html_kb} KB HTML each), "
+          f"median of {args.repeat}")
+    print_table(["query", "latency_ms", "peak_mb", "response_kb"], rows)
+
+
+if __name__ == "__main__":
+    main()
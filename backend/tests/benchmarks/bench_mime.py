@@ -0,0 +1,131 @@
+"""MIME 본문 추출: 기존 최상위 파트 디코딩 vs extract_body (user-022)
+
+중첩 multipart, 여러 charset, 인라인 이미지, 대형 HTML 뉴스레터가 섞인 합성 코퍼스(--messages개)를 처리하며
+처리량(메시지/s, 입력 base64 MB/s), 본문을 얻지 못한 메시지 수, tracemalloc 최대 메모리를 잽니다.
+extract_body는 기본 한도와 프롬프트 예산(--budget 글자, include_html=False) 두 가지로 잽니다.
+    python tests/benchmarks/bench_mime.py --messages 500
+"""
+import argparse
+import base64
+import time
+import tracemalloc
+
+from common import print_table
+
+from services.mime_extractor import extract_body
+
+_PARAGRAPH = "회의 안건과 분기 실적을 공유드립니다. Please review the attached numbers before Friday. "
+
+
+def _data(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _leaf(mime_type, raw: bytes, charset="utf-8", filename=""):
+    return {"mimeType": mime_type, "filename": filename,
+            "headers": [{"name": "Content-Type", "value": f"{mime_type}; charset=\"{charset}\""}],
+            "body": {"size": len(raw), "data": _data(raw)}}
+
+
+def _multipart(mime_type, *parts):
+    return {"mimeType": mime_type, "filename": "",
+            "headers": [{"name": "Content-Type", "value": f"{mime_type}; boundary=\"b\""}],
+            "body": {"size": 0}, "parts": list(parts)}
+
+
+def _text(kb: int) -> str:
+    return (_PARAGRAPH * (kb * 1024 // len(_PARAGRAPH.encode("utf-8")) + 1))[:kb * 1024 // 2]
+
+
+def _corpus(messages: int):
+    """(이름, payload) 목록을 종류별로 돌아가며 만듭니다."""
+    kinds = [
+        ("plain utf-8 8 KB", lambda: _leaf("text/plain", _text(8).encode("utf-8"))),
+        ("alternative 20 KB + html 60 KB", lambda: _multipart(
+            "multipart/alternative",
+            _leaf("text/plain", _text(20).encode("utf-8")),
+            _leaf("text/html", f"<html><body><p>{_text(60)}</p></body></html>".encode("utf-8")))),
+        ("mixed > alternative + inline image 300 KB", lambda: _multipart(
+            "multipart/mixed",
+            _multipart("multipart/related",
+                       _multipart("multipart/alternative",
+                                  _leaf("text/plain", _text(12).encode("utf-8")),
+                                  _leaf("text/html", f"<p>{_text(36)}</p>".encode("utf-8"))),
+                       _leaf("image/png", b"\x89PNG" + bytes(300 * 1024), filename="banner.png")),
+            {"mimeType": "application/pdf", "filename": "report.pdf", "headers": [],
+             "body": {"size": 2_000_000, "attachmentId": "att-1"}})),
+        ("euc-kr alternative 16 KB", lambda: _multipart(
+            "multipart/alternative",
+            _leaf("text/plain", _text(16).encode("euc-kr", errors="replace"), charset="euc-kr"),
+            _leaf("text/html", f"<p>{_text(16)}</p>".encode("euc-kr", errors="replace"), charset="euc-kr"))),
+        ("html-only newsletter 1.5 MB", lambda: _leaf(
+            "text/html", ("<html><body>" + f"<div>{_text(4)}</div>" * 380 + "</body></html>").encode("utf-8"))),
+    ]
+    built = [(name, build()) for name, build in kinds]
+    return [built[index % len(built)] for index in range(messages)]
+
+
+def _legacy(payload) -> str:
+    # 변경 전 GmailService.get_email: 최상위 text/plain 파트만 UTF-8로 통째로 디코딩
+    if 'parts' in payload:
+        content = ''
+        for part in payload['parts']:
+            if part['mimeType'] == 'text/plain':
+                data = part['body'].get('data', '')
+                if data:
+                    content += base64.urlsafe_b64decode(data + '=' * (-len(data) % 4)).decode('utf-8')
+        return content
+    data = payload['body'].get('data', '')
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4)).decode('utf-8') if data else ''
+
+
+def _run(extract, corpus):
+    """처리 시간(s), 본문을 얻지 못한(빈 본문/디코딩 실패) 메시지 수를 반환합니다."""
+    empty = 0
+    started_at = time.perf_counter()
+    for _, payload in corpus:
+        try:
+            if not extract(payload):
+                empty += 1
+        except UnicodeDecodeError:
+            empty += 1
+    return time.perf_counter() - started_at, empty
+
+
+def _input_bytes(payload) -> int:
+    return len(payload.get('body', {}).get('data', '')) + sum(_input_bytes(part) for part in payload.get('parts', []))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--budget", type=int, default=8000)
+    args = parser.parse_args()
+
+    corpus = _corpus(args.messages)
+    input_mb = sum(_input_bytes(payload) for _, payload in corpus) / 1024 / 1024
+
+    variants = [
+        ("legacy top-level utf-8", _legacy),
+        ("extract_body (default limit)", lambda payload: extract_body(payload)["text"]),
+        (f"extract_body (budget {args.budget}, no html)",
+         lambda payload: extract_body(payload, max_chars=args.budget, include_html=False)["text"]),
+    ]
+    rows = []
+    for name, extract in variants:
+        _run(extract, corpus[:len(set(kind for kind, _ in corpus))])  # 워밍업
+        seconds, empty = _run(extract, corpus)
+
+        tracemalloc.start()
+        _run(extract, corpus)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        rows.append([name, args.messages / seconds, input_mb / seconds, empty, peak / 1024 / 1024])
+
+    print(f"{args.messages} messages, {input_mb:.1f} MB of base64 part data "
+          f"({', '.join(sorted(set(kind for kind, _ in corpus)))})")
+    print_table(["extractor", "msgs_per_s", "mb_per_s", "no_body", "peak_mb"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""전문 검색: FTS5(bm25) search_emails vs LIKE 전체 스캔 (user-020)
+
+Zipf 분포 단어로 만든 합성 이메일 --emails개를 --users명에게 나눠 저장한 뒤, 흔한 단어/중간 단어/드문 단어/
+두 단어 검색의 첫 페이지(--limit) 조회 시간 중앙값을 잽니다. 본문은 압축 저장되어 LIKE로 검색할 수 없으므로
+LIKE 기준선은 같은 데이터를 평문으로 담은 별도 테이블(emails_plain)에서 잽니다.
+    python tests/benchmarks/bench_search.py --emails 100000
+    python tests/benchmarks/bench_search.py --emails 1000000   # 요청의 1M 코퍼스 (시딩에 수 분 소요)
+"""
+import argparse
+import asyncio
+import itertools
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from common import measure, print_table
+
+from sqlalchemy import text
+
+from models.compressed_text import compress_body
+from models.database import AsyncSessionLocal, engine
+from models.email_model import init_db
+from services.email_search import _match_expression, search_emails
+
+_SYLLABLES = ["ka", "ri", "mo", "te", "su", "na", "lo", "pe", "zu", "vi", "do", "ha",
+              "회", "의", "보", "고", "일", "정", "계", "약", "결", "제", "안", "내"]
+
+
+def _vocabulary(size: int, rng: random.Random):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words, key=lambda word: rng.random())
+
+
+def _seed(emails: int, users: int, body_words: int, vocabulary):
+    rng = random.Random(42)
+    cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(vocabulary) + 1)))
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS emails_plain"))
+        conn.execute(text(
+            "CREATE TABLE emails_plain (id INTEGER PRIMARY KEY, user_id TEXT, subject TEXT, sender TEXT, "
+            "content TEXT, summary TEXT, received_at DATETIME)"
+        ))
+        conn.execute(text("CREATE INDEX ix_emails_plain_user_received ON emails_plain (user_id, received_at DESC)"))
+
+    base = datetime(2026, 1, 1)
+    chunk = 5000
+    for start in range(1, emails + 1, chunk):
+        rows = []
+        for email_pk in range(start, min(start + chunk, emails + 1)):
+            words = rng.choices(vocabulary, cum_weights=cum_weights, k=body_words + 12)
+            rows.append({
+                "id": email_pk, "email_id": f"m{email_pk}", "user_id": f"u{email_pk % users}",
+                "subject": " ".join(words[:6]), "sender": f"{words[6]}@example.com",
+                "content": " ".join(words[12:]), "summary": " ".join(words[7:12]),
+                "category": "WORK", "importance": float(email_pk % 100), "has_action_items": False,
+                "received_at": base + timedelta(seconds=email_pk),
+            })
+        with engine.begin() as conn:
+            conn.execute(text(
+                "INSERT INTO emails (id, email_id, user_id, subject, sender, content, summary, category, "
+                "importance, has_action_items, received_at) VALUES (:id, :email_id, :user_id, :subject, "
+                ":sender, :compressed, :summary, :category, :importance, :has_action_items, :received_at)"
+            ), [{**row, "compressed": compress_body(row["content"])} for row in rows])
+            # ORM 이벤트(email_search_index)와 같은 내용을 대량으로 색인
+            conn.execute(text(
+                "INSERT INTO emails_fts (rowid, subject, sender, content, summary) "
+                "VALUES (:id, :subject, :sender, :content, :summary)"
+            ), rows)
+            conn.execute(text(
+                "INSERT INTO emails_plain (id, user_id, subject, sender, content, summary, received_at) "
+                "VALUES (:id, :user_id, :subject, :sender, :content, :summary, :received_at)"
+            ), rows)
+
+
+async def _fts(user_id: str, query: str, limit: int, repeat: int) -> float:
+    """이벤트 루프/연결 생성 비용을 빼고 search_emails 호출만 잽니다. (중앙값, ms)"""
+    timings = []
+    async with AsyncSessionLocal() as db:
+        await search_emails(db, user_id, query, limit=limit)
+        for _ in range(repeat):
+            started_at = time.perf_counter()
+            await search_emails(db, user_id, query, limit=limit)
+            timings.append((time.perf_counter() - started_at) * 1000)
+    return statistics.median(timings)
+
+
+def _like(user_id: str, query: str, limit: int):
+    # 변경 전 방식의 기준선: 순위 없이 모든 단어가 어느 필드에든 포함된 이메일을 최신순으로
+    conditions, params = [], {"user_id": user_id, "limit": limit}
+    for index, term in enumerate(query.split()):
+        conditions.append(f"(subject LIKE :t{index} OR sender LIKE :t{index} OR content LIKE :t{index} "
+                          f"OR summary LIKE :t{index})")
+        params[f"t{index}"] = f"%{term}%"
+    with engine.connect() as conn:
+        return conn.execute(text(
+            f"SELECT id, subject, sender, summary, received_at FROM emails_plain "
+            f"WHERE user_id = :user_id AND {' AND '.join(conditions)} ORDER BY received_at DESC LIMIT :limit"
+        ), params).fetchall()
+
+
+def _matches(user_id: str, query: str) -> int:
+    # ORDER BY rank가 없으면 SQLite가 emails를 바깥 루프로 골라 행마다 MATCH를 실행하므로 CROSS JOIN으로 순서 고정
+    with engine.connect() as conn:
+        return conn.execute(text(
+            "SELECT count(*) FROM emails_fts CROSS JOIN emails ON emails.id = emails_fts.rowid "
+            "WHERE emails_fts MATCH :match AND emails.user_id = :user_id"
+        ), {"match": _match_expression(query.split(), "sqlite"), "user_id": user_id}).scalar()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--emails", type=int, default=100000)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--body-words", type=int, default=80)
+    parser.add_argument("--vocabulary", type=int, default=20000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    init_db()
+    vocabulary = _vocabulary(args.vocabulary, random.Random(7))
+    started_at = time.perf_counter()
+    _seed(args.emails, args.users, args.body_words, vocabulary)
+    print(f"seeded {args.emails} emails for {args.users} users in {time.perf_counter() - started_at:.1f} s")
+
+    queries = [
+        ("common word (rank 1)", vocabulary[0]),
+        ("mid word (rank 200)", vocabulary[199]),
+        ("rare word (rank 2000)", vocabulary[1999]),
+        ("very rare (rank 15000)", vocabulary[14999]),
+        ("two words (rank 6 + 51)", f"{vocabulary[5]} {vocabulary[50]}"),
+    ]
+    rows = []
+    for name, query in queries:
+        fts_ms = asyncio.run(_fts("u1", query, args.limit, args.repeat))
+        like_ms = measure(lambda: _like("u1", query, args.limit), args.repeat)
+        rows.append([name, _matches("u1", query), fts_ms, like_ms, like_ms / fts_ms])
+
+    print(f"first page ({args.limit}) for one user ({args.emails // args.users} emails), "
+          f"{args.body_words}-word bodies, median of {args.repeat}")
+    print_table(["query", "matches", "fts_ms", "like_ms", "speedup"], rows)
+
+
+if __name__ == "__main__":
+    main()
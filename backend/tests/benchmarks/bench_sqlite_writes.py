@@ -0,0 +1,170 @@
+"""SQLite 저장 처리량: 기본 저널 + 건별 커밋 vs WAL + 건별 커밋 vs WAL + 배치 저장 (user-015)
+
+--readers개 스레드가 --read-interval-ms마다 목록 조회를 반복하는 동안 --emails개 이메일을 --writers개 동시 작업으로 저장하고
+초당 저장 수, 조회 수, "database is locked" 오류 수를 잽니다.
+    python tests/benchmarks/bench_sqlite_writes.py --emails 2000 --writers 8 --readers 4
+"""
+import argparse
+import asyncio
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from common import print_table
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from models.database import Base, _set_sqlite_pragmas, engine as app_engine
+from models.email_model import Email, init_db
+from models.migrations import run_migrations
+from services import email_writer
+
+LIST_QUERY = text("SELECT id, subject, importance FROM emails WHERE user_id = 'bench' "
+                  "ORDER BY received_at DESC, id DESC LIMIT 50")
+
+
+def _email(index: int) -> Email:
+    return Email(
+        email_id=f"m{index}",
+        user_id="bench",
+        thread_id=f"t{index}",
+        subject=f"subject {index}",
+        sender="sender@example.com",
+        snippet="snippet",
+        content="본문 " * 200,
+        category="WORK",
+        importance=50.0,
+        received_at=datetime(2026, 1, 1) + timedelta(minutes=index),
+    )
+
+
+class Readers:
+    """목록 조회를 반복하는 스레드들"""
+
+    def __init__(self, engine, count: int, interval: float):
+        self.engine = engine
+        self.count = count
+        self.interval = interval
+        self.reads = 0
+        self.errors = 0
+        self._stop = threading.Event()
+        self._threads = [threading.Thread(target=self._run) for _ in range(count)]
+
+    def _run(self):
+        with self.engine.connect() as conn:
+            while not self._stop.is_set():
+                try:
+                    conn.execute(LIST_QUERY).fetchall()
+                    conn.commit()
+                    self.reads += 1
+                except OperationalError:
+                    conn.rollback()
+                    self.errors += 1
+                self._stop.wait(self.interval)
+
+    def __enter__(self):
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+
+
+def _per_row(engine, emails: int, writers: int):
+    """변경 전 process_email처럼 이메일마다 add/commit/refresh 합니다."""
+    Session = sessionmaker(bind=engine)
+    errors = [0]
+
+    def write(indexes):
+        db = Session()
+        try:
+            for index in indexes:
+                try:
+                    email = _email(index)
+                    db.add(email)
+                    db.commit()
+                    db.refresh(email)
+                except OperationalError:
+                    db.rollback()
+                    errors[0] += 1
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(writers) as pool:
+        list(pool.map(write, [range(start, emails, writers) for start in range(writers)]))
+    return errors[0]
+
+
+def _batched(emails: int, writers: int):
+    """email_writer.save_email로 동시에 저장합니다. (EMAIL_WRITE_BATCH_SIZE개씩 한 트랜잭션)"""
+    async def write(indexes):
+        for index in indexes:
+            await email_writer.save_email(_email(index))
+
+    async def run():
+        await asyncio.gather(*(write(range(start, emails, writers)) for start in range(writers)))
+
+    asyncio.run(run())
+    return 0
+
+
+def _prepare(engine):
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    with engine.begin() as conn:
+        journal_mode = conn.execute(text("PRAGMA journal_mode")).scalar()
+    return journal_mode
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--emails", type=int, default=2000)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--read-interval-ms", type=float, default=5)
+    args = parser.parse_args()
+
+    init_db()  # 모델/검색 색인 이벤트 등록, 앱 엔진(WAL) 테이블 생성
+
+    directory = tempfile.mkdtemp()
+    # 변경 전 엔진: 기본 rollback journal
+    default_engine = create_engine(f"sqlite:///{directory}/default.db", connect_args={"check_same_thread": False})
+    # WAL 엔진: 앱 엔진과 같은 PRAGMA
+    wal_engine = create_engine(f"sqlite:///{directory}/wal.db", connect_args={"check_same_thread": False,
+                                                                               "timeout": 5})
+    event.listen(wal_engine, "connect", _set_sqlite_pragmas)
+
+    scenarios = [
+        ("default journal, commit per email", default_engine,
+         lambda: _per_row(default_engine, args.emails, args.writers)),
+        ("WAL, commit per email", wal_engine, lambda: _per_row(wal_engine, args.emails, args.writers)),
+        ("WAL, email_writer batches", app_engine, lambda: _batched(args.emails, args.writers)),
+    ]
+
+    rows = []
+    for name, engine, write in scenarios:
+        journal_mode = _prepare(engine)
+        with Readers(engine, args.readers, args.read_interval_ms / 1000) as readers:
+            started_at = time.perf_counter()
+            write_errors = write()
+            seconds = time.perf_counter() - started_at
+        with engine.connect() as conn:
+            stored = conn.execute(text("SELECT COUNT(*) FROM emails")).scalar()
+        rows.append([name, journal_mode, stored, stored / seconds, readers.reads / seconds,
+                     write_errors, readers.errors])
+
+    print(f"{args.emails} emails, {args.writers} concurrent writers, "
+          f"{args.readers} reader threads (one list query per {args.read_interval_ms:.0f} ms each)")
+    print_table(["mode", "journal", "stored", "inserts_per_s", "reads_per_s", "write_errors", "read_errors"], rows)
+    print(email_writer.get_writer_stats())
+
+
+if __name__ == "__main__":
+    main()
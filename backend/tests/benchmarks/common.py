@@ -0,0 +1,37 @@
+"""벤치마크 스크립트 공통 설정
+
+tests/conftest.py와 같이 모듈 import 전에 환경 변수와 backend import 경로를 설정합니다.
+각 스크립트는 backend 디렉터리에서 `python tests/benchmarks/bench_<이름>.py`로 실행합니다.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/emails.db")
+
+
+def measure(func, repeat: int = 5) -> float:
+    """func를 repeat번 실행한 소요 시간의 중앙값(ms)을 반환합니다."""
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started_at) * 1000)
+    return statistics.median(timings)
+
+
+def print_table(headers, rows):
+    """결과를 고정폭 표로 출력합니다."""
+    rows = [[f"{value:.2f}" if isinstance(value, float) else str(value) for value in row] for row in rows]
+    widths = [max(len(str(header)), *(len(row[index]) for row in rows)) for index, header in enumerate(headers)]
+    print("  ".join(str(header).rjust(width) for header, width in zip(headers, widths)))
+    for row in rows:
+        print("  ".join(value.rjust(width) for value, width in zip(row, widths)))
@@ -0,0 +1,201 @@
+"""벤치마크용 로컬 가짜 Gmail 서버
+
+messages.get(format=metadata/full, metadataHeaders=, fields=)과 배치 요청(/batch)에 응답하며, 요청마다 latency만큼 지연합니다.
+FakeGmailServer.service()는 gmail.googleapis.com 요청을 이 서버로 보내는 Gmail 서비스 객체를 만듭니다.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import base64
+import json
+import re
+import threading
+import time
+
+import httplib2
+from googleapiclient.discovery import build
+
+GMAIL_ROOT_URL = "https://gmail.googleapis.com"
+
+
+def _parse_fields(mask: str, index: int = 0):
+    """fields 마스크(a,b/c(d,e))를 {이름: 하위 트리 또는 None} 트리로 바꿉니다."""
+    tree = {}
+    while index < len(mask):
+        end = index
+        while end < len(mask) and mask[end] not in ",()":
+            end += 1
+        *parents, name = mask[index:end].split("/")
+        node = tree
+        for parent in parents:
+            node = node.setdefault(parent, {})
+        if end < len(mask) and mask[end] == "(":
+            node[name], end = _parse_fields(mask, end + 1)
+        else:
+            node[name] = None
+        if end < len(mask) and mask[end] == ")":
+            return tree, end + 1
+        index = end + 1
+    return tree, index
+
+
+def apply_fields(value, mask: str):
+    """Gmail partial response처럼 fields 마스크에 있는 필드만 남깁니다."""
+    def apply(value, tree):
+        if tree is None:
+            return value
+        if isinstance(value, list):
+            return [apply(item, tree) for item in value]
+        if isinstance(value, dict):
+            return {key: apply(value[key], sub) for key, sub in tree.items() if key in value}
+        return value
+    return apply(value, _parse_fields(mask)[0])
+
+
+def _encode(text: str) -> str:
+    return base64.urlsafe_b64encode(text.encode("utf-8")).decode("ascii")
+
+
+def make_message(message_id: str, message_format: str = "full", body_chars: int = 4000,
+                 attachments: int = 1) -> dict:
+    """Gmail API 형식의 메시지를 만듭니다. (text/html 대안 본문 + 첨부 파일)"""
+    headers = [
+        {"name": "Delivered-To", "value": "me@example.com"},
+        {"name": "Received", "value": "by 2002:a05:6a10:1234 with SMTP id abc; Tue, 14 Oct 2026 00:00:00 -0700"},
+        {"name": "DKIM-Signature", "value": "v=1; a=rsa-sha256; c=relaxed/relaxed; d=example.com; " + "b" * 340},
+        {"name": "From", "value": "Sender <sender@example.com>"},
+        {"name": "To", "value": "me@example.com"},
+        {"name": "Subject", "value": f"Weekly report {message_id}"},
+        {"name": "Date", "value": "Tue, 14 Oct 2026 09:00:00 +0900"},
+        {"name": "Message-ID", "value": f"<{message_id}@mail.example.com>"},
+        {"name": "List-Unsubscribe", "value": "<https://example.com/unsubscribe>"},
+        {"name": "Content-Type", "value": "multipart/mixed; boundary=\"000000000000abcdef\""},
+    ]
+    message = {
+        "id": message_id,
+        "threadId": f"t-{message_id}",
+        "labelIds": ["INBOX", "UNREAD", "CATEGORY_UPDATES"],
+        "snippet": f"Weekly report {message_id} snippet text",
+        "historyId": "123456",
+        "internalDate": "1792000000000",
+        "sizeEstimate": body_chars * 3,
+    }
+    if message_format == "metadata":
+        message["payload"] = {"mimeType": "multipart/mixed", "headers": headers}
+        return message
+
+    text = ("보고서 본문입니다. Quarterly numbers and notes. " * (body_chars // 40 + 1))[:body_chars]
+    html = f"<html><body><div style=\"font-family:Arial\"><p>{text}</p></div></body></html>"
+    parts = [{
+        "partId": "0",
+        "mimeType": "multipart/alternative",
+        "filename": "",
+        "headers": [{"name": "Content-Type", "value": "multipart/alternative"}],
+        "body": {"size": 0},
+        "parts": [
+            {"partId": "0.0", "mimeType": "text/plain", "filename": "",
+             "headers": [{"name": "Content-Type", "value": "text/plain; charset=\"UTF-8\""}],
+             "body": {"size": len(text), "data": _encode(text)}},
+            {"partId": "0.1", "mimeType": "text/html", "filename": "",
+             "headers": [{"name": "Content-Type", "value": "text/html; charset=\"UTF-8\""}],
+             "body": {"size": len(html), "data": _encode(html)}},
+        ],
+    }]
+    for index in range(attachments):
+        parts.append({
+            "partId": str(index + 1),
+            "mimeType": "application/pdf",
+            "filename": f"report-{index}.pdf",
+            "headers": [{"name": "Content-Type", "value": f"application/pdf; name=\"report-{index}.pdf\""},
+                        {"name": "Content-Disposition", "value": f"attachment; filename=\"report-{index}.pdf\""}],
+            "body": {"size": 250000, "attachmentId": "ANGjdJ" + "x" * 600},
+        })
+    message["payload"] = {"partId": "", "mimeType": "multipart/mixed", "filename": "", "headers": headers,
+                          "body": {"size": 0}, "parts": parts}
+    return message
+
+
+class FakeGmailServer:
+    """요청마다 latency초 지연하는 로컬 Gmail API 서버 (별도 스레드에서 실행)"""
+
+    def __init__(self, latency: float = 0.02, body_chars: int = 4000, attachments: int = 1):
+        self.latency = latency
+        self.body_chars = body_chars
+        self.attachments = attachments
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # 헤더와 본문을 한 번에 보내 지연 ACK로 인한 추가 지연이 없도록 함
+            wbufsize = 1 << 16
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, content_type: str, body: bytes):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                server.requests += 1
+                time.sleep(server.latency)
+                self._send(200, "application/json; charset=UTF-8", server.message_json(self.path).encode("utf-8"))
+
+            def do_POST(self):
+                server.requests += 1
+                time.sleep(server.latency)
+                body = self.rfile.read(int(self.headers["Content-Length"])).decode("utf-8")
+                parts = re.findall(r"Content-ID: <([^>]+)>.*?GET (/gmail/v1/users/me/messages/\S+)", body, re.S)
+                boundary = "batch_boundary"
+                chunks = [
+                    f"--{boundary}\r\nContent-Type: application/http\r\nContent-ID: <response-{content_id}>\r\n\r\n"
+                    f"HTTP/1.1 200 OK\r\nContent-Type: application/json; charset=UTF-8\r\n\r\n"
+                    f"{server.message_json(path)}\r\n"
+                    for content_id, path in parts
+                ]
+                content = ("".join(chunks) + f"--{boundary}--\r\n").encode("utf-8")
+                self._send(200, f"multipart/mixed; boundary={boundary}", content)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def message_json(self, path: str) -> str:
+        url = urlparse(path)
+        query = parse_qs(url.query)
+        message_id = url.path.rsplit("/", 1)[-1]
+        message = make_message(message_id, query.get("format", ["full"])[0], self.body_chars, self.attachments)
+        if "metadataHeaders" in query and message["payload"].get("headers"):
+            names = {name.lower() for name in query["metadataHeaders"]}
+            message["payload"]["headers"] = [
+                header for header in message["payload"]["headers"] if header["name"].lower() in names
+            ]
+        if "fields" in query:
+            message = apply_fields(message, query["fields"][0])
+        return json.dumps(message)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def http(self) -> httplib2.Http:
+        """gmail.googleapis.com 요청을 로컬 서버로 보내는 HTTP 객체를 만듭니다."""
+        base_url = self.base_url
+
+        class LocalHttp(httplib2.Http):
+            def request(self, uri, *args, **kwargs):
+                return super().request(uri.replace(GMAIL_ROOT_URL, base_url), *args, **kwargs)
+
+        return LocalHttp()
+
+    def service(self):
+        return build("gmail", "v1", http=self.http(), static_discovery=True, cache_discovery=False)
@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# 모듈 import 시점에 엔진/클라이언트가 만들어지므로 환경 변수를 먼저 설정
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+os.environ.setdefault("GEMINI_API_KEY", "test")
+os.environ.setdefault("JWT_SECRET_KEY", "test")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/emails.db")
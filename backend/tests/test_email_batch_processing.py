@@ -0,0 +1,123 @@
+import asyncio
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from services import email_classifier, email_processor
+
+
+class FakeGmail:
+    user_id = "u1"
+
+    async def get_email(self, email_id):
+        return {
+            "id": email_id,
+            "thread_id": f"t-{email_id}",
+            "subject": f"subject {email_id}",
+            "sender": f"Sender {email_id} <{email_id}@example.com>",
+            "date": datetime(2024, 1, 1),
+            "content": f"body of {email_id}",
+            "html_content": None,
+            "snippet": f"snippet {email_id}",
+            "label_ids": ["INBOX"],
+            "headers": {},
+        }
+
+
+class FakeDb:
+    async def scalar(self, query):
+        return None
+
+    async def get(self, model, key):
+        return None
+
+    async def rollback(self):
+        pass
+
+
+def _analysis(category):
+    return {
+        "category": category,
+        "importance": 80.0,
+        "summary": "요약",
+        "key_points": [],
+        "action_items": [],
+        "sentiment": "NEUTRAL",
+        "analyzed_at": datetime.utcnow().isoformat(),
+    }
+
+
+@pytest.fixture
+def model(monkeypatch):
+    """Gemini 호출을 스텁으로 바꾸고 호출 횟수를 기록합니다. m0만 업무 메일, 나머지는 뉴스레터입니다."""
+    calls = {"batch": 0, "analyze": 0}
+
+    async def generate_content(prompt, user_id=None):
+        calls["batch"] += 1
+        ids = [line.split(": ", 1)[1] for line in prompt.splitlines() if line.startswith("### id: ")]
+        return SimpleNamespace(text=json.dumps([
+            {"id": email_id, "category": "WORK" if email_id == "m0" else "NEWSLETTER", "importance": 40}
+            for email_id in ids
+        ]))
+
+    async def analyze_email(subject, content, sender, user_id=None):
+        calls["analyze"] += 1
+        return _analysis("WORK" if "m0" in subject else "NEWSLETTER")
+
+    async def save_email(email):
+        return email
+
+    async def apply_to_thread(db, thread, email, thread_analysis):
+        pass
+
+    monkeypatch.setattr(email_classifier, "generate_content", generate_content)
+    monkeypatch.setattr(email_processor, "analyze_email", analyze_email)
+    monkeypatch.setattr(email_processor.email_writer, "save_email", save_email)
+    monkeypatch.setattr(email_processor, "apply_to_thread", apply_to_thread)
+    return calls
+
+
+def test_batch_path_uses_fewer_model_calls_than_per_message(model):
+    email_ids = [f"m{i}" for i in range(10)]
+
+    async def per_message():
+        return [await email_processor.process_email(email_id, FakeGmail(), FakeDb()) for email_id in email_ids]
+
+    per_message_results = asyncio.run(per_message())
+    per_message_calls = model["batch"] + model["analyze"]
+    model.update(batch=0, analyze=0)
+
+    results = asyncio.run(email_processor.process_emails(email_ids, FakeGmail(), FakeDb()))
+    batch_calls = model["batch"] + model["analyze"]
+
+    # 메시지별: 10회, 배치: 분류 1회 + 요약이 필요한 업무 메일 1회
+    assert per_message_calls == 10
+    assert model == {"batch": 1, "analyze": 1}
+    assert batch_calls == 2
+    assert [results[email_id].category for email_id in email_ids] == [
+        email.category for email in per_message_results
+    ]
+    assert results["m1"].summary == "snippet m1"
+    assert results["m0"].summary == "요약"
+
+
+def test_single_message_skips_batch_request(model):
+    results = asyncio.run(email_processor.process_emails(["m1"], FakeGmail(), FakeDb()))
+
+    assert model == {"batch": 0, "analyze": 1}
+    assert results["m1"].category == "NEWSLETTER"
+
+
+def test_unparsed_batch_items_fall_back_to_full_analysis(model, monkeypatch):
+    async def generate_content(prompt, user_id=None):
+        model["batch"] += 1
+        return SimpleNamespace(text="not json")
+
+    monkeypatch.setattr(email_classifier, "generate_content", generate_content)
+
+    results = asyncio.run(email_processor.process_emails(["m1", "m2"], FakeGmail(), FakeDb()))
+
+    assert model == {"batch": 1, "analyze": 2}
+    assert all(results[email_id].summary == "요약" for email_id in ("m1", "m2"))
@@ -0,0 +1,76 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+from models.database import AsyncSessionLocal, async_engine, engine
+from models.email_model import init_db
+from services.email_processor import encode_cursor, query_emails
+
+
+class _CursorRow:
+    id = 10
+    importance = 50.0
+
+    def __init__(self, received_at):
+        self.received_at = received_at
+
+
+def _captured_sql(**kwargs):
+    """query_emails가 실행하는 SELECT 문과 파라미터를 가져옵니다."""
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            await query_emails(db, "u1", **kwargs)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        asyncio.run(run())
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+    return next((statement, parameters) for statement, parameters in captured if "FROM emails" in statement)
+
+
+def _query_plan(statement, parameters) -> str:
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    return "\n".join(row[-1] for row in rows)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def schema():
+    if engine.dialect.name != "sqlite":
+        pytest.skip("EXPLAIN QUERY PLAN 형식은 SQLite 기준")
+    init_db()
+
+
+@pytest.mark.parametrize("kwargs, index", [
+    ({"sort_by": "received_at"}, "ix_emails_user_received"),
+    ({"sort_by": "received_at", "sort_order": "asc"}, "ix_emails_user_received"),
+    ({"sort_by": "importance"}, "ix_emails_user_importance"),
+    ({"sort_by": "received_at", "category": "WORK"}, "ix_emails_user_category_received"),
+    ({"sort_by": "importance", "category": "WORK"}, "ix_emails_user_category_importance"),
+])
+def test_list_pages_use_composite_index(kwargs, index):
+    plan = _query_plan(*_captured_sql(limit=20, **kwargs))
+
+    assert f"USING INDEX {index}" in plan or f"USING COVERING INDEX {index}" in plan, plan
+    assert "USE TEMP B-TREE FOR ORDER BY" not in plan, plan
+
+
+@pytest.mark.parametrize("sort_by, index", [
+    ("received_at", "ix_emails_user_received"),
+    ("importance", "ix_emails_user_importance"),
+])
+def test_cursor_pages_use_composite_index(sort_by, index):
+    cursor = encode_cursor(_CursorRow(datetime(2026, 10, 1)), sort_by)
+
+    plan = _query_plan(*_captured_sql(limit=20, sort_by=sort_by, cursor=cursor))
+
+    assert index in plan, plan
+    assert "USE TEMP B-TREE FOR ORDER BY" not in plan, plan
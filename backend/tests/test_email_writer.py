@@ -0,0 +1,32 @@
+import asyncio
+import threading
+
+from services import email_writer
+
+
+def test_saves_made_during_a_commit_are_grouped_into_the_next(monkeypatch):
+    batches = []
+    release = threading.Event()
+
+    def commit_batch(emails):
+        batches.append(list(emails))
+        if len(batches) == 1:
+            release.wait(timeout=5)  # 첫 커밋이 끝나기 전에 나머지 저장 요청이 들어옴
+        return [True] * len(emails)
+
+    monkeypatch.setattr(email_writer, "_commit_batch", commit_batch)
+    monkeypatch.setattr(email_writer, "EMAIL_WRITE_BATCH_SIZE", 3)
+
+    async def main():
+        first = asyncio.create_task(email_writer.save_email("e0"))
+        await asyncio.sleep(0.05)
+        rest = [asyncio.create_task(email_writer.save_email(f"e{index}")) for index in range(1, 6)]
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(first, *rest)
+
+    saved = asyncio.run(main())
+
+    assert saved == [f"e{index}" for index in range(6)]
+    assert batches == [["e0"], ["e1", "e2", "e3"], ["e4", "e5"]]
+    assert email_writer._flush_task is None
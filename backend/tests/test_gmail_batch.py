@@ -0,0 +1,111 @@
+import asyncio
+import json
+import re
+from urllib.parse import parse_qs, urlparse
+
+import httplib2
+import pytest
+from googleapiclient.discovery import build
+
+from services import gmail_service
+from services.gmail_service import GmailService
+
+
+class FakeBatchHttp:
+    """Gmail 배치/개별 요청에 응답하는 가짜 HTTP 전송 계층.
+
+    배치 응답은 요청과 반대 순서로 돌려주고, failing에 있는 메시지는 배치 안에서 500으로 응답합니다.
+    """
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.batches = []
+        self.single_ids = []
+        self.single_queries = []
+
+    @staticmethod
+    def _message(message_id):
+        return {"id": message_id, "threadId": f"t-{message_id}", "snippet": f"snippet {message_id}",
+                "payload": {"headers": [{"name": "Subject", "value": f"subject {message_id}"},
+                                        {"name": "From", "value": "a@example.com"},
+                                        {"name": "Date", "value": "Tue, 14 Oct 2026 09:00:00 +0900"}]}}
+
+    def request(self, uri, method="GET", body=None, headers=None, **kwargs):
+        path = urlparse(uri).path
+        if path.startswith("/batch"):
+            return self._batch(body if isinstance(body, str) else body.decode("utf-8"))
+
+        message_id = path.rsplit("/", 1)[-1]
+        self.single_ids.append(message_id)
+        self.single_queries.append({key: value for key, value in parse_qs(urlparse(uri).query).items()
+                                    if key in ("format", "fields")})
+        return httplib2.Response({"status": "200"}), json.dumps(self._message(message_id)).encode("utf-8")
+
+    def _batch(self, body):
+        parts = re.findall(r"Content-ID: <([^>]+)>.*?GET /gmail/v1/users/me/messages/([^?\s]+)", body, re.S)
+        self.batches.append([message_id for _, message_id in parts])
+
+        boundary = "batch_boundary"
+        chunks = []
+        for content_id, message_id in reversed(parts):
+            if message_id in self.failing:
+                status, payload = "500 Internal Server Error", {"error": {"code": 500, "message": "backend error"}}
+            else:
+                status, payload = "200 OK", self._message(message_id)
+            chunks.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\nContent-ID: <response-{content_id}>\r\n\r\n"
+                f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n\r\n{json.dumps(payload)}\r\n"
+            )
+        content = "".join(chunks) + f"--{boundary}--\r\n"
+        response = httplib2.Response({"status": "200", "content-type": f"multipart/mixed; boundary={boundary}"})
+        return response, content.encode("utf-8")
+
+
+@pytest.fixture
+def gmail(monkeypatch):
+    http = FakeBatchHttp(failing={"m2"})
+    service = build("gmail", "v1", http=http, static_discovery=True, cache_discovery=False)
+    monkeypatch.setattr(gmail_service, "get_gmail_client", lambda *args: (service, None))
+    return GmailService("u1", "access", "refresh"), service, http
+
+
+def test_batch_failure_falls_back_to_single_get(gmail):
+    client, service, http = gmail
+
+    results = client._batch_get_metadata(service, ["m1", "m2", "m3"])
+
+    assert http.batches == [["m1", "m2", "m3"]]
+    assert http.single_ids == ["m2"]
+    assert set(results) == {"m1", "m2", "m3"}
+    assert results["m2"]["snippet"] == "snippet m2"
+
+
+def test_batches_are_split_by_batch_size(gmail, monkeypatch):
+    client, service, http = gmail
+    monkeypatch.setattr(gmail_service, "GMAIL_BATCH_SIZE", 2)
+
+    results = client._batch_get_metadata(service, ["m1", "m2", "m3"])
+
+    assert http.batches == [["m1", "m2"], ["m3"]]
+    assert http.single_ids == ["m2"]
+    assert len(results) == 3
+
+
+def test_get_metadata_keeps_request_order(gmail):
+    client, service, http = gmail
+
+    result = asyncio.run(client.get_metadata(["m3", "m1", "m2"]))
+
+    # 배치 응답이 역순이고 m2는 개별 요청으로 나중에 받지만 요청 순서를 유지
+    assert [message["id"] for message in result] == ["m3", "m1", "m2"]
+    assert result[0]["subject"] == "subject m3"
+    assert http.single_ids == ["m2"]
+
+
+def test_get_email_headers_uses_metadata_tier(gmail):
+    client, service, http = gmail
+
+    result = asyncio.run(client.get_email_headers("m1"))
+
+    assert http.single_queries == [{"format": ["metadata"], "fields": [gmail_service.FETCH_FIELDS["metadata"]]}]
+    assert result["headers"]["Subject"] == "subject m1"
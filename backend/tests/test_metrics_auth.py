@@ -0,0 +1,38 @@
+import jwt
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from routers import auth
+from routers.auth import ALGORITHM, JWT_SECRET_KEY
+from services import gemini_client
+
+
+def _headers(email):
+    token = jwt.encode({"sub": email, "user_id": email, "access_token": "a", "refresh_token": "r"},
+                       JWT_SECRET_KEY, algorithm=ALGORITHM)
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(auth, "ADMIN_EMAILS", {"admin@example.com"})
+    return TestClient(main.app)
+
+
+@pytest.mark.parametrize("path", ["/api/metrics/gemini", "/api/metrics/queue", "/api/metrics/pool"])
+def test_metrics_require_admin(client, path):
+    assert client.get(path).status_code == 401
+    assert client.get(path, headers=_headers("user@example.com")).status_code == 403
+    assert client.get(path, headers=_headers("Admin@example.com")).status_code == 200
+
+
+def test_gemini_metrics_do_not_expose_user_ids(client, monkeypatch):
+    monkeypatch.setattr(gemini_client, "_queues", {"user@example.com": [object(), object()], "other@example.com": []})
+
+    stats = client.get("/api/metrics/gemini", headers=_headers("admin@example.com")).json()
+
+    assert "user@example.com" not in str(stats)
+    assert stats["queued"] == 2
+    assert stats["queued_users"] == 1
+    assert stats["max_queued_per_user"] == 2
@@ -0,0 +1,100 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import BYTEA, TEXT, VARCHAR
+
+from models import migrations
+from models.database import engine
+from models.email_model import init_db
+
+
+class FakePostgresConnection:
+    dialect = SimpleNamespace(name="postgresql")
+
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        self.statements.append(str(statement))
+
+
+@pytest.mark.parametrize("column_types, altered", [
+    ({"content": BYTEA(), "html_content": BYTEA()}, []),
+    ({"content": TEXT(), "html_content": VARCHAR()}, ["content", "html_content"]),
+    ({"content": BYTEA(), "html_content": TEXT()}, ["html_content"]),
+])
+def test_migration_3_only_converts_text_columns(monkeypatch, column_types, altered):
+    conn = FakePostgresConnection()
+    monkeypatch.setattr(migrations, "inspect", lambda _: SimpleNamespace(
+        get_columns=lambda table: [{"name": name, "type": type_} for name, type_ in column_types.items()]
+    ))
+
+    migrations._migration_3(conn)
+
+    assert [statement.split()[5] for statement in conn.statements] == altered
+
+
+def test_migrations_are_idempotent_on_fresh_schema():
+    init_db()
+    with engine.begin() as conn:
+        for _, _, migration in migrations.MIGRATIONS:
+            migration(conn)
+        assert "user_id" in {column["name"] for column in inspect(conn).get_columns("emails")}
+        assert conn.execute(text("SELECT COUNT(*) FROM schema_version")).scalar() >= len(migrations.MIGRATIONS)
+
+
+def test_migration_8_makes_email_id_unique_per_user(tmp_path):
+    old_engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with old_engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE emails (id INTEGER NOT NULL, email_id VARCHAR NOT NULL, user_id VARCHAR, "
+            "category VARCHAR NOT NULL, PRIMARY KEY (id), UNIQUE (email_id))"
+        ))
+        conn.execute(text("CREATE INDEX ix_emails_user_received ON emails (user_id, id DESC)"))
+        conn.execute(text("INSERT INTO emails (id, email_id, user_id, category) VALUES (1, 'm1', 'u1', 'WORK')"))
+
+        migrations._migration_8(conn)
+        migrations._migration_8(conn)
+
+        conn.execute(text("INSERT INTO emails (id, email_id, user_id, category) VALUES (2, 'm1', 'u2', 'WORK')"))
+        with pytest.raises(IntegrityError):
+            with conn.begin_nested():
+                conn.execute(text("INSERT INTO emails (id, email_id, user_id, category) VALUES (3, 'm1', 'u1', 'WORK')"))
+        indexes = {index["name"] for index in inspect(conn).get_indexes("emails")}
+        rows = conn.execute(text("SELECT id, email_id, user_id FROM emails ORDER BY id")).fetchall()
+
+    assert {"ux_emails_user_email", "ix_emails_user_received"} <= indexes
+    assert [tuple(row) for row in rows] == [(1, "m1", "u1"), (2, "m1", "u2")]
+
+
+def test_migration_8_drops_postgres_unique_constraint(monkeypatch):
+    conn = FakePostgresConnection()
+    monkeypatch.setattr(migrations, "inspect", lambda _: SimpleNamespace(
+        get_unique_constraints=lambda table: [{"name": "emails_email_id_key", "column_names": ["email_id"]}],
+        get_indexes=lambda table: [{"name": "ix_emails_user_received", "unique": False, "column_names": ["user_id"]}],
+    ))
+
+    migrations._migration_8(conn)
+
+    assert conn.statements == [
+        'ALTER TABLE emails DROP CONSTRAINT "emails_email_id_key"',
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_emails_user_email ON emails (user_id, email_id)",
+    ]
+
+
+def test_ownerless_email_is_not_claimed_twice_by_same_user():
+    init_db()
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM emails"))
+        for email_pk, user_id in ((1, "u1"), (2, None)):
+            conn.execute(text(
+                "INSERT INTO emails (id, email_id, user_id, category, importance, received_at, has_action_items) "
+                "VALUES (:id, 'm1', :user_id, 'WORK', 50, '2024-01-01 00:00:00', 0)"
+            ), {"id": email_pk, "user_id": user_id})
+
+        assert migrations.claim_ownerless_emails(conn, "u1") == 0
+        assert migrations.claim_ownerless_emails(conn, "u2", ["m1"]) == 1
+        conn.execute(text("DELETE FROM email_threads"))
+        conn.execute(text("DELETE FROM emails"))
@@ -0,0 +1,127 @@
+import base64
+
+import pytest
+
+from services.mime_extractor import decode_header_value, extract_body
+
+
+def _data(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def leaf(mime_type, text, charset="utf-8", filename="", disposition=None):
+    """Gmail API(format=full) 형식의 단일 파트를 만듭니다."""
+    headers = [{"name": "Content-Type", "value": f"{mime_type}; charset=\"{charset}\""}]
+    if disposition:
+        headers.append({"name": "Content-Disposition", "value": disposition})
+    raw = text if isinstance(text, bytes) else text.encode(charset)
+    return {"mimeType": mime_type, "filename": filename, "headers": headers, "body": {"data": _data(raw)}}
+
+
+def multipart(mime_type, *parts, filename=""):
+    return {"mimeType": mime_type, "filename": filename,
+            "headers": [{"name": "Content-Type", "value": f"{mime_type}; boundary=\"b\""}],
+            "body": {"size": 0}, "parts": list(parts)}
+
+
+# (이름, payload, 기대 평문, 기대 HTML)
+CORPUS = [
+    (
+        "nested_alternative_in_mixed",
+        multipart(
+            "multipart/mixed",
+            multipart("multipart/alternative",
+                      leaf("text/plain", "본문 평문"),
+                      leaf("text/html", "<p>본문 <b>HTML</b></p>")),
+            leaf("application/pdf", b"%PDF-1.4", filename="invoice.pdf"),
+            leaf("text/plain", "첨부 텍스트", filename="note.txt", disposition="attachment; filename=note.txt"),
+        ),
+        "본문 평문",
+        "<p>본문 <b>HTML</b></p>",
+    ),
+    (
+        "related_inside_alternative",
+        multipart(
+            "multipart/alternative",
+            leaf("text/plain", "plain first"),
+            multipart("multipart/related",
+                      leaf("text/html", "<div>related html</div>"),
+                      leaf("image/png", b"\x89PNG", filename="logo.png")),
+        ),
+        "plain first",
+        "<div>related html</div>",
+    ),
+    (
+        "iso_2022_jp",
+        leaf("text/plain", "こんにちは、世界", charset="iso-2022-jp"),
+        "こんにちは、世界",
+        None,
+    ),
+    (
+        "euc_kr",
+        multipart("multipart/alternative",
+                  leaf("text/plain", "안녕하세요 회의 일정입니다", charset="euc-kr"),
+                  leaf("text/html", "<p>안녕하세요</p>", charset="euc-kr")),
+        "안녕하세요 회의 일정입니다",
+        "<p>안녕하세요</p>",
+    ),
+    (
+        "unknown_charset_falls_back_to_utf8",
+        leaf("text/plain", "fallback ✓".encode("utf-8"), charset="x-unknown-charset"),
+        "fallback ✓",
+        None,
+    ),
+    (
+        "html_only",
+        leaf("text/html", "<html><head><style>p{}</style></head><body><p>첫 줄</p><p>둘째 &amp; 줄</p></body></html>"),
+        "첫 줄\n둘째 & 줄",
+        "<html><head><style>p{}</style></head><body><p>첫 줄</p><p>둘째 &amp; 줄</p></body></html>",
+    ),
+    (
+        "embedded_rfc822",
+        multipart(
+            "multipart/mixed",
+            leaf("text/plain", "전달합니다."),
+            multipart("message/rfc822",
+                      multipart("multipart/alternative",
+                                leaf("text/plain", "원본 메일 본문"),
+                                leaf("text/html", "<p>원본 메일 본문</p>")),
+                      filename="forwarded.eml"),
+        ),
+        "전달합니다.\n원본 메일 본문",
+        "<p>원본 메일 본문</p>",
+    ),
+]
+
+
+@pytest.mark.parametrize("name, payload, text, html", CORPUS, ids=[case[0] for case in CORPUS])
+def test_extract_body_corpus(name, payload, text, html):
+    body = extract_body(payload)
+
+    assert body["text"] == text
+    assert body["html"] == html
+    assert body["truncated"] is False
+
+
+def test_html_only_without_html_output():
+    payload = leaf("text/html", "<p>only html</p>")
+
+    body = extract_body(payload, include_html=False)
+
+    assert body == {"text": "only html", "html": None, "truncated": False}
+
+
+def test_truncates_at_max_chars_without_splitting_multibyte():
+    payload = multipart("multipart/mixed",
+                        leaf("text/plain", "가" * 100),
+                        leaf("text/plain", "읽지 않는 파트"))
+
+    body = extract_body(payload, max_chars=10)
+
+    assert body["text"] == "가" * 10
+    assert body["truncated"] is True
+
+
+def test_decode_header_value():
+    assert decode_header_value("=?UTF-8?B?7ZqM7J2YIOyViOuCtA==?=") == "회의 안내"
+    assert decode_header_value("=?x-unknown?Q?hello?=") == "hello"
@@ -0,0 +1,30 @@
+import asyncio
+
+from services import poll_scheduler
+
+
+def test_triggered_polls_are_referenced_until_done(monkeypatch):
+    finished = []
+
+    async def poll_user(user_id, notified_at=None):
+        await asyncio.sleep(0)
+        finished.append(user_id)
+        poll_scheduler._in_flight.discard(user_id)
+
+    monkeypatch.setattr(poll_scheduler, "_poll_user", poll_user)
+    monkeypatch.setattr(poll_scheduler, "_in_flight", set())
+    monkeypatch.setattr(poll_scheduler, "_poll_tasks", set())
+
+    async def main():
+        monkeypatch.setattr(poll_scheduler, "_semaphore", asyncio.Semaphore(1))
+        poll_scheduler.trigger_poll("u1")
+        running = set(poll_scheduler._poll_tasks)
+        await asyncio.gather(*running)
+        await asyncio.sleep(0)
+        return running
+
+    running = asyncio.run(main())
+
+    assert len(running) == 1
+    assert finished == ["u1"]
+    assert poll_scheduler._poll_tasks == set()
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from services import processing_queue
+from services.processing_queue import ProcessingStatus
+
+
+class FakeGmail:
+    user_id = "u1"
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    # 모듈 전역 큐/워커는 이벤트 루프마다 새로 만듦
+    monkeypatch.setattr(processing_queue, "_queue", None)
+    monkeypatch.setattr(processing_queue, "_workers", [])
+    monkeypatch.setattr(processing_queue, "_statuses", {})
+    monkeypatch.setattr(processing_queue, "_attempts", {})
+    monkeypatch.setattr(processing_queue, "PROCESSING_WORKERS", 1)
+    monkeypatch.setattr(processing_queue, "PROCESSING_RETRY_BASE_SECONDS", 0.01)
+    monkeypatch.setattr(processing_queue, "PROCESSING_MAX_RETRIES", 2)
+    return processing_queue
+
+
+def _run(queue, failures: int):
+    calls = []
+
+    async def process_emails(email_ids, gmail_service, db):
+        results = {}
+        for email_id in email_ids:
+            calls.append(email_id)
+            results[email_id] = RuntimeError("Gmail 503") if len(calls) <= failures else object()
+        return results
+
+    async def main():
+        events = queue.subscribe("u1")
+        queue.process_emails = process_emails
+        await queue.enqueue("m1", FakeGmail())
+        try:
+            event = await asyncio.wait_for(events.get(), timeout=5)
+        finally:
+            queue.unsubscribe("u1", events)
+            await queue.stop_workers()
+        return event
+
+    return calls, asyncio.run(main())
+
+
+def test_transient_failure_is_retried_until_processed(queue, monkeypatch):
+    monkeypatch.setattr(queue, "process_emails", None)
+
+    calls, event = _run(queue, failures=2)
+
+    assert calls == ["m1", "m1", "m1"]
+    assert event["status"] == ProcessingStatus.DONE
+    assert queue.get_status("m1") is None
+    assert queue._attempts == {}
+
+
+def test_failure_is_reported_after_retries_are_exhausted(queue, monkeypatch):
+    monkeypatch.setattr(queue, "process_emails", None)
+
+    calls, event = _run(queue, failures=10)
+
+    assert calls == ["m1"] * 3
+    assert event["status"] == ProcessingStatus.FAILED
+    assert queue.get_status("m1") == ProcessingStatus.FAILED
+
+
+def test_events_are_delivered_only_to_the_owner(queue):
+    async def main():
+        own, other = queue.subscribe("u1"), queue.subscribe("u2")
+        queue._notify("u1", "m1", ProcessingStatus.DONE)
+        queue.unsubscribe("u1", own)
+        queue.unsubscribe("u2", other)
+        return own, other
+
+    own, other = asyncio.run(main())
+
+    assert own.get_nowait() == {"id": "m1", "status": ProcessingStatus.DONE, "user_id": "u1"}
+    assert other.empty()
+    assert queue._subscribers == {}
+
+
+def test_worker_drains_queued_messages_into_one_batch(queue, monkeypatch):
+    batches = []
+
+    async def process_emails(email_ids, gmail_service, db):
+        batches.append(list(email_ids))
+        return {email_id: object() for email_id in email_ids}
+
+    monkeypatch.setattr(queue, "process_emails", process_emails)
+    monkeypatch.setattr(queue, "PROCESSING_BATCH_SIZE", 3)
+
+    async def main():
+        for i in range(5):
+            await queue.enqueue(f"m{i}", FakeGmail())
+        await asyncio.wait_for(queue._queue.join(), timeout=5)
+        await queue.stop_workers()
+
+    asyncio.run(main())
+
+    assert batches == [["m0", "m1", "m2"], ["m3", "m4"]]
@@ -0,0 +1,38 @@
+import time
+
+import pytest
+
+from services.text_preprocessor import SUMMARY_TOKEN_BUDGET, clean_body, preprocess_body
+
+
+@pytest.mark.parametrize("body", [
+    "본문" + "\n" * 200000,
+    "본문" + " \n" * 100000,
+    "본문" + "\n \t\n" * 50000,
+])
+def test_blank_line_runs_are_linear(body):
+    started_at = time.perf_counter()
+    clean_body(body)
+    preprocess_body(body, SUMMARY_TOKEN_BUDGET)
+
+    # 이전 정규식은 16KB 빈 줄에 수 초가 걸렸음
+    assert time.perf_counter() - started_at < 1.0
+
+
+def test_reply_headers_are_still_cut():
+    body = "안녕하세요.\n\n  On Mon, 1 Jan 2026 Kim <kim@example.com> wrote:\n> 이전 메일"
+    assert clean_body(body) == "안녕하세요."
+
+    body = "확인했습니다.\n-----Original Message-----\nFrom: a@example.com\n이전"
+    assert clean_body(body) == "확인했습니다."
+
+    body = "네.\n\nFrom: Kim <kim@example.com>\n Sent: Monday\n이전"
+    assert clean_body(body) == "네."
+
+
+def test_input_is_truncated_before_cleaning():
+    text, stats = preprocess_body("가" * 1000000, 100)
+
+    assert text.endswith("…(이하 생략)")
+    assert len(text) < 400
+    assert stats["original_tokens"] > stats["final_tokens"]
@@ -0,0 +1,117 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from models.email_model import SessionLocal, init_db
+from models.sync_state_model import SyncState
+from models.user_model import User
+from services import poll_scheduler, processing_queue, push_service
+from services.push_service import encode_notification
+
+URL = "/api/webhooks/gmail?token=secret"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    init_db()
+    db = SessionLocal()
+    try:
+        db.query(SyncState).delete()
+        db.query(User).delete()
+        db.add(User(user_id="u1", email="me@example.com", access_token="a", refresh_token="r"))
+        db.add(SyncState(user_id="u1", history_id="500"))
+        db.commit()
+    finally:
+        db.close()
+
+    monkeypatch.setattr(push_service, "GMAIL_PUSH_VERIFICATION_TOKEN", "secret")
+    monkeypatch.setattr(push_service, "GMAIL_PUSH_AUDIENCE", None)
+
+    calls = {"polls": [], "enqueued": []}
+    monkeypatch.setattr(poll_scheduler, "trigger_poll",
+                        lambda user_id, notified_at=None: calls["polls"].append(user_id))
+
+    async def enqueue(email_id, gmail_service, notified_at=None):
+        calls["enqueued"].append(email_id)
+    monkeypatch.setattr(processing_queue, "enqueue", enqueue)
+
+    # startup 이벤트(워커/스케줄러)는 실행하지 않음
+    test_client = TestClient(main.app)
+    test_client.calls = calls
+    return test_client
+
+
+def test_valid_notification_triggers_one_sync(client):
+    response = client.post(URL, json=encode_notification("me@example.com", "501"))
+
+    assert response.status_code == 204
+    assert client.calls["polls"] == ["u1"]
+    assert client.calls["enqueued"] == []
+
+
+@pytest.mark.parametrize("history_id", ["499", "500"])
+def test_stale_history_id_is_ignored(client, history_id):
+    response = client.post(URL, json=encode_notification("me@example.com", history_id))
+
+    assert response.status_code == 204
+    assert client.calls == {"polls": [], "enqueued": []}
+
+
+def test_unknown_user_is_ignored(client):
+    response = client.post(URL, json=encode_notification("other@example.com", "900"))
+
+    assert response.status_code == 204
+    assert client.calls == {"polls": [], "enqueued": []}
+
+
+def test_malformed_envelope_is_acknowledged(client):
+    response = client.post(URL, json={"message": {"data": "not-base64-json"}})
+
+    assert response.status_code == 204
+    assert client.calls["polls"] == []
+
+
+def test_wrong_verification_token_is_rejected(client):
+    response = client.post("/api/webhooks/gmail?token=wrong", json=encode_notification("me@example.com", "501"))
+
+    assert response.status_code == 403
+    assert client.calls["polls"] == []
+
+
+def test_unset_verification_token_rejects_everything(client, monkeypatch):
+    monkeypatch.setattr(push_service, "GMAIL_PUSH_VERIFICATION_TOKEN", None)
+    monkeypatch.setattr(push_service, "GMAIL_PUBSUB_TOPIC", "projects/p/topics/gmail")
+
+    response = client.post("/api/webhooks/gmail", json=encode_notification("me@example.com", "501"))
+
+    assert response.status_code == 403
+    assert client.calls["polls"] == []
+    assert not push_service.is_push_enabled()
+
+
+@pytest.fixture
+def oidc(monkeypatch):
+    monkeypatch.setattr(push_service, "GMAIL_PUSH_AUDIENCE", "https://example.com/api/webhooks/gmail")
+    monkeypatch.setattr(push_service, "GMAIL_PUSH_SERVICE_ACCOUNT", "push@p.iam.gserviceaccount.com")
+
+    def verify_oauth2_token(token, request, audience):
+        assert audience == "https://example.com/api/webhooks/gmail"
+        if token == "forged":
+            raise ValueError("Could not verify token signature.")
+        return {"email": token, "email_verified": True}
+    monkeypatch.setattr(push_service.id_token, "verify_oauth2_token", verify_oauth2_token)
+
+
+@pytest.mark.parametrize("authorization, status, polls", [
+    ("Bearer push@p.iam.gserviceaccount.com", 204, ["u1"]),
+    ("Bearer other@p.iam.gserviceaccount.com", 403, []),
+    ("Bearer forged", 403, []),
+    (None, 403, []),
+])
+def test_oidc_token_is_verified(client, oidc, authorization, status, polls):
+    headers = {"Authorization": authorization} if authorization else {}
+
+    response = client.post(URL, json=encode_notification("me@example.com", "501"), headers=headers)
+
+    assert response.status_code == status
+    assert client.calls["polls"] == polls